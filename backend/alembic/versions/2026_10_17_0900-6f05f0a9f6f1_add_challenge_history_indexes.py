@@ -0,0 +1,60 @@
+"""add challenge history and unanalyzed partial indexes
+
+Revision ID: 6f05f0a9f6f1
+Revises: 6bcd24e7b29b
+Create Date: 2026-10-17 09:00:12.418305
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6f05f0a9f6f1"
+down_revision: Union[str, Sequence[str], None] = "6bcd24e7b29b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: add composite history index and unanalyzed partial index"""
+    # 本番テーブルをロックしないようCONCURRENTLYで作成（トランザクション外で実行）
+    with op.get_context().autocommit_block():
+        # 履歴取得: child_id で絞り込み created_at DESC（同時刻はid DESC）で並べる
+        op.create_index(
+            "ix_challenges_child_id_created_at",
+            "challenges",
+            ["child_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_where=sa.text("transcript IS NOT NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # 自動分析: 未分析チャレンジをid順に走査
+        op.create_index(
+            "ix_challenges_unanalyzed",
+            "challenges",
+            ["id"],
+            postgresql_where=sa.text(
+                "ai_feedback IS NULL AND transcript IS NOT NULL AND transcript <> ''"
+            ),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema: drop challenge partial indexes"""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_challenges_unanalyzed",
+            table_name="challenges",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_challenges_child_id_created_at",
+            table_name="challenges",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,54 @@
+"""add challenges.updated_at and history version index
+
+Revision ID: 9a3c5e7d1b2f
+Revises: 6f05f0a9f6f1
+Create Date: 2026-10-17 12:00:41.207215
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9a3c5e7d1b2f"
+down_revision: Union[str, Sequence[str], None] = "6f05f0a9f6f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: add challenges.updated_at and (child_id, updated_at) partial index"""
+    # 定数デフォルトのため既存行の書き換えは発生しない（既存行は移行時刻になり、ETagが一度だけ変わる）
+    op.add_column(
+        "challenges",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+    )
+    # 本番テーブルをロックしないようCONCURRENTLYで作成（トランザクション外で実行）
+    with op.get_context().autocommit_block():
+        # 履歴ETag: child_id ごとの max(updated_at)
+        op.create_index(
+            "ix_challenges_child_id_updated_at",
+            "challenges",
+            ["child_id", "updated_at"],
+            postgresql_where=sa.text("transcript IS NOT NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema: drop challenges.updated_at and its index"""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_challenges_child_id_updated_at",
+            table_name="challenges",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("challenges", "updated_at")
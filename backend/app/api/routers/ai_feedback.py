@@ -1,22 +1,38 @@
-from datetime import date
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.cache import invalidate_user_responses
+from app.core.database import get_async_db
 from app.models.challenge import Challenge
 from app.models.child import Child
+from app.models.user import User
 from app.services.ai_feedback_service import AIFeedbackService
+from app.services.feedback_batch_api_service import FeedbackBatchAPIService, batch_summary
+from app.services.feedback_batch_service import calculate_age, feedback_batch_processor
 
 router = APIRouter(prefix="/ai-feedback", tags=["ai-feedback"])
 
 
+async def _owner_uid(db: AsyncSession, child_id) -> Optional[str]:
+    """子どもの保護者のfirebase_uid（レスポンスキャッシュの無効化用）"""
+    result = await db.execute(
+        select(User.firebase_uid).join(Child, Child.user_id == User.id).where(Child.id == child_id)
+    )
+    return result.scalar_one_or_none()
+
+
 @router.post("/generate/{challenge_id}")
-async def generate_feedback_for_challenge(challenge_id: str, db: Session = Depends(get_db)):
+async def generate_feedback_for_challenge(
+    challenge_id: str, db: AsyncSession = Depends(get_async_db)
+):
     """個別チャレンジのAIフィードバック生成"""
 
     # チャレンジデータを取得
-    challenge = db.query(Challenge).filter(Challenge.id == challenge_id).first()
+    result = await db.execute(select(Challenge).where(Challenge.id == challenge_id))
+    challenge = result.scalars().first()
     if not challenge:
         raise HTTPException(status_code=404, detail="チャレンジが見つかりません")
 
@@ -24,15 +40,8 @@ async def generate_feedback_for_challenge(challenge_id: str, db: Session = Depen
         raise HTTPException(status_code=400, detail="文字起こしデータがありません")
 
     # 子どもの年齢情報を取得（修正版）
-    child = db.query(Child).filter(Child.id == challenge.child_id).first()
-    child_age = None
-    if child and child.birthdate:
-        today = date.today()
-        child_age = (
-            today.year
-            - child.birthdate.year
-            - ((today.month, today.day) < (child.birthdate.month, child.birthdate.day))
-        )
+    result = await db.execute(select(Child.birthdate).where(Child.id == challenge.child_id))
+    child_age = calculate_age(result.scalar_one_or_none())
 
     try:
         # AIフィードバック生成
@@ -41,12 +50,15 @@ async def generate_feedback_for_challenge(challenge_id: str, db: Session = Depen
             transcript=challenge.transcript, child_age=child_age
         )
 
-        # 元のコメントを保存
-        original_comment = challenge.comment
+        # 元のフィードバックを保存
+        original_comment = challenge.ai_feedback
 
-        # commentカラムを更新
-        challenge.comment = new_feedback
-        db.commit()
+        # ai_feedbackカラムを更新
+        owner_uid = await _owner_uid(db, challenge.child_id)
+        challenge.ai_feedback = new_feedback
+        await db.commit()
+        if owner_uid:
+            await invalidate_user_responses(owner_uid)
 
         return {
             "success": True,
@@ -62,10 +74,11 @@ async def generate_feedback_for_challenge(challenge_id: str, db: Session = Depen
 
 
 @router.post("/preview/{challenge_id}")
-async def preview_feedback(challenge_id: str, db: Session = Depends(get_db)):
+async def preview_feedback(challenge_id: str, db: AsyncSession = Depends(get_async_db)):
     """AIフィードバックのプレビュー（DBは更新しない）"""
 
-    challenge = db.query(Challenge).filter(Challenge.id == challenge_id).first()
+    result = await db.execute(select(Challenge).where(Challenge.id == challenge_id))
+    challenge = result.scalars().first()
     if not challenge:
         raise HTTPException(status_code=404, detail="チャレンジが見つかりません")
 
@@ -73,15 +86,8 @@ async def preview_feedback(challenge_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="文字起こしデータがありません")
 
     # 子どもの年齢情報を取得（修正版）
-    child = db.query(Child).filter(Child.id == challenge.child_id).first()
-    child_age = None
-    if child and child.birthdate:
-        today = date.today()
-        child_age = (
-            today.year
-            - child.birthdate.year
-            - ((today.month, today.day) < (child.birthdate.month, child.birthdate.day))
-        )
+    result = await db.execute(select(Child.birthdate).where(Child.id == challenge.child_id))
+    child_age = calculate_age(result.scalar_one_or_none())
 
     try:
         ai_service = AIFeedbackService()
@@ -93,7 +99,7 @@ async def preview_feedback(challenge_id: str, db: Session = Depends(get_db)):
             "success": True,
             "challenge_id": challenge_id,
             "transcript": challenge.transcript,
-            "current_comment": challenge.comment,
+            "current_comment": challenge.ai_feedback,
             "preview_feedback": preview_feedback,
             "child_age": child_age,
         }
@@ -103,96 +109,101 @@ async def preview_feedback(challenge_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("/auto-analyze")
-async def auto_analyze_challenges(db: Session = Depends(get_db)):
+async def auto_analyze_challenges(
+    start_after: Optional[str] = Query(
+        None, description="前回レポートのnext_cursor（続きから再開）"
+    ),
+    max_pages: Optional[int] = Query(None, ge=1, description="処理するページ数の上限"),
+):
     """未分析チャレンジの自動AI分析"""
 
-    try:
-        # commentが空のチャレンジを取得
-        unanalyzed_challenges = (
-            db.query(Challenge)
-            .filter(
-                Challenge.transcript.isnot(None),
-                Challenge.transcript != "",
-                (Challenge.comment.is_(None)) | (Challenge.comment == ""),
-            )
-            .all()
-        )
+    if feedback_batch_processor.running:
+        raise HTTPException(status_code=409, detail="自動分析は既に実行中です")
 
-        if not unanalyzed_challenges:
-            return {
-                "success": True,
-                "message": "分析対象のチャレンジがありません",
-                "processed_count": 0,
-            }
-
-        ai_service = AIFeedbackService()
-        success_count = 0
-        error_count = 0
-
-        for challenge in unanalyzed_challenges:
-            try:
-                # 子どもの年齢情報を取得（修正版）
-                child = db.query(Child).filter(Child.id == challenge.child_id).first()
-
-                # birthdateから年齢を計算
-                child_age = None
-                if child and child.birthdate:
-                    today = date.today()
-                    child_age = (
-                        today.year
-                        - child.birthdate.year
-                        - ((today.month, today.day) < (child.birthdate.month, child.birthdate.day))
-                    )
-
-                # AI分析実行
-                feedback = await ai_service.generate_feedback(
-                    transcript=challenge.transcript, child_age=child_age
-                )
-
-                # commentに保存
-                challenge.comment = feedback
-                success_count += 1
-
-            except Exception as e:
-                error_count += 1
-                print(f"Challenge {challenge.id} 分析失敗: {e}")
-
-        # 一括保存
-        db.commit()
+    try:
+        progress = await feedback_batch_processor.run(start_after=start_after, max_pages=max_pages)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"分析失敗: {str(e)}")
 
+    report = progress.report()
+    if progress.processed == 0:
         return {
             "success": True,
-            "message": f"AI分析完了: 成功 {success_count}件, 失敗 {error_count}件",
-            "processed_count": len(unanalyzed_challenges),
-            "success_count": success_count,
-            "error_count": error_count,
+            "message": "分析対象のチャレンジがありません",
+            **report,
         }
 
+    return {
+        "success": True,
+        "message": f"AI分析完了: 成功 {progress.success}件, 失敗 {progress.errors}件",
+        **report,
+    }
+
+
+@router.get("/auto-analyze/progress")
+async def get_auto_analyze_progress():
+    """直近の自動分析の進捗（中断時はnext_cursorから再開可能）"""
+    progress = feedback_batch_processor.last_progress
+    if progress is None:
+        return {"running": False, "progress": None}
+
+    return {"running": feedback_batch_processor.running, "progress": progress.report()}
+
+
+@router.post("/batch")
+async def submit_feedback_batch(
+    regenerate: bool = Query(False, description="Trueの場合は分析済みチャレンジも再生成"),
+    limit: Optional[int] = Query(None, ge=1, description="投入するチャレンジ数の上限"),
+):
+    """OpenAI Batch APIで一括フィードバック生成を投入（オフラインモード）"""
+    service = FeedbackBatchAPIService()
+    try:
+        batch, request_count = await service.export_and_submit(regenerate=regenerate, limit=limit)
     except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"分析失敗: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"バッチ投入に失敗しました: {str(e)}")
+
+    if batch is None:
+        return {"success": True, "message": "対象のチャレンジがありません", "request_count": 0}
+
+    return {"success": True, "request_count": request_count, **batch_summary(batch)}
+
+
+@router.get("/batch/{batch_id}")
+async def get_feedback_batch(batch_id: str):
+    """Batch APIの処理状況"""
+    try:
+        batch = await FeedbackBatchAPIService().get_batch(batch_id)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=f"バッチが見つかりません: {str(e)}")
+
+    return batch_summary(batch)
+
+
+@router.post("/batch/{batch_id}/ingest")
+async def ingest_feedback_batch(batch_id: str):
+    """完了したバッチの結果をai_feedbackへ取り込む（保護者ごとのキャッシュ無効化はingest内で実施）"""
+    try:
+        result = await FeedbackBatchAPIService().ingest(batch_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"バッチ結果の取り込みに失敗しました: {str(e)}")
+
+    return {"success": True, **result}
 
 
 @router.get("/analysis-status")
-async def get_analysis_status(db: Session = Depends(get_db)):
+async def get_analysis_status(db: AsyncSession = Depends(get_async_db)):
     """分析状況の確認"""
 
-    total_with_transcript = (
-        db.query(Challenge)
-        .filter(Challenge.transcript.isnot(None), Challenge.transcript != "")
-        .count()
-    )
-
-    analyzed = (
-        db.query(Challenge)
-        .filter(
-            Challenge.transcript.isnot(None),
-            Challenge.transcript != "",
-            Challenge.comment.isnot(None),
-            Challenge.comment != "",
-        )
-        .count()
+    # 1クエリで総数と分析済み件数を集計
+    result = await db.execute(
+        select(
+            func.count(Challenge.id),
+            func.count(Challenge.ai_feedback),
+        ).where(Challenge.transcript.is_not(None), Challenge.transcript != "")
     )
+    total_with_transcript, analyzed = result.one()
 
     unanalyzed = total_with_transcript - analyzed
 
@@ -207,20 +218,24 @@ async def get_analysis_status(db: Session = Depends(get_db)):
 
 
 @router.delete("/{challenge_id}")
-async def delete_challenge(challenge_id: str, db: Session = Depends(get_db)):
+async def delete_challenge(challenge_id: str, db: AsyncSession = Depends(get_async_db)):
     """チャレンジ記録削除"""
 
-    challenge = db.query(Challenge).filter(Challenge.id == challenge_id).first()
+    result = await db.execute(select(Challenge).where(Challenge.id == challenge_id))
+    challenge = result.scalars().first()
 
     if not challenge:
         raise HTTPException(status_code=404, detail="チャレンジ記録が見つかりません")
 
     try:
-        db.delete(challenge)
-        db.commit()
+        owner_uid = await _owner_uid(db, challenge.child_id)
+        await db.delete(challenge)
+        await db.commit()
+        if owner_uid:
+            await invalidate_user_responses(owner_uid)
 
         return {"message": "チャレンジ記録を削除しました", "deleted_id": challenge_id}
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"削除中にエラーが発生しました: {str(e)}")
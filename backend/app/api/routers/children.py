@@ -1,46 +1,73 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, text
-from sqlalchemy.orm import Session
-
-from app.core.database import get_db
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants.config import CACHE_CONFIG
+from app.core.cache import cached, invalidate_user_responses
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.models.challenge import Challenge
+from app.middleware.response_cache import compute_weak_etag, etag_matches, not_modified_response
 from app.models.child import Child as ChildModel
-from app.models.user import User
 from app.schemas.child import Child as ChildSchema
 from app.schemas.child import ChildCreate
-from app.utils.auth import get_current_user
+from app.utils.principal import Principal, get_current_principal, get_or_create_principal
 
 router = APIRouter()
 
 
+@cached(
+    ttl=CACHE_CONFIG["CHILDREN_TTL"],
+    key_prefix="children",
+    stale_ttl=CACHE_CONFIG["CHILDREN_STALE_TTL"],
+    key_func=lambda user_id: str(user_id),
+)
+async def load_children(user_id: UUID) -> Dict[str, Any]:
+    """
+    ユーザーの子どもリストとそのETag（バックグラウンド再取得にも使うため専用セッションで取得）
+
+    ETagは本文と同じ行から算出して一緒にキャッシュするため、キャッシュが古くても
+    ETagと本文が食い違うことはない
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(ChildModel).where(ChildModel.user_id == user_id))
+        children = result.scalars().all()
+        return {
+            "etag": children_etag(user_id, children),
+            "children": [
+                ChildSchema.model_validate(child).model_dump(mode="json") for child in children
+            ],
+        }
+
+
+def children_etag(user_id: UUID, children: Sequence[ChildModel]) -> str:
+    """件数と最終更新日時から子どもリストの弱いETagを算出"""
+    last_modified = max(
+        (child.updated_at or child.created_at for child in children if child.created_at),
+        default=None,
+    )
+    return compute_weak_etag("children", user_id, len(children), last_modified)
+
+
 @router.get("/", response_model=List[ChildSchema])
 async def get_children(
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    principal: Principal = Depends(get_or_create_principal),
 ):
-    """認証されたユーザーの子どもリストを取得"""
+    """認証されたユーザーの子どもリストを取得（If-None-Matchが一致すれば304）"""
     try:
-        # Firebase UIDでユーザーを検索
-        result = db.execute(select(User).where(User.firebase_uid == current_user["user_id"]))
-        user = result.scalars().first()
-
-        # ユーザーが存在しない場合は新規作成
-        if not user:
-            user = User(
-                email=current_user.get("email", ""),
-                name=current_user.get("name", ""),
-                firebase_uid=current_user["user_id"],
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-
-        # ユーザーの子どもリストを取得
-        result = db.execute(select(ChildModel).where(ChildModel.user_id == user.id))
-        children = result.scalars().all()
-        # Pydanticモデルに変換して返却
-        return [ChildSchema.model_validate(child) for child in children]
+        # ユーザーの子どもリストとETagを取得（キャッシュ経由）
+        snapshot = await load_children(principal.user_id)
+        etag = snapshot["etag"]
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag)
+
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+        return snapshot["children"]
     except Exception as error:
         raise HTTPException(status_code=500, detail=str(error))
 
@@ -48,23 +75,16 @@ async def get_children(
 @router.get("/{child_id}", response_model=ChildSchema)
 async def get_child(
     child_id: str,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    principal: Principal = Depends(get_current_principal),
 ):
     """特定の子どもの詳細情報を取得（自分の子どものみ）"""
     try:
-        # 現在のユーザーを取得
-        result = db.execute(select(User).where(User.firebase_uid == current_user["user_id"]))
-        user = result.scalars().first()
-
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
         # 指定されたIDの子どもを取得（セキュリティ：自分の子どものみ）
-        result = db.execute(
+        result = await db.execute(
             select(ChildModel).where(
                 ChildModel.id == child_id,
-                ChildModel.user_id == user.id,
+                ChildModel.user_id == principal.user_id,
             )
         )
         child = result.scalars().first()
@@ -84,36 +104,19 @@ async def get_child(
 @router.post("/", response_model=ChildSchema)
 async def create_child(
     child_data: ChildCreate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    principal: Principal = Depends(get_or_create_principal),
 ):
     """新しい子どもを作成"""
     try:
-        # 現在のユーザーを取得または作成
-        result = db.execute(select(User).where(User.firebase_uid == current_user["user_id"]))
-        user = result.scalars().first()
-
-        if not user:
-            user = User(
-                email=current_user.get("email", ""),
-                name=current_user.get("name", ""),
-                firebase_uid=current_user["user_id"],
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-
         # 同一ユーザー内での重複ニックネームチェック
-        existing_child = (
-            db.execute(
-                select(ChildModel).where(
-                    ChildModel.user_id == user.id,
-                    ChildModel.nickname == child_data.nickname.strip(),
-                )
+        result = await db.execute(
+            select(ChildModel).where(
+                ChildModel.user_id == principal.user_id,
+                ChildModel.nickname == child_data.nickname.strip(),
             )
-            .scalars()
-            .first()
         )
+        existing_child = result.scalars().first()
 
         if existing_child:
             raise HTTPException(
@@ -125,15 +128,17 @@ async def create_child(
         child_dict = child_data.model_dump()
 
         # 子どもレコードを作成
-        child = ChildModel(**child_dict, user_id=user.id)
+        child = ChildModel(**child_dict, user_id=principal.user_id)
         db.add(child)
-        db.commit()
-        db.refresh(child)
+        await db.commit()
+        await db.refresh(child)
+        await load_children.invalidate(principal.user_id)
+        await invalidate_user_responses(principal.firebase_uid)
 
         # Pydanticモデルに変換して返却
         return ChildSchema.model_validate(child)
     except Exception as error:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(error))
 
 
@@ -141,23 +146,16 @@ async def create_child(
 async def update_child(
     child_id: str,
     child_data: ChildCreate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    principal: Principal = Depends(get_current_principal),
 ):
     """子ども情報を更新"""
     try:
-        # 現在のユーザーを取得
-        result = db.execute(select(User).where(User.firebase_uid == current_user["user_id"]))
-        user = result.scalars().first()
-
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
         # 指定されたIDの子どもを取得（セキュリティ：自分の子どものみ）
-        result = db.execute(
+        result = await db.execute(
             select(ChildModel).where(
                 ChildModel.id == child_id,
-                ChildModel.user_id == user.id,
+                ChildModel.user_id == principal.user_id,
             )
         )
         child = result.scalars().first()
@@ -169,17 +167,14 @@ async def update_child(
         if hasattr(child_data, "nickname") and child_data.nickname:
             nickname_to_check = child_data.nickname.strip()
             if nickname_to_check != child.nickname:  # 現在のニックネームと異なる場合のみチェック
-                existing_child = (
-                    db.execute(
-                        select(ChildModel).where(
-                            ChildModel.user_id == user.id,
-                            ChildModel.nickname == nickname_to_check,
-                            ChildModel.id != child.id,  # 自分以外
-                        )
+                result = await db.execute(
+                    select(ChildModel).where(
+                        ChildModel.user_id == principal.user_id,
+                        ChildModel.nickname == nickname_to_check,
+                        ChildModel.id != child.id,  # 自分以外
                     )
-                    .scalars()
-                    .first()
                 )
+                existing_child = result.scalars().first()
 
                 if existing_child:
                     raise HTTPException(
@@ -193,34 +188,33 @@ async def update_child(
             if value is not None:  # None以外の値のみ更新
                 setattr(child, key, value)
 
-        db.commit()
-        db.refresh(child)
+        await db.commit()
+        await db.refresh(child)
+        await load_children.invalidate(principal.user_id)
+        await invalidate_user_responses(principal.firebase_uid)
 
         return ChildSchema.model_validate(child)
 
     except HTTPException:
         raise
     except Exception as error:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(error))
 
 
 @router.delete("/{child_id}")
 async def delete_child(
-    child_id: str, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)
+    child_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    principal: Principal = Depends(get_current_principal),
 ):
     """子ども情報を削除する（関連データも含めて）"""
     try:
-        # 現在のユーザーを取得
-        result = db.execute(select(User).where(User.firebase_uid == current_user["user_id"]))
-        user = result.scalars().first()
-
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
         # 指定されたIDの子どもを取得（セキュリティ：自分の子どものみ）
-        result = db.execute(
-            select(ChildModel).where(ChildModel.id == child_id, ChildModel.user_id == user.id)
+        result = await db.execute(
+            select(ChildModel).where(
+                ChildModel.id == child_id, ChildModel.user_id == principal.user_id
+            )
         )
         child = result.scalars().first()
 
@@ -228,20 +222,20 @@ async def delete_child(
             raise HTTPException(status_code=404, detail="指定された子ども情報が見つかりません")
 
         # 関連データを削除（challenges テーブル）
-        db.execute(
-            text("DELETE FROM challenges WHERE child_id = :child_id"), {"child_id": child_id}
-        )
+        await db.execute(delete(Challenge).where(Challenge.child_id == child.id))
 
         # 子どもレコードを削除
-        db.delete(child)
-        db.commit()
+        await db.delete(child)
+        await db.commit()
+        await load_children.invalidate(principal.user_id)
+        await invalidate_user_responses(principal.firebase_uid)
 
         return {"message": "子ども情報を削除しました", "deleted_id": child_id}
 
     except HTTPException:
         raise
     except Exception as error:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500, detail=f"削除処理中にエラーが発生しました: {str(error)}"
         )
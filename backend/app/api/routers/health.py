@@ -11,6 +11,7 @@ from app.core.config import settings
 from app.core.database import database, get_db
 from app.core.logging_config import get_logger, log_server_status
 from app.core.resource_monitor import get_resource_summary, resource_monitor
+from app.services.feedback_cache import feedback_cache
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -102,6 +103,8 @@ async def detailed_health_check(db: AsyncSession = Depends(get_db)):
         "disk_usage_percent": disk_percent,
         "active_alerts": alerts,
         "cache_stats": cache_stats,
+        "feedback_cache_stats": feedback_cache.stats(),
+        "openai_client": resource_summary["openai_client"],
     }
 
     # 異常時は503エラーを返す
@@ -1,23 +1,32 @@
+import json
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.constants.config import PAGINATION
+from app.core.cache import invalidate_user_responses
 from app.core.database import get_async_db
+from app.core.service_registry import service_registry
+from app.middleware.response_cache import compute_weak_etag, etag_matches, not_modified_response
 from app.models.challenge import Challenge
 from app.models.child import Child
-from app.models.user import User
+from app.repositories.challenge_repository import ChallengeRepository
 from app.services.ai_feedback_service import AIFeedbackService
-from app.utils.auth import get_current_user
+from app.services.feedback_job_service import (
+    FeedbackJob,
+    feedback_worker_pool,
+    save_challenge_feedback,
+)
+from app.utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.utils.principal import Principal, get_current_principal
 
 router = APIRouter(prefix="/api/voice", tags=["voice-transcription"])
 
-# AIフィードバックサービスのインスタンス作成
-ai_feedback_service = AIFeedbackService()
-
 
 # PydanticモデルでJSONを受け取る
 class TranscribeRequest(BaseModel):
@@ -34,8 +43,11 @@ def test_endpoint():
 @router.post("/transcribe")
 async def transcribe_text(
     request: TranscribeRequest,
+    queued: bool = Query(
+        False, description="Trueの場合はフィードバック生成をジョブに回し202を返す"
+    ),
     db: AsyncSession = Depends(get_async_db),
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
 ):
     """文字起こし結果を受け取りDBに保存し、AIフィードバックを生成"""
     transcript = request.transcript
@@ -47,18 +59,10 @@ async def transcribe_text(
     print(f"  - transcript length: {len(transcript) if transcript else 0}")
 
     try:
-        # 現在のユーザーを取得
-        user_result = await db.execute(
-            select(User).where(User.firebase_uid == current_user["user_id"])
-        )
-        user = user_result.scalars().first()
-        if not user:
-            raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
-
         # 親子関係を検証してから子どもを取得
         child_uuid = UUID(child_id)
         result = await db.execute(
-            select(Child).where(Child.id == child_uuid, Child.user_id == user.id)
+            select(Child).where(Child.id == child_uuid, Child.user_id == principal.user_id)
         )
         child = result.scalars().first()
         if not child:
@@ -71,6 +75,7 @@ async def transcribe_text(
         db.add(challenge)
         await db.commit()
         await db.refresh(challenge)
+        await invalidate_user_responses(principal.firebase_uid)
 
         child_name = child.nickname or child.name or "お子さま"
 
@@ -89,11 +94,37 @@ async def transcribe_text(
         except Exception:
             child_age = None
 
+        # キューモード: フィードバック生成はワーカーに任せて即時応答
+        if queued:
+            try:
+                await feedback_worker_pool.submit(
+                    FeedbackJob(
+                        challenge_id=str(challenge.id),
+                        transcript=transcript,
+                        child_age=child_age,
+                        feedback_type="english_challenge",
+                        owner_uid=principal.firebase_uid,
+                    )
+                )
+            except Exception as e:
+                # ai_feedbackが未設定のまま残るため、auto-analyzeで後から補完される
+                print(f"⚠️ フィードバックジョブ投入失敗: {str(e)}")
+
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "transcript_id": str(challenge.id),
+                    "challenge_id": str(challenge.id),
+                    "status": "pending",
+                },
+            )
+
         # AIフィードバック生成（年齢付き）
         try:
             print("🤖 AIフィードバック生成開始...")
             print(f"   - transcript: {transcript[:50]}...")
             print(f"   - child_age: {child_age}")
+            ai_feedback_service = await service_registry.aget("ai_feedback")
             feedback = await ai_feedback_service.generate_feedback(
                 transcript=transcript,
                 child_age=child_age,
@@ -106,12 +137,13 @@ async def transcribe_text(
             print("⚠️ AIフィードバック生成に失敗、デフォルトメッセージを使用")
             print(f"   エラー詳細: {str(e)}")
             print(f"   スタックトレース: {traceback.format_exc()}")
-            feedback = f"「{transcript}」と話してくれてありがとう！とても上手に話せていますね。これからも頑張ってください！"
+            feedback = AIFeedbackService.fallback_feedback(transcript)
 
         # Challenge更新
         challenge.ai_feedback = feedback
         db.add(challenge)
         await db.commit()
+        await invalidate_user_responses(principal.firebase_uid)
 
         return {"transcript_id": str(challenge.id), "status": "completed", "comment": feedback}
 
@@ -147,37 +179,107 @@ async def transcribe_text(
         )
 
 
+def _sse_event(event: str, data: dict) -> str:
+    """Server-Sent Events形式に整形"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/transcribe/stream")
+async def transcribe_text_stream(
+    request: TranscribeRequest,
+    db: AsyncSession = Depends(get_async_db),
+    principal: Principal = Depends(get_current_principal),
+):
+    """文字起こし結果を保存し、AIフィードバックをSSEでストリーミング返却"""
+    try:
+        child_uuid = UUID(request.child_id)
+    except ValueError:
+        return JSONResponse(
+            status_code=400, content={"detail": "無効なchild_idです", "error_code": "INVALID_UUID"}
+        )
+
+    result = await db.execute(
+        select(Child).where(Child.id == child_uuid, Child.user_id == principal.user_id)
+    )
+    child = result.scalars().first()
+    if not child:
+        raise HTTPException(status_code=403, detail="この子供への音声データ投稿権限がありません")
+
+    challenge = Challenge(child_id=child_uuid, transcript=request.transcript)
+    db.add(challenge)
+    await db.commit()
+    # 生成中に接続を保持しないよう、ストリーム開始前にセッションを閉じて接続をプールへ返す
+    # （idはflush時にクライアント側で採番済み、保存は save_challenge_feedback の別セッションで行う）
+    await db.close()
+    await invalidate_user_responses(principal.firebase_uid)
+
+    challenge_id = str(challenge.id)
+    transcript = request.transcript
+    owner_uid = principal.firebase_uid
+
+    child_age = None
+    if child.birthdate:
+        from datetime import date
+
+        today = date.today()
+        child_age = (
+            today.year
+            - child.birthdate.year
+            - ((today.month, today.day) < (child.birthdate.month, child.birthdate.day))
+        )
+
+    async def event_stream():
+        # 最初にチャレンジIDを返し、クライアントが即座に画面遷移できるようにする
+        yield _sse_event("challenge", {"challenge_id": challenge_id, "status": "pending"})
+
+        tokens = []
+        try:
+            ai_feedback_service = await service_registry.aget("ai_feedback")
+            async for token in ai_feedback_service.stream_feedback(
+                transcript=transcript,
+                child_age=child_age,
+                feedback_type="english_challenge",
+            ):
+                tokens.append(token)
+                yield _sse_event("token", {"text": token})
+            feedback = "".join(tokens).strip()
+        except Exception as e:
+            print(f"⚠️ AIフィードバックのストリーミングに失敗、デフォルトメッセージを使用: {str(e)}")
+            feedback = AIFeedbackService.fallback_feedback(transcript)
+            yield _sse_event("error", {"detail": "AIフィードバック生成中にエラーが発生しました"})
+
+        if not feedback:
+            feedback = AIFeedbackService.fallback_feedback(transcript)
+
+        await save_challenge_feedback(challenge_id, feedback)
+        await invalidate_user_responses(owner_uid)
+        yield _sse_event(
+            "done", {"challenge_id": challenge_id, "status": "completed", "comment": feedback}
+        )
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/transcript/{transcript_id}")
 async def get_transcript(
     transcript_id: str,
     db: AsyncSession = Depends(get_async_db),
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
 ):
     """音声認識結果の取得"""
 
-    # UUID変換して非同期クエリ実行
-    # 現在のユーザーを取得
-    user_result = await db.execute(select(User).where(User.firebase_uid == current_user["user_id"]))
-    user = user_result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
-
-    # チャレンジを取得
+    # チャレンジ取得と親子関係の検証を1クエリで実行
     transcript_uuid = UUID(transcript_id)
-    result = await db.execute(select(Challenge).where(Challenge.id == transcript_uuid))
-    challenge = result.scalars().first()
+    challenge = await ChallengeRepository(db).get_with_owner_check(
+        transcript_uuid, principal.user_id
+    )
     if not challenge:
         raise HTTPException(status_code=404, detail="音声記録が見つかりません")
-
-    # 親子関係を検証
-    child_result = await db.execute(
-        select(Child).where(
-            Child.id == challenge.child_id,
-            Child.user_id == user.id,
-        )
-    )
-    child = child_result.scalars().first()
-    if not child:
+    if not challenge.owned:
         raise HTTPException(status_code=403, detail="この記録にアクセスする権限がありません")
 
     return {
@@ -186,56 +288,63 @@ async def get_transcript(
         "transcript": challenge.transcript,
         "ai_feedback": challenge.ai_feedback,
         "created_at": challenge.created_at,
-        "status": "completed" if challenge.transcript else "processing",
+        "status": "completed" if challenge.ai_feedback is not None else "pending",
     }
 
 
 @router.get("/history/{child_id}")
 async def get_voice_history(
     child_id: str,
+    response: Response,
+    limit: int = Query(PAGINATION["DEFAULT_LIMIT"], ge=1, le=PAGINATION["MAX_LIMIT"]),
+    cursor: Optional[str] = Query(None, description="前回レスポンスのnext_cursor"),
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_async_db),
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
 ):
-    """子供の音声認識履歴を取得"""
+    """子供の音声認識履歴を取得（新しい順、カーソルページング、If-None-Matchが一致すれば304）"""
 
-    # 現在のユーザーを取得
-    user_result = await db.execute(select(User).where(User.firebase_uid == current_user["user_id"]))
-    user = user_result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # 親子関係を検証
+    # 親子関係の検証とETag用の集計を1クエリで実行（行本体は読まない）
     child_uuid = UUID(child_id)
-    child_result = await db.execute(
-        select(Child).where(
-            Child.id == child_uuid,
-            Child.user_id == user.id,
-        )
-    )
-    child = child_result.scalars().first()
-    if not child:
+    repository = ChallengeRepository(db)
+    version = await repository.history_version(child_uuid, principal.user_id)
+    if version is None:
         raise HTTPException(status_code=403, detail="この子供の履歴にアクセスする権限がありません")
 
-    # 履歴を取得
-    result = await db.execute(
-        select(Challenge)
-        .where(Challenge.child_id == child_uuid)
-        .where(Challenge.transcript.is_not(None))
-        .order_by(Challenge.created_at.desc())
+    etag = compute_weak_etag(
+        "history",
+        child_uuid,
+        limit,
+        cursor,
+        version.count,
+        version.last_updated_at,
     )
-    challenges = result.scalars().all()
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+    # 履歴を取得（必要なカラムのみ）
+    rows, has_more = await repository.list_history(child_uuid, limit, after)
 
     return {
         "child_id": child_id,
         "transcripts": [
             {
-                "id": challenge.id,
-                "transcript": challenge.transcript,
-                "ai_feedback": challenge.ai_feedback,
-                "created_at": challenge.created_at,
+                "id": row.id,
+                "transcript": row.transcript,
+                "ai_feedback": row.ai_feedback,
+                "created_at": row.created_at,
             }
-            for challenge in challenges
+            for row in rows
         ],
+        "next_cursor": encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
     }
 
 
@@ -243,36 +352,20 @@ async def get_voice_history(
 async def get_challenge_detail(
     challenge_id: str,
     db: AsyncSession = Depends(get_async_db),
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
 ):
     """個別のチャレンジ詳細を取得"""
     try:
         print(f"🔍 チャレンジ詳細取得開始: challenge_id={challenge_id}")
 
-        # 現在のユーザーを取得
-        user_result = await db.execute(
-            select(User).where(User.firebase_uid == current_user["user_id"])
-        )
-        user = user_result.scalars().first()
-        if not user:
-            raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
-
-        # チャレンジを取得
+        # チャレンジ取得と親子関係の検証を1クエリで実行
         challenge_uuid = UUID(challenge_id)
-        result = await db.execute(select(Challenge).where(Challenge.id == challenge_uuid))
-        challenge = result.scalars().first()
+        challenge = await ChallengeRepository(db).get_with_owner_check(
+            challenge_uuid, principal.user_id
+        )
         if not challenge:
             raise HTTPException(status_code=404, detail="チャレンジが見つかりません")
-
-        # 親子関係を検証
-        child_result = await db.execute(
-            select(Child).where(
-                Child.id == challenge.child_id,
-                Child.user_id == user.id,
-            )
-        )
-        child = child_result.scalars().first()
-        if not child:
+        if not challenge.owned:
             raise HTTPException(
                 status_code=403, detail="このチャレンジにアクセスする権限がありません"
             )
@@ -285,7 +378,7 @@ async def get_challenge_detail(
             "transcript": challenge.transcript,
             "ai_feedback": challenge.ai_feedback,
             "created_at": challenge.created_at,
-            "status": "completed" if challenge.transcript else "processing",
+            "status": "completed" if challenge.ai_feedback is not None else "pending",
         }
 
     except HTTPException:
@@ -31,6 +31,13 @@ class AIConfig(BaseSettings):
     RETRY_DELAY_SECONDS: int = 1  # 再試行間隔
     REQUEST_TIMEOUT_SECONDS: int = 30  # リクエストタイムアウト
 
+    # 接続プール設定（プロセス共通のAsyncOpenAIクライアント）
+    OPENAI_MAX_CONCURRENCY: int = 32  # 同時API呼び出し数の上限
+    OPENAI_MAX_CONNECTIONS: int = 64  # HTTP接続数の上限
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 32  # keep-aliveで保持する接続数
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = 30.0  # アイドル接続の保持時間
+    OPENAI_HTTP2: bool = True  # HTTP/2多重化を使用
+
     class Config:
         env_file = ".env"
 
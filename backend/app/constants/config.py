@@ -18,6 +18,14 @@ VOICE_CONFIG = {
     "MAX_DURATION": 300,  # 5分
     "SUPPORTED_FORMATS": ["webm", "mp4", "wav", "m4a"],
     "MAX_FILE_SIZE": 10 * 1024 * 1024,  # 10MB
+    "UPLOAD_SPOOL_THRESHOLD": 1024 * 1024,  # これを超えるアップロードは一時ファイルに退避
+    "STREAM_AUTH_TIMEOUT": 10,  # WebSocket接続後、認証メッセージを待つ秒数
+    # 前処理（PCMはモノラル・16kHz LINEAR16に変換し、前後の無音を除去）
+    "TARGET_SAMPLE_RATE": 16000,
+    "VAD_FRAME_MS": 20,
+    "VAD_THRESHOLD_DB": -35,  # 最大フレームエネルギーからの相対値
+    "VAD_FLOOR_DBFS": -55,  # これ以下のフレームは常に無音扱い
+    "VAD_PADDING_MS": 200,  # 発話区間の前後に残す余白
 }
 
 # AI処理設定
@@ -28,9 +36,53 @@ AI_CONFIG = {
     "FEEDBACK_MAX_LENGTH": 200,
 }
 
+# AIフィードバックキャッシュ設定
+FEEDBACK_CACHE_CONFIG = {
+    "MAX_SIZE": 5000,  # 保持するフィードバック数
+    "TTL": 24 * 60 * 60,  # 1日
+}
+
+# 共有キャッシュ設定（バックエンドはsettings.CACHE_BACKENDで選択）
+CACHE_CONFIG = {
+    "KEY_PREFIX": "bud:cache",  # Redisキーの接頭辞
+    "MEMORY_MAX_SIZE": 1000,  # memoryバックエンドの保持件数
+    "CHILDREN_TTL": 120,  # 子どもリストの有効期間（秒）
+    "CHILDREN_STALE_TTL": 60,  # 期限切れ後に古いリストを返しつつ再取得する猶予（秒）
+    "RESPONSE_GENERATION_TTL": 24 * 60 * 60,  # ユーザー別レスポンス世代番号の保持期間
+}
+
+# 未分析チャレンジの一括分析設定
+AI_BATCH_CONFIG = {
+    "PAGE_SIZE": 100,  # 1ページ（1コミット）あたりの件数
+    "MAX_CONCURRENCY": 8,  # 同時LLM呼び出し数
+    # OpenAI Batch API（オフライン一括再生成）
+    "BATCH_API_COMPLETION_WINDOW": "24h",
+    "BATCH_API_MAX_REQUESTS": 50000,  # 1バッチファイルあたりの上限
+    "BATCH_API_POLL_INTERVAL": 30,  # 秒
+    "BATCH_API_INGEST_CHUNK_SIZE": 1000,  # 結果取り込み時の1コミットあたり件数
+}
+
+# AIフィードバック非同期ジョブ設定
+FEEDBACK_JOB_CONFIG = {
+    "MAX_QUEUE_SIZE": 1000,  # プロセス内キューの上限
+    "QUEUE_KEY": "bud:feedback_jobs",  # Redisキュー名
+    "PROCESSING_KEY": "bud:feedback_jobs:processing",  # 処理中ジョブ退避先
+    "DEQUEUE_TIMEOUT": 5,  # 秒
+    "MAX_ATTEMPTS": 3,  # 保存失敗などで再投入する上限（超えたら破棄）
+}
+
 # セキュリティ設定
 SECURITY_CONFIG = {
     "TOKEN_EXPIRE_MINUTES": 60,
+    "VERIFIED_TOKEN_CACHE_SIZE": 10000,  # 検証済みIDトークンの保持数
+    "TOKEN_CLOCK_SKEW_SECONDS": 5,  # exp/iat検証の許容誤差
+    "CERTS_DEFAULT_MAX_AGE": 3600,  # Cache-Controlがない場合の公開鍵保持時間
+    "CERTS_REFRESH_MARGIN": 300,  # 期限の何秒前に更新するか
+    "CERTS_MIN_REFRESH_INTERVAL": 60,  # 更新間隔の下限
+    "CERTS_ON_DEMAND_REFRESH_INTERVAL": 30,  # 未知のkidによる前倒し更新の最短間隔
+    "CERTS_RETRY_INTERVAL": 5,  # 取得失敗時の再試行間隔
+    "PRINCIPAL_CACHE_SIZE": 10000,  # Firebase UID→ユーザーIDの保持数
+    "PRINCIPAL_CACHE_TTL": 60,  # Firebase UID→ユーザーIDの保持秒数
     "RATE_LIMIT": {
         "DEFAULT": 100,  # per minute
         "VOICE": 10,  # per hour
@@ -1,100 +1,460 @@
 """キャッシュ機能 - 適切な場面でのキャッシュ利用とパフォーマンス向上"""
 
+import asyncio
+import contextlib
 import functools
 import hashlib
 import json
+import math
+import random
 import time
-from typing import Any, Callable, Dict, Optional
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
+import orjson
+
+from app.constants.config import CACHE_CONFIG
+from app.core.config import settings
 from app.core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
 
+class _CacheEntry:
+    """キャッシュエントリ（dictよりも省メモリ）"""
+
+    __slots__ = ("value", "expires_at")
+
+    def __init__(self, value: Any, expires_at: float):
+        self.value = value
+        self.expires_at = expires_at
+
+
 class SimpleMemoryCache:
-    """シンプルなメモリキャッシュ実装（Redis未使用時）"""
+    """
+    シンプルなメモリキャッシュ実装（Redis未使用時）
 
-    def __init__(self, max_size: int = 1000):
-        self._cache: Dict[str, Dict[str, Any]] = {}
+    OrderedDictをLRU順に保ち、get/set/エビクションをO(1)で行う。
+    期限切れは参照時に削除し、残りは一定間隔のスイープでまとめて削除する
+    """
+
+    def __init__(self, max_size: int = 1000, sweep_interval: float = 60.0):
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
         self._max_size = max_size
-        self._access_times: Dict[str, float] = {}
+        self._sweep_interval = sweep_interval
+        self._next_sweep_at = time.monotonic() + sweep_interval
+        self._hits = 0
+        self._misses = 0
 
     def get(self, key: str) -> Optional[Any]:
         """キャッシュから値を取得"""
-        if key not in self._cache:
+        entry = self._cache.get(key)
+        if entry is None:
+            self._misses += 1
             return None
 
-        cache_entry = self._cache[key]
-
         # TTL（Time To Live）チェック
-        if cache_entry.get("expires_at", 0) < time.time():
-            self._remove(key)
+        if entry.expires_at < time.monotonic():
+            del self._cache[key]
+            self._misses += 1
             return None
 
-        # アクセス時間を更新（LRU用）
-        self._access_times[key] = time.time()
-        return cache_entry["value"]
+        # 最近使ったキーを末尾へ（LRU用）
+        self._cache.move_to_end(key)
+        self._hits += 1
+        return entry.value
 
     def set(self, key: str, value: Any, ttl: int = 300) -> None:
         """キャッシュに値を設定（デフォルト5分）"""
+        now = time.monotonic()
+        if now >= self._next_sweep_at:
+            self._sweep(now)
+
+        entry = self._cache.get(key)
+        if entry is not None:
+            entry.value = value
+            entry.expires_at = now + ttl
+            self._cache.move_to_end(key)
+            return
+
         # キャッシュサイズ制限チェック
-        if len(self._cache) >= self._max_size and key not in self._cache:
+        if len(self._cache) >= self._max_size:
             self._evict_lru()
+        self._cache[key] = _CacheEntry(value, now + ttl)
 
-        expires_at = time.time() + ttl
-        self._cache[key] = {"value": value, "expires_at": expires_at, "created_at": time.time()}
-        self._access_times[key] = time.time()
-
-        logger.debug(f"Cache SET: {key} (TTL: {ttl}s)")
+    def delete(self, key: str) -> None:
+        """キャッシュから値を削除"""
+        self._remove(key)
 
     def _remove(self, key: str) -> None:
         """キーを削除"""
         self._cache.pop(key, None)
-        self._access_times.pop(key, None)
 
     def _evict_lru(self) -> None:
         """LRU（Least Recently Used）でエビクション"""
-        if not self._access_times:
+        if self._cache:
+            self._cache.popitem(last=False)
+
+    def _sweep(self, now: float) -> None:
+        """期限切れエントリをまとめて削除"""
+        expired = [key for key, entry in self._cache.items() if entry.expires_at < now]
+        for key in expired:
+            del self._cache[key]
+        self._next_sweep_at = now + self._sweep_interval
+        if expired:
+            logger.debug(f"Cache sweep: {len(expired)} expired entries removed")
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率などの統計"""
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._cache),
+            "max_size": self._max_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups * 100, 1) if lookups else 0.0,
+        }
+
+
+def _orjson_default(value: Any) -> Any:
+    """orjsonが直接扱えない型（Pydanticモデル等）の変換"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def serialize(value: Any) -> bytes:
+    """キャッシュ値をバイト列に変換（UUID・datetimeは文字列になる）"""
+    return orjson.dumps(value, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def deserialize(raw: Optional[bytes]) -> Optional[Any]:
+    return None if raw is None else orjson.loads(raw)
+
+
+class CacheBackend(ABC):
+    """共有キャッシュのバックエンド（値はorjsonでシリアライズして保持）"""
+
+    name = "base"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """キャッシュから値を取得（なければNone）"""
+
+    @abstractmethod
+    async def mget(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        """複数キーを1回で取得"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: int = 300) -> None:
+        """キャッシュに値を設定"""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """キャッシュから値を削除"""
+
+    @abstractmethod
+    async def incr(self, key: str, ttl: int) -> int:
+        """カウンタを1増やして新しい値を返す"""
+
+    async def close(self) -> None:
+        pass
+
+    def namespace(self, name: str) -> "CacheNamespace":
+        return CacheNamespace(self, name)
+
+
+class MemoryCacheBackend(CacheBackend):
+    """プロセス内キャッシュ（開発・単一ワーカー用）"""
+
+    name = "memory"
+
+    def __init__(self, max_size: int = CACHE_CONFIG["MEMORY_MAX_SIZE"]):
+        self._cache = SimpleMemoryCache(max_size=max_size)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return deserialize(self._cache.get(key))
+
+    async def mget(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        return [deserialize(self._cache.get(key)) for key in keys]
+
+    async def set(self, key: str, value: Any, ttl: int = 300) -> None:
+        self._cache.set(key, serialize(value), ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.delete(key)
+
+    async def incr(self, key: str, ttl: int) -> int:
+        value = (deserialize(self._cache.get(key)) or 0) + 1
+        self._cache.set(key, serialize(value), ttl)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redisキャッシュ（ワーカー・インスタンス間で共有、障害時はミス扱い）"""
+
+    name = "redis"
+
+    def __init__(self, redis_url: str = settings.REDIS_URL, client=None):
+        if client is None:
+            import redis.asyncio as redis
+
+            client = redis.from_url(redis_url)
+        self._redis = client
+        self._prefix = CACHE_CONFIG["KEY_PREFIX"]
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            return deserialize(await self._redis.get(self._key(key)))
+        except Exception as e:
+            logger.warning(f"Redisキャッシュ取得失敗: {e}")
+            return None
+
+    async def mget(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        if not keys:
+            return []
+        try:
+            values = await self._redis.mget([self._key(key) for key in keys])
+        except Exception as e:
+            logger.warning(f"Redisキャッシュ取得失敗: {e}")
+            return [None] * len(keys)
+        return [deserialize(value) for value in values]
+
+    async def set(self, key: str, value: Any, ttl: int = 300) -> None:
+        try:
+            await self._redis.set(self._key(key), serialize(value), ex=ttl)
+        except Exception as e:
+            logger.warning(f"Redisキャッシュ保存失敗: {e}")
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
             return
+        try:
+            await self._redis.delete(*(self._key(key) for key in keys))
+        except Exception as e:
+            logger.warning(f"Redisキャッシュ削除失敗: {e}")
+
+    async def incr(self, key: str, ttl: int) -> int:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.incr(self._key(key))
+            pipe.expire(self._key(key), ttl)
+            value, _ = await pipe.execute()
+        return value
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class CacheNamespace:
+    """キーに名前空間を付与するラッパー"""
+
+    def __init__(self, backend: CacheBackend, name: str):
+        self.backend = backend
+        self.name = name
 
-        lru_key = min(self._access_times, key=self._access_times.get)
-        self._remove(lru_key)
-        logger.debug(f"Cache LRU eviction: {lru_key}")
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await self.backend.get(self._key(key))
+
+    async def mget(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        return await self.backend.mget([self._key(key) for key in keys])
+
+    async def set(self, key: str, value: Any, ttl: int = 300) -> None:
+        await self.backend.set(self._key(key), value, ttl)
+
+    async def delete(self, *keys: str) -> None:
+        await self.backend.delete(*(self._key(key) for key in keys))
+
+    async def incr(self, key: str, ttl: int) -> int:
+        return await self.backend.incr(self._key(key), ttl)
+
+
+def create_cache_backend(backend_name: str = settings.CACHE_BACKEND) -> CacheBackend:
+    """設定に応じたキャッシュバックエンドを生成"""
+    if backend_name == "redis":
+        return RedisCacheBackend()
+    return MemoryCacheBackend()
 
 
 # グローバルキャッシュインスタンス
 _cache = SimpleMemoryCache()
 
+# グローバル共有キャッシュ（async関数のcachedデコレータが使用）
+cache_backend = create_cache_backend()
+
+
+# 同期関数の結果がNoneだったことを示す番兵（ミスと区別してキャッシュする）
+_CACHED_NONE = object()
+
+
+class _KeyedLocks:
+    """キーごとのasyncio.Lock（使用中のキーだけ保持）"""
 
-def cached(ttl: int = 300, key_prefix: str = ""):
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+
+    @contextlib.asynccontextmanager
+    async def hold(self, key: str):
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._locks[key]
+
+
+_key_locks = _KeyedLocks()
+_refresh_tasks: Dict[str, asyncio.Task] = {}
+
+
+def _needs_refresh(envelope: Dict[str, Any], beta: float, now: float) -> bool:
+    """
+    確率的早期期限切れ（XFetch）
+
+    再計算にかかった時間(d)が長いほど、期限(e)より前に再計算を始める確率が上がる
+    """
+    if beta <= 0:
+        return now >= envelope["e"]
+    return now - envelope["d"] * beta * math.log(1.0 - random.random()) >= envelope["e"]
+
+
+def cached(
+    ttl: int = 300,
+    key_prefix: str = "",
+    stale_ttl: int = 0,
+    negative_ttl: Optional[int] = None,
+    early_expiry_beta: float = 1.0,
+    key_func: Optional[Callable[..., str]] = None,
+):
     """
     関数結果をキャッシュするデコレータ
 
+    async関数は共有キャッシュ（cache_backend）、同期関数はプロセス内キャッシュを使用。
+    async関数では以下を行う:
+    - キーごとのロックで同時ミス時の再計算を1回にまとめる
+    - 結果がNoneでもnegative_ttlの間キャッシュする（0でキャッシュしない）
+    - 期限切れ後stale_ttlの間は古い値を返し、バックグラウンドで再計算する
+    - 期限前でも確率的に再計算を始め、期限切れの集中を避ける
+
     Args:
         ttl: キャッシュ有効期間（秒）
         key_prefix: キャッシュキーのプレフィックス
+        stale_ttl: 期限切れ後も古い値を返す猶予（秒）
+        negative_ttl: 結果がNoneの場合の有効期間（省略時はttl）
+        early_expiry_beta: 早期再計算の積極度（0で無効）
+        key_func: 引数からキーを作る関数（DBセッション等を含む引数を除外したい場合）
     """
 
     def decorator(func: Callable):
+        def build_key(args: tuple, kwargs: dict) -> str:
+            if key_func is not None:
+                return f"{key_prefix or func.__name__}:{key_func(*args, **kwargs)}"
+            return _generate_cache_key(func.__name__, args, kwargs, key_prefix)
+
+        if asyncio.iscoroutinefunction(func):
+            fresh_ttl_for_none = ttl if negative_ttl is None else negative_ttl
+
+            async def compute_and_store(cache_key: str, args: tuple, kwargs: dict) -> Any:
+                started = time.monotonic()
+                result = await func(*args, **kwargs)
+                elapsed = time.monotonic() - started
+
+                fresh_ttl = ttl if result is not None else fresh_ttl_for_none
+                if fresh_ttl > 0:
+                    envelope = {"v": result, "e": time.time() + fresh_ttl, "d": elapsed}
+                    await cache_backend.set(cache_key, envelope, fresh_ttl + stale_ttl)
+                return result
+
+            async def refresh(cache_key: str, args: tuple, kwargs: dict) -> None:
+                async with _key_locks.hold(cache_key):
+                    try:
+                        await compute_and_store(cache_key, args, kwargs)
+                    except Exception as e:
+                        logger.warning(f"Cache background refresh failed: {cache_key}: {e}")
+
+            def schedule_refresh(cache_key: str, args: tuple, kwargs: dict) -> None:
+                if cache_key in _refresh_tasks:
+                    return
+                task = asyncio.create_task(refresh(cache_key, args, kwargs))
+                _refresh_tasks[cache_key] = task
+                task.add_done_callback(lambda _: _refresh_tasks.pop(cache_key, None))
+
+            def usable(envelope: Optional[Dict[str, Any]], now: float) -> bool:
+                return envelope is not None and now < envelope["e"] + stale_ttl
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache_key = build_key(args, kwargs)
+
+                envelope = await cache_backend.get(cache_key)
+                now = time.time()
+                if usable(envelope, now):
+                    logger.debug(f"Cache HIT: {cache_key}")
+                    if _needs_refresh(envelope, early_expiry_beta, now):
+                        schedule_refresh(cache_key, args, kwargs)
+                    return envelope["v"]
+
+                # 同じキーの再計算は1回だけ（待っていた呼び出しは結果をキャッシュから取得）
+                async with _key_locks.hold(cache_key):
+                    envelope = await cache_backend.get(cache_key)
+                    if usable(envelope, time.time()):
+                        return envelope["v"]
+
+                    logger.debug(f"Cache MISS: {cache_key}")
+                    return await compute_and_store(cache_key, args, kwargs)
+
+            async def invalidate(*args, **kwargs) -> None:
+                """引数に対応するキャッシュを削除"""
+                await cache_backend.delete(build_key(args, kwargs))
+
+            async_wrapper.invalidate = invalidate
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             # キャッシュキーを生成
-            cache_key = _generate_cache_key(func.__name__, args, kwargs, key_prefix)
+            cache_key = build_key(args, kwargs)
 
             # キャッシュから取得を試行
             cached_result = _cache.get(cache_key)
             if cached_result is not None:
                 logger.debug(f"Cache HIT: {cache_key}")
-                return cached_result
+                return None if cached_result is _CACHED_NONE else cached_result
 
             # キャッシュミス時は関数を実行
             logger.debug(f"Cache MISS: {cache_key}")
             result = func(*args, **kwargs)
 
-            # 結果をキャッシュに保存
-            _cache.set(cache_key, result, ttl)
+            # 結果をキャッシュに保存（Noneは番兵で保持）
+            if result is None:
+                none_ttl = ttl if negative_ttl is None else negative_ttl
+                if none_ttl > 0:
+                    _cache.set(cache_key, _CACHED_NONE, none_ttl)
+            else:
+                _cache.set(cache_key, result, ttl)
             return result
 
+        def invalidate_sync(*args, **kwargs) -> None:
+            _cache.delete(build_key(args, kwargs))
+
+        wrapper.invalidate = invalidate_sync
         return wrapper
 
     return decorator
@@ -137,6 +497,10 @@ def should_cache_api_response(endpoint: str, user_context: dict = None) -> tuple
     if "/api/conversations" in endpoint:
         return True, 30
 
+    # 音声履歴（1分キャッシュ - 新規録音・フィードバック保存時は世代番号で無効化）
+    if endpoint.startswith("/api/voice/history"):
+        return True, 60
+
     # リアルタイム性が重要なデータはキャッシュしない
     realtime_endpoints = ["/api/voice/transcribe", "/health"]
     if any(endpoint.startswith(ep) for ep in realtime_endpoints):
@@ -145,6 +509,28 @@ def should_cache_api_response(endpoint: str, user_context: dict = None) -> tuple
     return False, 0
 
 
+# HTTPレスポンスキャッシュの名前空間（ResponseCacheMiddlewareが使用）
+RESPONSE_CACHE_NAMESPACE = "http"
+
+
+def response_generation_key(user_key: str) -> str:
+    return f"gen:{user_key}"
+
+
+async def invalidate_user_responses(user_key: str) -> None:
+    """
+    ユーザーのキャッシュ済みレスポンスをまとめて無効化
+
+    世代番号を進めるだけで、古い世代のエントリはTTLで自然に消える
+    """
+    try:
+        await cache_backend.namespace(RESPONSE_CACHE_NAMESPACE).incr(
+            response_generation_key(user_key), CACHE_CONFIG["RESPONSE_GENERATION_TTL"]
+        )
+    except Exception as e:
+        logger.warning(f"レスポンスキャッシュの無効化に失敗: {e}")
+
+
 # 使用例のサンプル関数
 @cached(ttl=300, key_prefix="children")
 def get_cached_children_data(user_id: int) -> dict:
@@ -163,8 +549,13 @@ def get_cached_help_phrases() -> list:
 
 def get_cache_stats() -> dict:
     """キャッシュ統計情報を取得"""
+    stats = _cache.stats()
     return {
-        "cache_size": len(_cache._cache),
-        "max_size": _cache._max_size,
-        "usage_percent": (len(_cache._cache) / _cache._max_size) * 100,
+        "cache_size": stats["size"],
+        "max_size": stats["max_size"],
+        "usage_percent": (stats["size"] / stats["max_size"]) * 100,
+        "hits": stats["hits"],
+        "misses": stats["misses"],
+        "hit_rate": stats["hit_rate"],
+        "shared_backend": cache_backend.name,
     }
@@ -0,0 +1,55 @@
+"""同時実行数の制限 - 実行中・待機中の件数を数えるセマフォ"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+
+class CapacityExceededError(Exception):
+    """待たずに枠を取ろうとしたが空きがなかった"""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Service is busy (limit: {limit} concurrent requests)")
+        self.limit = limit
+
+
+class ConcurrencyLimiter:
+    """同時実行数の上限と、実行中（in_flight）・待機中（queued）のカウンタ"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.queued = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """空きを待ってから、ブロックを抜けるまで枠を保持"""
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def try_slot(self) -> AsyncIterator[None]:
+        """空きがあるときだけ枠を保持（待たずに CapacityExceededError）"""
+        if self._semaphore.locked():
+            raise CapacityExceededError(self.limit)
+        # ロックされていないセマフォは中断せずに取得されるため、確認と取得の間に割り込まれない
+        async with self.slot():
+            yield
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_concurrency": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+        }
@@ -21,6 +21,19 @@ class Settings(BaseSettings):
 
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
 
+    # 共有キャッシュ設定（memory: プロセス内 / redis: ワーカー・インスタンス間で共有）
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+
+    # AIフィードバック非同期ジョブ設定（memory: プロセス内キュー / redis: 永続キュー）
+    FEEDBACK_JOB_BACKEND: str = os.getenv("FEEDBACK_JOB_BACKEND", "memory")
+    FEEDBACK_WORKER_COUNT: int = int(os.getenv("FEEDBACK_WORKER_COUNT", "4"))
+
+    # 音声認識（Speech-to-Text）の同時実行数と1回あたりのデッドライン（秒）
+    SPEECH_MAX_CONCURRENCY: int = int(os.getenv("SPEECH_MAX_CONCURRENCY", "16"))
+    SPEECH_RECOGNIZE_TIMEOUT: float = float(os.getenv("SPEECH_RECOGNIZE_TIMEOUT", "30"))
+    # WebSocketストリーミング認識の同時ストリーム数（超過分は接続を拒否）
+    SPEECH_MAX_STREAMS: int = int(os.getenv("SPEECH_MAX_STREAMS", "8"))
+
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     DEBUG: bool = os.getenv("DEBUG", "true").lower() == "true"
 
@@ -0,0 +1,144 @@
+"""OpenAI 非同期クライアント - プロセス共通のHTTP接続プールと同時実行数制御"""
+
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from app.constants.ai_config import ai_config
+from app.core.logging_config import get_logger
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = get_logger(__name__)
+
+
+class OpenAIClientPool:
+    """AsyncOpenAIクライアントを1つだけ生成し、keep-alive接続と同時実行数を管理"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_concurrency: int = ai_config.OPENAI_MAX_CONCURRENCY,
+        max_connections: int = ai_config.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections: int = ai_config.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = ai_config.OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+        timeout: float = ai_config.REQUEST_TIMEOUT_SECONDS,
+        http2: bool = ai_config.OPENAI_HTTP2,
+    ):
+        self._api_key = api_key or ai_config.OPENAI_API_KEY or None
+        self._max_concurrency = max_concurrency
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._timeout = timeout
+        # HTTP/2はh2パッケージがある場合のみ有効化
+        self._http2 = http2 and importlib.util.find_spec("h2") is not None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._client: Optional["AsyncOpenAI"] = None
+        self._stats = {
+            "in_flight": 0,
+            "waiting": 0,
+            "peak_in_flight": 0,
+            "total_requests": 0,
+            "errors": 0,
+        }
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        """共有クライアント（初回アクセス時に生成）"""
+        if self._client is None:
+            # openaiパッケージはimportが重いため、クライアント生成時に読み込む
+            from openai import AsyncOpenAI
+
+            self._http_client = httpx.AsyncClient(
+                http2=self._http2,
+                limits=self._limits,
+                timeout=httpx.Timeout(self._timeout, connect=5.0),
+            )
+            self._client = AsyncOpenAI(api_key=self._api_key, http_client=self._http_client)
+            logger.info(
+                f"AsyncOpenAI client initialized (http2={self._http2}, "
+                f"max_connections={self._limits.max_connections}, "
+                f"max_concurrency={self._max_concurrency})"
+            )
+        return self._client
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """同時実行数の枠を確保"""
+        self._stats["waiting"] += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._stats["waiting"] -= 1
+
+        self._stats["in_flight"] += 1
+        self._stats["total_requests"] += 1
+        self._stats["peak_in_flight"] = max(self._stats["peak_in_flight"], self._stats["in_flight"])
+        try:
+            yield
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+        finally:
+            self._stats["in_flight"] -= 1
+            self._semaphore.release()
+
+    async def chat_completion(self, **kwargs: Any):
+        """Chat Completions API呼び出し"""
+        async with self.slot():
+            return await self.client.chat.completions.create(**kwargs)
+
+    async def stream_chat_completion(self, **kwargs: Any) -> AsyncIterator[Any]:
+        """Chat Completions APIのストリーミング呼び出し（完了まで枠を保持）"""
+        async with self.slot():
+            stream = await self.client.chat.completions.create(stream=True, **kwargs)
+            try:
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                await stream.close()
+
+    async def close(self) -> None:
+        """接続プールを閉じる"""
+        if self._client is not None:
+            await self._client.close()
+        self._client = None
+        self._http_client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """接続プール・同時実行の統計"""
+        stats = {
+            **self._stats,
+            "max_concurrency": self._max_concurrency,
+            "max_connections": self._limits.max_connections,
+            "http2": self._http2,
+            "initialized": self._client is not None,
+        }
+
+        # httpcoreの接続プール状態（内部属性のため取得できない場合は省略）
+        try:
+            pool = self._http_client._transport._pool
+            connections = list(pool.connections)
+            stats["open_connections"] = len(connections)
+            stats["idle_connections"] = sum(1 for conn in connections if conn.is_idle())
+        except Exception:
+            pass
+
+        return stats
+
+
+# グローバルクライアントプール
+openai_client_pool = OpenAIClientPool()
+
+
+def get_openai_pool_stats() -> Dict[str, Any]:
+    """OpenAI接続プール統計を取得"""
+    return openai_client_pool.get_stats()
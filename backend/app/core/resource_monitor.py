@@ -7,6 +7,7 @@ from typing import Dict, List
 import psutil
 
 from app.core.logging_config import get_logger
+from app.core.openai_client import get_openai_pool_stats
 
 logger = get_logger("resource_monitor")
 
@@ -211,6 +212,7 @@ def get_resource_summary() -> Dict:
     return {
         "system_resources": resources,
         "database_connections": db_stats,
+        "openai_client": get_openai_pool_stats(),
         "monitoring_enabled": resource_monitor.monitoring_enabled,
         "thresholds": resource_monitor.thresholds,
     }
@@ -0,0 +1,156 @@
+"""遅延サービスレジストリ - 外部クライアントを初回利用時または起動後のウォームアップで生成"""
+
+import asyncio
+import importlib
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# "package.module:attribute" 形式の文字列、またはファクトリ関数
+Factory = Union[str, Callable[[], Any]]
+
+
+def _resolve_factory(factory: Factory) -> Callable[[], Any]:
+    """文字列指定のファクトリは呼び出し時に初めてモジュールをimportする"""
+    if callable(factory):
+        return factory
+    module_name, _, attribute = factory.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class ServiceRegistry:
+    """
+    名前付きサービスの遅延生成
+
+    import時にはクライアントを作らず、get() の初回呼び出しか warm_up() で生成する。
+    生成に失敗した場合はキャッシュせず、次回の get() で再試行する
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Factory] = {}
+        self._warm_up: Dict[str, bool] = {}
+        self._instances: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._build_seconds: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._warm_up_task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, factory: Factory, warm_up: bool = True) -> None:
+        """サービスを登録（生成はしない）"""
+        self._factories[name] = factory
+        self._warm_up[name] = warm_up
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """サービスを取得（未生成なら生成する。ウォームアップ中なら完了を待つ）"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is not None:
+                return instance
+
+            start = time.perf_counter()
+            try:
+                instance = _resolve_factory(self._factories[name])()
+            except Exception as e:
+                self._errors[name] = str(e)
+                raise
+            self._build_seconds[name] = time.perf_counter() - start
+            self._errors.pop(name, None)
+            self._instances[name] = instance
+            logger.info(f"Service '{name}' initialized in {self._build_seconds[name]:.3f}s")
+            return instance
+
+    async def aget(self, name: str) -> Any:
+        """イベントループから取得（未生成ならワーカースレッドで生成し、ループを止めない）"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        return await asyncio.to_thread(self.get, name)
+
+    def is_ready(self, name: str) -> bool:
+        return name in self._instances
+
+    def override(self, name: str, instance: Any) -> None:
+        """生成済みインスタンスを差し替える（テスト用）"""
+        self._instances[name] = instance
+
+    def reset(self, name: str) -> None:
+        """インスタンスを破棄し、次回の get() で作り直す"""
+        self._instances.pop(name, None)
+        self._errors.pop(name, None)
+
+    async def warm_up(self, names: Optional[Iterable[str]] = None) -> None:
+        """
+        サービスをワーカースレッドで生成（失敗してもリクエスト時に再試行されるため例外は出さない）
+        """
+        targets = [
+            name
+            for name in (names if names is not None else self._factories)
+            if self._warm_up.get(name, True) and not self.is_ready(name)
+        ]
+        for name in targets:
+            try:
+                await asyncio.to_thread(self.get, name)
+            except Exception as e:
+                logger.warning(f"Service '{name}' warm-up failed: {e}")
+
+    def start_warm_up(self, names: Optional[Iterable[str]] = None) -> asyncio.Task:
+        """起動処理をブロックしないようバックグラウンドでウォームアップを開始"""
+        if self._warm_up_task is None or self._warm_up_task.done():
+            self._warm_up_task = asyncio.create_task(self.warm_up(names))
+        return self._warm_up_task
+
+    async def close(self) -> None:
+        """生成済みサービスの close() を呼び出す"""
+        if self._warm_up_task is not None and not self._warm_up_task.done():
+            self._warm_up_task.cancel()
+            await asyncio.gather(self._warm_up_task, return_exceptions=True)
+
+        for name, instance in list(self._instances.items()):
+            close = getattr(instance, "close", None)
+            if close is None:
+                continue
+            try:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Service '{name}' close failed: {e}")
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """サービスごとの生成状況"""
+        return {
+            name: {
+                "ready": self.is_ready(name),
+                "build_seconds": round(self._build_seconds[name], 3)
+                if name in self._build_seconds
+                else None,
+                "error": self._errors.get(name),
+            }
+            for name in self._factories
+        }
+
+
+# グローバルサービスレジストリ（ファクトリは文字列で指定し、モジュールのimportも遅延させる）
+service_registry = ServiceRegistry()
+service_registry.register("firebase", "app.utils.auth:initialize_firebase")
+service_registry.register("speech", "app.services.speech_service:SpeechToTextService")
+service_registry.register(
+    "ai_feedback", "app.services.ai_feedback_service:create_ai_feedback_service"
+)
+# 現在どのルーターからも使われていないため、ウォームアップ対象外（初回利用時に生成）
+service_registry.register(
+    "gemini", "app.services.gemini_feedback_service:GeminiFeedbackService", warm_up=False
+)
+service_registry.register(
+    "google_speech", "app.services.google_speech_service:GoogleSpeechService", warm_up=False
+)
@@ -0,0 +1,43 @@
+"""リクエスト合流（single-flight） - 同一キーの同時実行を1回の処理にまとめる"""
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+def build_flight_key(**params: Any) -> str:
+    """パラメータ一式からキーを生成"""
+    material = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """実行中の同一キー呼び出しがあれば、その結果を共有して待つ"""
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._stats = {"executed": 0, "shared": 0}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """keyごとに1回だけfuncを実行し、同時に来た呼び出しへ同じ結果を返す"""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self._stats["executed"] += 1
+        else:
+            self._stats["shared"] += 1
+
+        # 呼び出し元がキャンセルされても共有タスクは止めない
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self._stats, "in_flight": len(self._in_flight)}
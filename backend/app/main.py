@@ -1,18 +1,24 @@
 from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api.routers import ai_feedback, auth, children, logging_control
 from app.api.routers.voice import router as voice_router
 from app.routers import speech
-from app.core.database import get_db
-from app.utils.auth import verify_firebase_token
+from app.core.cache import cache_backend
+from app.core.database import get_async_db, get_db
+from app.utils.auth import token_verifier, verify_firebase_token
 from app.core.logging_config import get_logger, setup_logging
 from app.core.monitoring_task import start_monitoring
+from app.core.openai_client import openai_client_pool
+from app.core.service_registry import service_registry
 from app.middleware.error_handler import ErrorHandlerMiddleware
 from app.middleware.performance_monitoring import PerformanceMonitoringMiddleware
+from app.middleware.response_cache import ResponseCacheMiddleware
 from app.middleware.traceability_logging import TraceabilityMiddleware
+from app.services.feedback_job_service import feedback_worker_pool
 from app.services.user_service import UserService
 
 # ログ設定の初期化
@@ -56,6 +62,9 @@ allowed_origins = [
     "https://section9-team-c.vercel.app",
 ]
 
+# レスポンスキャッシュ（最も内側に置き、ヒット時もCORS・監視ミドルウェアを通す）
+app.add_middleware(ResponseCacheMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -70,9 +79,10 @@ app.add_middleware(
         "X-Requested-With",
         "Origin",
         "X-CSRFToken",
-        "X-Request-ID"
+        "X-Request-ID",
+        "If-None-Match",
     ],
-    expose_headers=["X-Request-ID"],
+    expose_headers=["X-Request-ID", "ETag", "X-Cache"],
     max_age=600,
 )
 
@@ -81,12 +91,40 @@ app.add_middleware(TraceabilityMiddleware)
 app.add_middleware(PerformanceMonitoringMiddleware)
 app.add_middleware(ErrorHandlerMiddleware)
 
+@app.on_event("startup")
+async def start_feedback_workers():
+    """AIフィードバックワーカー起動"""
+    await feedback_worker_pool.start()
+
+
+@app.on_event("startup")
+async def start_token_verifier():
+    """Firebase公開鍵の事前取得とバックグラウンド更新を開始"""
+    await token_verifier.start()
+
+
+@app.on_event("startup")
+async def start_service_warm_up():
+    """外部サービスのクライアントをバックグラウンドで生成（起動完了は待たせない）"""
+    service_registry.start_warm_up()
+
+
+@app.on_event("shutdown")
+async def stop_feedback_workers():
+    """AIフィードバックワーカー停止"""
+    await feedback_worker_pool.stop()
+    await openai_client_pool.close()
+    await service_registry.close()
+    await token_verifier.stop()
+    await cache_backend.close()
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "bud-backend"}
 
 @app.post("/api/auth/login")
-async def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     try:
         token = request.idToken
         if not token:
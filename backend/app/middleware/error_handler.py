@@ -3,23 +3,38 @@
 import logging
 import traceback
 
-from fastapi import HTTPException, Request
+from fastapi import HTTPException
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.constants.messages import ERROR_MESSAGES
 
 logger = logging.getLogger(__name__)
 
 
-class ErrorHandlerMiddleware(BaseHTTPMiddleware):
-    """統一エラーハンドリング"""
+class ErrorHandlerMiddleware:
+    """統一エラーハンドリング（純粋なASGIミドルウェア）"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-    async def dispatch(self, request: Request, call_next):
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_wrapper)
 
         except HTTPException as e:
             # FastAPI HTTPExceptionはそのまま通す
@@ -28,37 +43,53 @@ class ErrorHandlerMiddleware(BaseHTTPMiddleware):
         except SQLAlchemyError as e:
             # データベースエラー
             logger.error(f"Database error: {str(e)}")
-            return JSONResponse(
+            if response_started:
+                # 送信開始後はレスポンスを差し替えられない
+                raise
+            response = JSONResponse(
                 status_code=500,
                 content={
                     "detail": ERROR_MESSAGES["DATABASE"]["CONNECTION_ERROR"],
                     "error_code": "DATABASE_ERROR",
                 },
             )
+            await response(scope, receive, send)
 
         except Exception as e:
             # その他の予期しないエラー
             logger.error(f"Unexpected error: {str(e)}")
             logger.error(traceback.format_exc())
+            if response_started:
+                raise
 
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=500,
                 content={
                     "detail": "内部サーバーエラーが発生しました",
                     "error_code": "INTERNAL_SERVER_ERROR",
                 },
             )
+            await response(scope, receive, send)
+
 
+class SecurityHeadersMiddleware:
+    """セキュリティヘッダー追加（純粋なASGIミドルウェア）"""
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """セキュリティヘッダー追加"""
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        # セキュリティヘッダーを追加
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # セキュリティヘッダーを追加
+                headers = MutableHeaders(scope=message)
+                headers["X-Content-Type-Options"] = "nosniff"
+                headers["X-Frame-Options"] = "DENY"
+                headers["X-XSS-Protection"] = "1; mode=block"
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_wrapper)
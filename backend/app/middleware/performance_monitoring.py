@@ -5,44 +5,57 @@ from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.logging_config import get_logger
 
 logger = get_logger("performance")
 
 
-class PerformanceMonitoringMiddleware(BaseHTTPMiddleware):
-    """APIレスポンスタイムとスループットを測定"""
+class PerformanceMonitoringMiddleware:
+    """APIレスポンスタイムとスループットを測定（純粋なASGIミドルウェア）"""
 
-    def __init__(self, app):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp):
+        self.app = app
         # 最近1分間のリクエスト記録
         self.recent_requests = deque(maxlen=1000)
         # エンドポイント別のレスポンスタイム記録
         self.response_times: Dict[str, deque] = {}
+        # 統計ログ出力判定用の累計リクエスト数（dequeは上限で長さが固定されるため別に数える）
+        self.request_count = 0
         # 性能要件（docs/performance.mdより）
         self.target_response_time = 200  # ms
         self.target_throughput = 100  # req/sec
 
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # 測定開始
         start_time = time.time()
-        path = request.url.path
+        path = scope["path"]
+        response_time = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_time
+            if message["type"] == "http.response.start":
+                # レスポンスタイム計算（ミリ秒、レスポンス開始まで）
+                response_time = (time.time() - start_time) * 1000
+                # ヘッダーに性能情報を追加
+                MutableHeaders(scope=message)["X-Response-Time"] = f"{response_time:.2f}ms"
+            await send(message)
 
         # リクエスト処理
-        response = await call_next(request)
+        await self.app(scope, receive, send_wrapper)
 
-        # レスポンスタイム計算（ミリ秒）
-        response_time = (time.time() - start_time) * 1000
+        if response_time is None:
+            return
 
         # 記録
         self.record_request(path, response_time)
 
-        # ヘッダーに性能情報を追加
-        response.headers["X-Response-Time"] = f"{response_time:.2f}ms"
-
         # 性能要件チェック
         if response_time > self.target_response_time:
             logger.warning(
@@ -50,15 +63,14 @@ class PerformanceMonitoringMiddleware(BaseHTTPMiddleware):
                 f"(target: {self.target_response_time}ms)"
             )
 
-        # 定期的に統計情報をログ出力（1分ごと）
-        if len(self.recent_requests) % 100 == 0:
+        # 定期的に統計情報をログ出力（100リクエストごと）
+        if self.request_count % 100 == 0:
             await self.log_performance_stats()
 
-        return response
-
     def record_request(self, path: str, response_time: float):
         """リクエストを記録"""
         now = datetime.now()
+        self.request_count += 1
         self.recent_requests.append(
             {"timestamp": now, "path": path, "response_time": response_time}
         )
@@ -0,0 +1,211 @@
+"""HTTPレスポンスキャッシュミドルウェア - should_cache_api_response のポリシーでGETをキャッシュ"""
+
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import cache as cache_module
+from app.core.cache import (
+    RESPONSE_CACHE_NAMESPACE,
+    CacheBackend,
+    response_generation_key,
+    should_cache_api_response,
+)
+from app.core.logging_config import get_logger
+from app.utils.auth import peek_verified_uid
+
+logger = get_logger(__name__)
+
+
+def compute_etag(body: bytes) -> str:
+    """レスポンスボディからETagを生成"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def compute_weak_etag(*parts: Any) -> str:
+    """集計値（件数・最終更新日時など）から弱いETagを生成"""
+    digest = hashlib.blake2b(
+        "|".join("" if part is None else str(part) for part in parts).encode("utf-8"),
+        digest_size=16,
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Matchがetagに一致するか（弱い比較）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+async def send_not_modified(send: Send, etag: str, extra_headers: List[Tuple[bytes, bytes]] = ()):
+    """304 Not Modified を返す"""
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 304,
+            "headers": [
+                (b"etag", etag.encode("latin-1")),
+                (b"cache-control", b"private, no-cache"),
+                *extra_headers,
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": b""})
+
+
+def not_modified_response(etag: str) -> Response:
+    """ルートハンドラから返す304レスポンス"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+
+class ResponseCacheMiddleware:
+    """
+    認証済みユーザーごとのGETレスポンスキャッシュ（純粋なASGIミドルウェア）
+
+    キーはユーザー（検証済みトークンキャッシュのUID）+ パス + クエリ。
+    エントリにはユーザーの世代番号を保持し、invalidate_user_responses で世代を進めると
+    そのユーザーの全エントリが無効になる。世代番号とエントリはmgetで1回で取得する
+    """
+
+    def __init__(self, app: ASGIApp, backend: Optional[CacheBackend] = None):
+        self.app = app
+        self._backend = backend
+
+    @property
+    def cache(self):
+        return (self._backend or cache_module.cache_backend).namespace(RESPONSE_CACHE_NAMESPACE)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        should_cache, ttl = should_cache_api_response(path)
+        if not should_cache:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        uid = peek_verified_uid(headers.get("authorization"))
+        if uid is None:
+            # 未検証のトークンは通常の認証処理に任せる（検証後は次回からキャッシュ対象）
+            await self.app(scope, receive, send)
+            return
+
+        query = scope.get("query_string", b"").decode("latin-1")
+        entry_key = hashlib.sha256(f"{uid}:{path}?{query}".encode("utf-8")).hexdigest()
+        generation, entry = await self.cache.mget([response_generation_key(uid), entry_key])
+        generation = generation or 0
+
+        if_none_match = headers.get("if-none-match")
+        if entry is not None and entry["gen"] == generation:
+            await self._send_cached(entry, if_none_match, send)
+            return
+
+        await self._call_and_store(scope, receive, send, entry_key, generation, ttl, if_none_match)
+
+    async def _send_cached(
+        self, entry: Dict[str, Any], if_none_match: Optional[str], send: Send
+    ) -> None:
+        if etag_matches(if_none_match, entry["etag"]):
+            await send_not_modified(send, entry["etag"], [(b"x-cache", b"HIT")])
+            return
+
+        body = entry["body"].encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", entry["content_type"].encode("latin-1")),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"etag", entry["etag"].encode("latin-1")),
+                    (b"cache-control", b"private, no-cache"),
+                    (b"x-cache", b"HIT"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def _call_and_store(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        entry_key: str,
+        generation: int,
+        ttl: int,
+        if_none_match: Optional[str],
+    ) -> None:
+        start_message: Optional[Message] = None
+        body_parts: List[bytes] = []
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                if message["status"] != 200 or not content_type.startswith("application/json"):
+                    # キャッシュ対象外はそのまま流す
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(body_parts)
+            response_headers = Headers(raw=start_message["headers"])
+            # ルートが集計値からETagを付けている場合はそれを優先する
+            etag = response_headers.get("etag") or compute_etag(body)
+            await self.cache.set(
+                entry_key,
+                {
+                    "gen": generation,
+                    "etag": etag,
+                    "content_type": response_headers["content-type"],
+                    "body": body.decode("utf-8"),
+                },
+                ttl,
+            )
+
+            if etag_matches(if_none_match, etag):
+                await send_not_modified(send, etag, [(b"x-cache", b"MISS")])
+                return
+
+            raw_headers = [
+                (name, value)
+                for name, value in start_message["headers"]
+                if name.lower() not in (b"etag", b"cache-control")
+            ]
+            raw_headers += [
+                (b"etag", etag.encode("latin-1")),
+                (b"cache-control", b"private, no-cache"),
+                (b"x-cache", b"MISS"),
+            ]
+            await send({**start_message, "headers": raw_headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -6,7 +6,8 @@ import uuid
 from typing import Optional
 
 from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.alert_monitor import (
     record_auth_failure,
@@ -19,15 +20,23 @@ from app.core.logging_config import get_logger
 logger = get_logger("traceability")
 
 
-class TraceabilityMiddleware(BaseHTTPMiddleware):
-    """リクエスト追跡とユーザー操作のトレーサビリティログ"""
+class TraceabilityMiddleware:
+    """リクエスト追跡とユーザー操作のトレーサビリティログ（純粋なASGIミドルウェア）"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
         # リクエストIDを生成
         request_id = str(uuid.uuid4())[:8]
         start_time = time.time()
 
-        # リクエスト情報を取得
+        # リクエスト情報を取得（ボディは読まない）
+        request = Request(scope)
         client_ip = self.get_client_ip(request)
         user_agent = request.headers.get("user-agent", "")
         method = request.method
@@ -39,30 +48,36 @@ class TraceabilityMiddleware(BaseHTTPMiddleware):
         # リクエスト開始ログ
         self.log_request_start(request_id, method, url, client_ip, user_id, user_agent)
 
-        # リクエスト処理
-        response = await call_next(request)
-
-        # 処理時間計算
-        duration = time.time() - start_time
-        duration_ms = duration * 1000
-
-        # アラート監視メトリクス記録
-        if response.status_code >= 500:
-            record_error()
-        elif response.status_code >= 400:
-            if response.status_code == 401 or response.status_code == 403:
-                record_auth_failure()
+        status_code = 500
 
-        # 遅いリクエストの記録
-        record_slow_request(duration_ms)
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # レスポンスヘッダーにリクエストIDを追加
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
 
-        # レスポンス完了ログ
-        self.log_request_end(request_id, method, url, response.status_code, duration, user_id)
-
-        # レスポンスヘッダーにリクエストIDを追加
-        response.headers["X-Request-ID"] = request_id
-
-        return response
+        # リクエスト処理（ストリーミングレスポンスはそのまま流す）
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # 処理時間計算（レスポンス送信完了まで）
+            duration = time.time() - start_time
+            duration_ms = duration * 1000
+
+            # アラート監視メトリクス記録
+            if status_code >= 500:
+                record_error()
+            elif status_code >= 400:
+                if status_code == 401 or status_code == 403:
+                    record_auth_failure()
+
+            # 遅いリクエストの記録
+            record_slow_request(duration_ms)
+
+            # レスポンス完了ログ
+            self.log_request_end(request_id, method, url, status_code, duration, user_id)
 
     def get_client_ip(self, request: Request) -> str:
         """クライアントIPアドレスを取得"""
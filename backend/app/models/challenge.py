@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, Text, func
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Text, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -11,12 +11,39 @@ class Challenge(Base):
     """音声チャレンジ記録モデル"""
 
     __tablename__ = "challenges"
+    __table_args__ = (
+        # 履歴取得（子どもごと・新しい順）用の部分インデックス
+        Index(
+            "ix_challenges_child_id_created_at",
+            "child_id",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_where=text("transcript IS NOT NULL"),
+        ),
+        # 履歴ETag用の最終更新日時集計（子どもごと）用の部分インデックス
+        Index(
+            "ix_challenges_child_id_updated_at",
+            "child_id",
+            "updated_at",
+            postgresql_where=text("transcript IS NOT NULL"),
+        ),
+        # 自動分析の未分析チャレンジ走査用の部分インデックス
+        Index(
+            "ix_challenges_unanalyzed",
+            "id",
+            postgresql_where=text(
+                "ai_feedback IS NULL AND transcript IS NOT NULL AND transcript <> ''"
+            ),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     child_id = Column(UUID(as_uuid=True), ForeignKey("children.id"), nullable=False)
     transcript = Column(Text, nullable=True, comment="音声の文字起こし結果")
     ai_feedback = Column(Text, nullable=True, comment="AIフィードバック")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # フィードバックの再生成など行の更新で進む（履歴ETagの集計に使用）
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # 双方向リレーション
     child = relationship("Child", back_populates="challenges")
@@ -0,0 +1,4 @@
+# app/repositories/__init__.py
+from .challenge_repository import ChallengeRepository
+
+__all__ = ["ChallengeRepository"]
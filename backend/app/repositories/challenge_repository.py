@@ -0,0 +1,95 @@
+"""チャレンジのデータアクセス - 所有者チェック込みの取得を1クエリで行う"""
+
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.challenge import Challenge
+from app.models.child import Child
+
+
+class ChallengeRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_with_owner_check(self, challenge_id: UUID, user_id: UUID) -> Optional[Any]:
+        """
+        詳細表示に必要なカラムと所有者判定を1回の往復で取得
+
+        Returns:
+            Row | None: id, child_id, transcript, ai_feedback, created_at, owned
+                        （チャレンジが存在しない場合はNone）
+        """
+        result = await self.db.execute(
+            select(
+                Challenge.id,
+                Challenge.child_id,
+                Challenge.transcript,
+                Challenge.ai_feedback,
+                Challenge.created_at,
+                (Child.user_id == user_id).label("owned"),
+            )
+            .join(Child, Child.id == Challenge.child_id)
+            .where(Challenge.id == challenge_id)
+        )
+        return result.first()
+
+    async def list_history(
+        self,
+        child_id: UUID,
+        limit: int,
+        after: Optional[Tuple[datetime, UUID]] = None,
+    ) -> Tuple[List[Any], bool]:
+        """
+        履歴を新しい順にキーセットページングで取得
+
+        Args:
+            after: 前ページ最終行の (created_at, id)。指定時はそれより古い行を返す
+
+        Returns:
+            (行リスト, 次ページの有無)
+        """
+        stmt = (
+            select(
+                Challenge.id,
+                Challenge.transcript,
+                Challenge.ai_feedback,
+                Challenge.created_at,
+            )
+            .where(Challenge.child_id == child_id, Challenge.transcript.is_not(None))
+            .order_by(Challenge.created_at.desc(), Challenge.id.desc())
+            .limit(limit + 1)
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(Challenge.created_at, Challenge.id) < tuple_(*after))
+
+        rows = (await self.db.execute(stmt)).all()
+        return rows[:limit], len(rows) > limit
+
+    async def history_version(self, child_id: UUID, user_id: UUID) -> Optional[Any]:
+        """
+        履歴のETag用集計値と所有者判定を1回の往復で取得（行本体は読まない）
+
+        Returns:
+            Row | None: count, last_updated_at
+                        （子どもが存在しないか所有者でない場合はNone）
+                        updated_at は作成時にも設定されるため、追加・フィードバックの
+                        生成/再生成は last_updated_at、削除は count に反映される
+        """
+        result = await self.db.execute(
+            select(
+                func.count(Challenge.id).label("count"),
+                func.max(Challenge.updated_at).label("last_updated_at"),
+            )
+            .select_from(Child)
+            .outerjoin(
+                Challenge,
+                and_(Challenge.child_id == Child.id, Challenge.transcript.is_not(None)),
+            )
+            .where(Child.id == child_id, Child.user_id == user_id)
+            .group_by(Child.id)
+        )
+        return result.first()
@@ -1,33 +1,86 @@
 """Speech-to-Text API Router"""
 
-from fastapi import APIRouter, File, UploadFile, HTTPException, status
+import asyncio
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import JSONResponse
 import logging
-from typing import Dict, Any
-from ..services.speech_service import speech_service
+from typing import AsyncIterator, Dict, Any
+from starlette.formparsers import MultiPartException
+from ..constants.config import VOICE_CONFIG
+from ..core.concurrency import CapacityExceededError
+from ..core.service_registry import service_registry
+from ..utils.auth import verify_firebase_token
+from ..utils.upload import UploadTooLargeError, receive_upload, upload_view
 
 logger = logging.getLogger(__name__)
 
+async def get_speech_service():
+    """Speech service from the registry (created on first use or by startup warm-up)"""
+    return await service_registry.aget("speech")
+
 router = APIRouter(
     prefix="/api/speech",
     tags=["speech"],
     responses={404: {"description": "Not found"}},
 )
 
-@router.post("/transcribe")
-async def transcribe_audio(
-    audio: UploadFile = File(...),
-) -> Dict[str, Any]:
+@router.post(
+    "/transcribe",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["audio"],
+                        "properties": {"audio": {"type": "string", "format": "binary"}},
+                    }
+                }
+            },
+        }
+    },
+)
+async def transcribe_audio(request: Request) -> Dict[str, Any]:
     """
     Convert audio file to text
     
+    The upload is streamed: requests whose Content-Length is already over the
+    limit are rejected before the body is read, and the size limit is enforced
+    while receiving. Small files stay in memory, larger ones are spooled to a
+    temporary file.
+
     Args:
-        audio: Uploaded audio file
+        request: multipart/form-data request with an `audio` file field
     
     Returns:
         Conversion result (text, confidence, success)
     """
     try:
+        try:
+            audio = await receive_upload(
+                request,
+                "audio",
+                max_size=VOICE_CONFIG["MAX_FILE_SIZE"],
+                spool_threshold=VOICE_CONFIG["UPLOAD_SPOOL_THRESHOLD"],
+            )
+        except UploadTooLargeError as e:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=str(e)
+            )
+        except (MultiPartException, KeyError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid multipart request: {e}"
+            )
+
+        if audio is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Audio file is required"
+            )
+
         # Check file format
         allowed_formats = ['audio/webm', 'audio/wav', 'audio/mpeg', 'audio/mp3', 
                           'audio/x-wav', 'audio/x-m4a', 'audio/ogg']
@@ -38,20 +91,23 @@ async def transcribe_audio(
         # Estimate format from file extension
         file_extension = audio.filename.split('.')[-1].lower() if audio.filename else 'webm'
         
-        # Read audio data
-        audio_data = await audio.read()
-        
-        if not audio_data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Audio data is empty"
-            )
-        
-        # Speech-to-Text processing
-        result = await speech_service.transcribe_audio(
-            audio_data=audio_data,
-            audio_format=file_extension
-        )
+        # Reference the upload (mmap once spooled to disk, a single read while in memory)
+        try:
+            with upload_view(audio) as audio_data:
+                if not audio_data:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Audio data is empty"
+                    )
+
+                # Speech-to-Text processing
+                speech_service = await get_speech_service()
+                result = await speech_service.transcribe_audio(
+                    audio_data=audio_data,
+                    audio_format=file_extension
+                )
+        finally:
+            await audio.close()
         
         # Error check
         if not result.get("success"):
@@ -77,15 +133,98 @@ async def transcribe_audio(
             detail=f"Server error occurred: {str(e)}"
         )
 
+async def authenticate_stream(websocket: WebSocket) -> bool:
+    """Read the first frame ({"type": "auth", "token"}) and verify its Firebase ID token"""
+    try:
+        message = await asyncio.wait_for(
+            websocket.receive_json(), timeout=VOICE_CONFIG["STREAM_AUTH_TIMEOUT"]
+        )
+        if not isinstance(message, dict) or message.get("type") != "auth":
+            return False
+        await verify_firebase_token(message.get("token") or "")
+        return True
+    except WebSocketDisconnect:
+        raise
+    except Exception:
+        return False
+
+@router.websocket("/stream")
+async def stream_transcription(websocket: WebSocket, format: str = "webm"):
+    """
+    Real-time speech recognition over WebSocket
+
+    Protocol:
+        - The first frame must be the text frame {"type": "auth", "token": "<Firebase ID token>"}.
+          The token is not accepted in the URL, so access and proxy logs never record it.
+          A missing, late or invalid auth frame closes the connection with 1008
+        - Client sends audio chunks as binary frames (e.g. MediaRecorder WebM/Opus)
+        - Client sends the text frame `stop` when recording ends
+        - Server pushes {"type": "interim" | "final", "text", "confidence", "stability"}
+          as results arrive, then {"type": "end"} once recognition is complete
+        - On failure the server sends {"type": "error", "error"} and closes
+          (1013 when all stream slots are in use, 1011 otherwise)
+    """
+    await websocket.accept()
+    try:
+        authenticated = await authenticate_stream(websocket)
+    except WebSocketDisconnect:
+        return
+    if not authenticated:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    max_size = VOICE_CONFIG["MAX_FILE_SIZE"]
+    received = 0
+
+    async def audio_chunks() -> AsyncIterator[bytes]:
+        nonlocal received
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("text") is not None:
+                if message["text"].strip().lower() == "stop":
+                    return
+                continue
+            chunk = message.get("bytes") or b""
+            received += len(chunk)
+            if received > max_size:
+                raise UploadTooLargeError(max_size)
+            yield chunk
+
+    try:
+        speech_service = await get_speech_service()
+        async for result in speech_service.stream_transcribe(audio_chunks(), audio_format=format):
+            await websocket.send_json(result)
+        await websocket.send_json({"type": "end"})
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info("Speech stream client disconnected")
+    except CapacityExceededError as e:
+        logger.warning(f"Speech stream rejected: {e}")
+        try:
+            await websocket.send_json({"type": "error", "error": str(e)})
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception:
+            pass
+    except Exception as e:
+        logger.error(f"Speech stream error: {e}")
+        try:
+            await websocket.send_json({"type": "error", "error": str(e)})
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        except Exception:
+            pass
+
 @router.get("/health")
 async def health_check() -> Dict[str, Any]:
     """
     Speech API service health check
     
     Returns:
-        Service status
+        Service status (details include in-flight / queued recognition counts)
     """
     try:
+        speech_service = await get_speech_service()
         health_status = speech_service.health_check()
         
         if not health_status.get("healthy"):
@@ -2,9 +2,8 @@
 
 from abc import ABC, abstractmethod
 
-import openai
-
 from app.constants.ai_config import ai_config
+from app.core.openai_client import OpenAIClientPool, openai_client_pool
 
 
 class IAIClient(ABC):
@@ -25,11 +24,12 @@ class OpenAIClient(IAIClient):
     """OpenAI実装"""
 
     def __init__(self, api_key: str = None):
-        self.client = openai.OpenAI(api_key=api_key or ai_config.OPENAI_API_KEY)
+        # APIキー指定時のみ専用プール、通常はプロセス共通プールを利用
+        self.client_pool = OpenAIClientPool(api_key=api_key) if api_key else openai_client_pool
 
     async def generate_feedback(self, transcript: str, max_chars: int = 50) -> str:
         try:
-            response = await self.client.chat.completions.acreate(
+            response = await self.client_pool.chat_completion(
                 model=ai_config.OPENAI_MODEL,
                 messages=[
                     {
@@ -48,7 +48,7 @@ class OpenAIClient(IAIClient):
 
     async def suggest_phrases(self, transcript: str) -> list[str]:
         try:
-            response = await self.client.chat.completions.acreate(
+            response = await self.client_pool.chat_completion(
                 model=ai_config.OPENAI_MODEL,
                 messages=[
                     {
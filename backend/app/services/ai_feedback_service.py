@@ -1,33 +1,132 @@
-import asyncio
-import os
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
-import openai
 from fastapi import HTTPException
 
+from app.core.openai_client import OpenAIClientPool, openai_client_pool
+from app.core.single_flight import SingleFlight, build_flight_key
+from app.services.feedback_cache import FeedbackCache, feedback_cache
+
+# プロンプト変更時は更新し、古いキャッシュを参照しないようにする
+PROMPT_VERSION = "2025-09-v1"
+
+# 同一プロンプトの同時リクエストを1回のAPI呼び出しにまとめる
+openai_single_flight = SingleFlight()
+
+# フィードバック種別ごとのモデルパラメータ
+ENGLISH_CHALLENGE_PARAMS = {"model": "gpt-4o-mini", "max_tokens": 400, "temperature": 0.0}
+GENERAL_PARAMS = {"model": "gpt-4o-mini", "max_tokens": 300, "temperature": 0.7}
+
 
 class AIFeedbackService:
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(
+        self,
+        client_pool: Optional[OpenAIClientPool] = None,
+        cache: Optional[FeedbackCache] = None,
+    ):
+        # プロセス共通のAsyncOpenAIクライアントを利用
+        self.client_pool = client_pool or openai_client_pool
+        self.cache = cache or feedback_cache
 
     async def generate_feedback(
         self,
         transcript: str,
         child_age: Optional[int] = None,
         feedback_type: str = "english_challenge",
+        fallback: bool = True,
     ) -> str:
-        """統合されたAIフィードバック生成"""
-        if feedback_type == "english_challenge":
-            return await self._generate_english_challenge_feedback(transcript, child_age)
-        elif feedback_type == "general":
-            return await self._generate_general_feedback(transcript)
+        """統合されたAIフィードバック生成（同一内容はキャッシュから返す）
+
+        fallback=False の場合、生成失敗時は定型文を返さず例外を送出する
+        """
+        if feedback_type != "general":
+            feedback_type = "english_challenge"
+
+        cache_key = self.cache.build_key(transcript, child_age, feedback_type, PROMPT_VERSION)
+        cached_feedback = self.cache.get(cache_key)
+        if cached_feedback is not None:
+            return cached_feedback
+
+        if feedback_type == "general":
+            feedback = await self._generate_general_feedback(transcript)
         else:
-            return await self._generate_english_challenge_feedback(transcript, child_age)
+            try:
+                feedback = await self._generate_english_challenge_feedback(transcript, child_age)
+            except Exception:
+                if not fallback:
+                    raise
+                # フォールバックはキャッシュしない（次回はAPIを再試行）
+                return f"「{transcript}」に挑戦できてすごいよ！外国人に話しかけた勇気が素晴らしい！次も頑張ろう！😊"
 
-    async def _generate_english_challenge_feedback(
+        self.cache.set(cache_key, feedback)
+        return feedback
+
+    @staticmethod
+    def fallback_feedback(transcript: str) -> str:
+        """AI生成に失敗した場合のデフォルトメッセージ"""
+        return f"「{transcript}」と話してくれてありがとう！とても上手に話せていますね。これからも頑張ってください！"
+
+    def build_chat_request(
+        self,
+        transcript: str,
+        child_age: Optional[int] = None,
+        feedback_type: str = "english_challenge",
+    ) -> Dict[str, Any]:
+        """Chat Completions APIのリクエストボディ（Batch API用）"""
+        if feedback_type == "general":
+            system_message, prompt = self._build_general_prompt(transcript)
+            params = GENERAL_PARAMS
+        else:
+            system_message, prompt = self._build_english_challenge_prompt(transcript, child_age)
+            params = ENGLISH_CHALLENGE_PARAMS
+
+        return {
+            **params,
+            "messages": [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt},
+            ],
+        }
+
+    async def stream_feedback(
+        self,
+        transcript: str,
+        child_age: Optional[int] = None,
+        feedback_type: str = "english_challenge",
+    ) -> AsyncIterator[str]:
+        """generate_feedbackのストリーミング版（生成されたトークンを順次返す）"""
+        if feedback_type != "general":
+            feedback_type = "english_challenge"
+
+        cache_key = self.cache.build_key(transcript, child_age, feedback_type, PROMPT_VERSION)
+        cached_feedback = self.cache.get(cache_key)
+        if cached_feedback is not None:
+            yield cached_feedback
+            return
+
+        if feedback_type == "general":
+            system_message, prompt = self._build_general_prompt(transcript)
+            params = GENERAL_PARAMS
+        else:
+            system_message, prompt = self._build_english_challenge_prompt(transcript, child_age)
+            params = ENGLISH_CHALLENGE_PARAMS
+
+        tokens = []
+        async for token in self._stream_openai_api_with_system(
+            prompt=prompt,
+            system_message=system_message,
+            **params,
+        ):
+            tokens.append(token)
+            yield token
+
+        feedback = "".join(tokens).strip()
+        if feedback:
+            self.cache.set(cache_key, feedback)
+
+    def _build_english_challenge_prompt(
         self, transcript: str, child_age: Optional[int] = None
-    ) -> str:
-        """英語チャレンジ用フィードバック（JSON出力・温かい評価観点付き）"""
+    ) -> Tuple[str, str]:
+        """英語チャレンジ用プロンプト（system, user）"""
         system_message = (
             "あなたは子どもを励ます優しい英語コーチです。"
             "出力は必ず日本語で、やさしく具体的に短く書きます。"
@@ -53,23 +152,11 @@ class AIFeedbackService:
   "note": "話者推定で迷った点があれば簡潔に。なければ空文字"
 }}
 """
+        return system_message, user_prompt
 
-        try:
-            response = await self._call_openai_api_with_system(
-                prompt=user_prompt,
-                system_message=system_message,
-                model="gpt-4o-mini",
-                max_tokens=400,
-                temperature=0.0,
-            )
-            return response.choices[0].message.content.strip()
-        except Exception:
-            return f"「{transcript}」に挑戦できてすごいよ！外国人に話しかけた勇気が素晴らしい！次も頑張ろう！😊"
-
-    async def _generate_general_feedback(self, transcribed_text: str) -> str:
-        """一般的なフィードバック"""
-        try:
-            prompt = f"""
+    def _build_general_prompt(self, transcribed_text: str) -> Tuple[str, str]:
+        """一般フィードバック用プロンプト（system, user）"""
+        prompt = f"""
 あなたは優しい先生です。子供が話した内容を聞いて、温かく励ましのフィードバックをしてください。
 
 子供が話した内容：
@@ -82,12 +169,30 @@ class AIFeedbackService:
 
 フィードバックは200文字以内で、子供が理解しやすい言葉で書いてください。
 """
+        return "あなたは子供たちを励ます優しい先生です。", prompt
+
+    async def _generate_english_challenge_feedback(
+        self, transcript: str, child_age: Optional[int] = None
+    ) -> str:
+        """英語チャレンジ用フィードバック（JSON出力・温かい評価観点付き）"""
+        system_message, user_prompt = self._build_english_challenge_prompt(transcript, child_age)
+
+        response = await self._call_openai_api_with_system(
+            prompt=user_prompt,
+            system_message=system_message,
+            **ENGLISH_CHALLENGE_PARAMS,
+        )
+        return response.choices[0].message.content.strip()
+
+    async def _generate_general_feedback(self, transcribed_text: str) -> str:
+        """一般的なフィードバック"""
+        try:
+            system_message, prompt = self._build_general_prompt(transcribed_text)
 
             response = await self._call_openai_api_with_system(
                 prompt,
-                system_message="あなたは子供たちを励ます優しい先生です。",
-                model="gpt-4o-mini",
-                max_tokens=300,
+                system_message=system_message,
+                **GENERAL_PARAMS,
             )
 
             return response.choices[0].message.content.strip()
@@ -97,18 +202,13 @@ class AIFeedbackService:
 
     async def _call_openai_api(self, prompt: str):
         """OpenAI API呼び出し"""
-        loop = asyncio.get_event_loop()
-
-        def _sync_call():
-            return self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=150,
-                temperature=0.7,
-                timeout=30.0,
-            )
-
-        return await loop.run_in_executor(None, _sync_call)
+        return await self.client_pool.chat_completion(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=150,
+            temperature=0.7,
+            timeout=30.0,
+        )
 
     async def _call_openai_api_with_system(
         self,
@@ -118,19 +218,55 @@ class AIFeedbackService:
         max_tokens: int = 150,
         temperature: float = 0.7,
     ):
-        """OpenAI API呼び出し（システムメッセージ付き）"""
-        loop = asyncio.get_event_loop()
-
-        def _sync_call():
-            return self.client.chat.completions.create(
+        """OpenAI API呼び出し（システムメッセージ付き・同一リクエストは合流）"""
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt},
+        ]
+        flight_key = build_flight_key(
+            model=model, messages=messages, max_tokens=max_tokens, temperature=temperature
+        )
+        return await openai_single_flight.do(
+            flight_key,
+            lambda: self.client_pool.chat_completion(
                 model=model,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt},
-                ],
+                messages=messages,
                 max_tokens=max_tokens,
                 temperature=temperature,
                 timeout=30.0,
-            )
+            ),
+        )
+
+    async def _stream_openai_api_with_system(
+        self,
+        prompt: str,
+        system_message: str,
+        model: str = "gpt-4o-mini",
+        max_tokens: int = 150,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[str]:
+        """OpenAI API ストリーミング呼び出し（差分テキストを順次返す）"""
+        async for chunk in self.client_pool.stream_chat_completion(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=30.0,
+        ):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
 
-        return await loop.run_in_executor(None, _sync_call)
+def create_ai_feedback_service() -> AIFeedbackService:
+    """service_registry用ファクトリ（OpenAIクライアントも合わせて生成しておく）"""
+    service = AIFeedbackService()
+    try:
+        # openaiのimportとクライアント生成を初回リクエストより前に済ませる
+        service.client_pool.client
+    except Exception:
+        # APIキー未設定など。生成時はフォールバックフィードバックで応答する
+        pass
+    return service
@@ -0,0 +1,374 @@
+"""音声前処理 - ヘッダーから実際のコンテナ/コーデックを判定し、PCMはモノラル16kHzに変換して前後の無音を除去"""
+
+import struct
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from app.constants.config import VOICE_CONFIG
+
+AudioBuffer = Union[bytes, memoryview]
+
+# 圧縮形式のヘッダー探索範囲（コーデック情報は先頭付近にある）
+_HEADER_SCAN_BYTES = 64 * 1024
+
+# WEBM_OPUS / OGG_OPUS で指定できるサンプルレート
+_OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+# MPEGバージョンごとのサンプルレート表（インデックス3は予約）
+_MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),  # MPEG-2.5
+}
+
+# WAVのPCMサンプル形式 -> (numpy dtype, 正規化係数)
+_PCM_DTYPES = {
+    "pcm_u8": (np.uint8, 128.0),
+    "pcm_s16le": (np.dtype("<i2"), 32768.0),
+    "pcm_s32le": (np.dtype("<i4"), 2147483648.0),
+    "pcm_f32le": (np.dtype("<f4"), 1.0),
+    "pcm_f64le": (np.dtype("<f8"), 1.0),
+}
+
+
+def _g711_tables() -> Dict[str, np.ndarray]:
+    """G.711 A-law / µ-law の1バイト -> 16bit値 の変換表（ITU-T G.711 の伸張手順）"""
+    codes = np.arange(256, dtype=np.int32)
+
+    ulaw = ~codes & 0xFF
+    exponent = (ulaw >> 4) & 0x07
+    magnitude = ((((ulaw & 0x0F) << 3) + 0x84) << exponent) - 0x84
+    ulaw_values = np.where(ulaw & 0x80, -magnitude, magnitude)
+
+    alaw = codes ^ 0x55
+    exponent = (alaw >> 4) & 0x07
+    mantissa = (alaw & 0x0F) << 4
+    magnitude = np.where(
+        exponent == 0, mantissa + 8, (mantissa + 0x108) << np.maximum(exponent - 1, 0)
+    )
+    alaw_values = np.where(alaw & 0x80, magnitude, -magnitude)
+
+    return {
+        "mulaw": ulaw_values.astype(np.float32) / 32768.0,
+        "alaw": alaw_values.astype(np.float32) / 32768.0,
+    }
+
+
+# WAVのG.711（8bit圧縮）形式 -> 正規化済みの変換表
+_G711_TABLES = _g711_tables()
+
+
+@dataclass
+class AudioProbe:
+    """ヘッダーから判定した音声形式"""
+
+    container: str = "unknown"  # wav, webm, ogg, flac, mp3, mp4, unknown
+    codec: str = "unknown"  # pcm_s16le, opus, vorbis, flac, mp3, aac, ...
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    bits_per_sample: Optional[int] = None
+    # WAVのdataチャンク位置
+    data_offset: int = 0
+    data_size: int = 0
+
+    @property
+    def is_decodable(self) -> bool:
+        """NumPyでデコードできるWAV（リニアPCM・G.711）か"""
+        return self.container == "wav" and (
+            self.codec in _PCM_DTYPES or self.codec in _G711_TABLES or self.codec == "pcm_s24le"
+        )
+
+
+@dataclass
+class PreparedAudio:
+    """認識APIに送る音声とエンコーディング情報"""
+
+    content: AudioBuffer
+    # RecognitionConfig.AudioEncoding の名前（None の場合は拡張子から推定する）
+    encoding: Optional[str]
+    sample_rate: Optional[int]
+    channels: Optional[int]
+    probe: AudioProbe
+    duration_seconds: Optional[float] = None
+    trimmed_seconds: float = 0.0
+    has_speech: bool = True
+
+
+def probe_audio(data: AudioBuffer) -> AudioProbe:
+    """先頭バイトからコンテナとコーデックを判定（拡張子は参照しない）"""
+    head = bytes(data[:_HEADER_SCAN_BYTES])
+
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return _probe_wav(data)
+    if head[:4] == b"fLaC":
+        return _probe_flac(head)
+    if head[:4] == b"OggS":
+        return _probe_ogg(head)
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return _probe_webm(head)
+    if head[4:8] == b"ftyp":
+        return AudioProbe(container="mp4", codec="aac")
+    return _probe_mp3(head)
+
+
+def _probe_wav(data: AudioBuffer) -> AudioProbe:
+    """RIFFチャンクを走査し、fmt と data チャンクを読む"""
+    probe = AudioProbe(container="wav")
+    total = len(data)
+    pos = 12
+    while pos + 8 <= total:
+        chunk_id = bytes(data[pos : pos + 4])
+        (size,) = struct.unpack("<I", data[pos + 4 : pos + 8])
+        body = pos + 8
+
+        if chunk_id == b"fmt " and size >= 16:
+            tag, channels, sample_rate, _, _, bits = struct.unpack(
+                "<HHIIHH", data[body : body + 16]
+            )
+            if tag == 0xFFFE and size >= 26:
+                # WAVE_FORMAT_EXTENSIBLE: 実際の形式はサブフォーマットGUIDの先頭2バイト
+                (tag,) = struct.unpack("<H", data[body + 24 : body + 26])
+            probe.channels = channels
+            probe.sample_rate = sample_rate
+            probe.bits_per_sample = bits
+            probe.codec = _wav_codec(tag, bits)
+        elif chunk_id == b"data":
+            probe.data_offset = body
+            # 録音中に書き出されたファイルはサイズが0や最大値のことがあるため末尾までとする
+            probe.data_size = total - body if size == 0 else min(size, total - body)
+            break
+
+        pos = body + size + (size & 1)
+    return probe
+
+
+def _wav_codec(tag: int, bits: int) -> str:
+    if tag == 1:
+        return "pcm_u8" if bits == 8 else f"pcm_s{bits}le"
+    if tag == 3:
+        return f"pcm_f{bits}le"
+    if tag == 6:
+        return "alaw"
+    if tag == 7:
+        return "mulaw"
+    return "unknown"
+
+
+def _probe_flac(head: bytes) -> AudioProbe:
+    """STREAMINFOブロックからサンプルレート・チャンネル数・ビット深度を読む"""
+    probe = AudioProbe(container="flac", codec="flac")
+    if len(head) >= 26 and head[4] & 0x7F == 0:
+        (packed,) = struct.unpack(">Q", head[18:26])
+        probe.sample_rate = packed >> 44
+        probe.channels = ((packed >> 41) & 0x07) + 1
+        probe.bits_per_sample = ((packed >> 36) & 0x1F) + 1
+    return probe
+
+
+def _probe_ogg(head: bytes) -> AudioProbe:
+    """先頭ページのペイロード（OpusHead / Vorbis識別ヘッダー）を読む"""
+    probe = AudioProbe(container="ogg")
+    if len(head) < 27:
+        return probe
+    payload = 27 + head[26]
+    if head[payload : payload + 8] == b"OpusHead":
+        _read_opus_head(head, payload, probe)
+    elif head[payload : payload + 7] == b"\x01vorbis" and len(head) >= payload + 16:
+        probe.codec = "vorbis"
+        probe.channels = head[payload + 11]
+        (probe.sample_rate,) = struct.unpack("<I", head[payload + 12 : payload + 16])
+    return probe
+
+
+def _probe_webm(head: bytes) -> AudioProbe:
+    """EBMLヘッダー内の CodecID と CodecPrivate（OpusHead）を探す"""
+    probe = AudioProbe(container="webm")
+    if b"A_OPUS" in head:
+        opus_head = head.find(b"OpusHead")
+        if opus_head >= 0:
+            _read_opus_head(head, opus_head, probe)
+        else:
+            probe.codec = "opus"
+    elif b"A_VORBIS" in head:
+        probe.codec = "vorbis"
+    return probe
+
+
+def _read_opus_head(head: bytes, offset: int, probe: AudioProbe) -> None:
+    probe.codec = "opus"
+    if len(head) < offset + 16:
+        return
+    probe.channels = head[offset + 9]
+    (input_rate,) = struct.unpack("<I", head[offset + 12 : offset + 16])
+    # Opusは常に48kHzでデコードされる。元のレートが指定可能な値ならそれを使う
+    probe.sample_rate = input_rate if input_rate in _OPUS_SAMPLE_RATES else 48000
+
+
+def _probe_mp3(head: bytes) -> AudioProbe:
+    """ID3タグを読み飛ばし、最初のフレームヘッダーを読む"""
+    pos = 0
+    if head[:3] == b"ID3" and len(head) >= 10:
+        size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        pos = 10 + size + (10 if head[5] & 0x10 else 0)
+    elif not (len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        # ID3タグもフレーム同期もなければMP3とは判定しない
+        return AudioProbe()
+
+    end = min(len(head) - 3, pos + 4096)
+    while pos < end:
+        if head[pos] == 0xFF and head[pos + 1] & 0xE0 == 0xE0:
+            version = (head[pos + 1] >> 3) & 0x03
+            layer = (head[pos + 1] >> 1) & 0x03
+            rate_index = (head[pos + 2] >> 2) & 0x03
+            if version in _MP3_SAMPLE_RATES and layer == 1 and rate_index != 3:
+                return AudioProbe(
+                    container="mp3",
+                    codec="mp3",
+                    sample_rate=_MP3_SAMPLE_RATES[version][rate_index],
+                    channels=1 if head[pos + 3] >> 6 == 3 else 2,
+                )
+        pos += 1
+    return AudioProbe(container="mp3", codec="mp3")
+
+
+def decode_pcm(data: AudioBuffer, probe: AudioProbe) -> np.ndarray:
+    """WAV（リニアPCM・G.711）のdataチャンクを (フレーム数, チャンネル数) の float32 [-1, 1] に変換"""
+    channels = probe.channels or 1
+    frame_bytes = (probe.bits_per_sample // 8) * channels
+    usable = probe.data_size - probe.data_size % frame_bytes
+    raw = data[probe.data_offset : probe.data_offset + usable]
+
+    if probe.codec in _G711_TABLES:
+        # 1バイト1サンプルのため変換表の参照だけで伸張できる
+        samples = _G711_TABLES[probe.codec][np.frombuffer(raw, dtype=np.uint8)]
+    elif probe.codec == "pcm_s24le":
+        # 3バイト整数は上位に詰めて int32 として読み、符号を保ったまま右シフト
+        triples = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = (triples[:, 0] << 8) | (triples[:, 1] << 16) | (triples[:, 2] << 24)
+        samples = (ints >> 8).astype(np.float32) / 8388608.0
+    else:
+        dtype, scale = _PCM_DTYPES[probe.codec]
+        samples = np.frombuffer(raw, dtype=dtype).astype(np.float32)
+        if probe.codec == "pcm_u8":
+            samples -= 128.0
+        if scale != 1.0:
+            samples /= scale
+    return samples.reshape(-1, channels)
+
+
+def downmix(samples: np.ndarray) -> np.ndarray:
+    """チャンネル平均でモノラル化"""
+    if samples.shape[1] == 1:
+        return samples[:, 0]
+    return samples.mean(axis=1, dtype=np.float32)
+
+
+def resample(signal: np.ndarray, source_rate: int, target_rate: int, taps: int = 63) -> np.ndarray:
+    """
+    線形補間でリサンプリング
+
+    ダウンサンプリング時は先に窓付きsincのローパスをかけ、折り返し雑音を抑える
+    """
+    if source_rate == target_rate or signal.size == 0:
+        return signal
+
+    if target_rate < source_rate:
+        # 遮断周波数は変換後のナイキスト周波数の90%（入力サンプルあたりのサイクル数）
+        cutoff = 0.45 * target_rate / source_rate
+        n = np.arange(taps) - (taps - 1) / 2
+        kernel = np.sinc(2 * cutoff * n) * np.hamming(taps)
+        kernel /= kernel.sum()
+        signal = np.convolve(signal, kernel.astype(np.float32), mode="same")
+
+    length = int(round(signal.size * target_rate / source_rate))
+    positions = np.arange(length) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(signal.size), signal).astype(np.float32)
+
+
+def speech_bounds(
+    signal: np.ndarray,
+    sample_rate: int,
+    frame_ms: int = VOICE_CONFIG["VAD_FRAME_MS"],
+    threshold_db: float = VOICE_CONFIG["VAD_THRESHOLD_DB"],
+    floor_dbfs: float = VOICE_CONFIG["VAD_FLOOR_DBFS"],
+    padding_ms: int = VOICE_CONFIG["VAD_PADDING_MS"],
+) -> Tuple[int, int]:
+    """
+    フレームエネルギーによる発話区間検出
+
+    最大フレームから threshold_db 以内（かつ floor_dbfs 超）のフレームを発話とみなし、
+    最初と最後の発話フレームに padding_ms の余白を付けた区間を返す。
+    発話がない場合は (0, 0)
+    """
+    frame = max(int(sample_rate * frame_ms / 1000), 1)
+    n_frames = signal.size // frame
+    if n_frames == 0:
+        return 0, signal.size
+
+    frames = signal[: n_frames * frame].reshape(n_frames, frame)
+    energy = np.einsum("ij,ij->i", frames, frames) / frame
+    levels = 10 * np.log10(energy + 1e-12)
+    threshold = max(float(levels.max()) + threshold_db, floor_dbfs)
+
+    voiced = np.flatnonzero(levels > threshold)
+    if voiced.size == 0:
+        return 0, 0
+
+    padding = int(sample_rate * padding_ms / 1000)
+    start = max(int(voiced[0]) * frame - padding, 0)
+    end = min((int(voiced[-1]) + 1) * frame + padding, signal.size)
+    return start, end
+
+
+def to_linear16(signal: np.ndarray) -> bytes:
+    """float32 [-1, 1] を16bitリトルエンディアンPCMに変換"""
+    return (np.clip(signal, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+
+# 圧縮形式はデコードせず、ヘッダーの値でエンコーディングとサンプルレートを指定する
+_PASSTHROUGH_ENCODINGS = {
+    ("webm", "opus"): "WEBM_OPUS",
+    ("ogg", "opus"): "OGG_OPUS",
+    ("flac", "flac"): "FLAC",
+    ("mp3", "mp3"): "MP3",
+}
+
+
+def prepare_audio(
+    data: AudioBuffer, target_rate: int = VOICE_CONFIG["TARGET_SAMPLE_RATE"]
+) -> PreparedAudio:
+    """
+    認識APIに送る前の前処理
+
+    - WAV(リニアPCM・G.711 A-law/µ-law): モノラル化 -> target_rate にリサンプリング
+      -> 前後の無音を除去 -> LINEAR16
+    - WebM/Ogg(Opus)・FLAC・MP3: そのまま送り、エンコーディングとサンプルレートはヘッダーの値
+    - 判定できない形式: encoding=None（呼び出し側で拡張子から推定）
+    """
+    probe = probe_audio(data)
+
+    if not probe.is_decodable or not probe.sample_rate or not probe.bits_per_sample:
+        return PreparedAudio(
+            content=data,
+            encoding=_PASSTHROUGH_ENCODINGS.get((probe.container, probe.codec)),
+            sample_rate=probe.sample_rate,
+            channels=probe.channels,
+            probe=probe,
+        )
+
+    signal = resample(downmix(decode_pcm(data, probe)), probe.sample_rate, target_rate)
+    start, end = speech_bounds(signal, target_rate)
+    voiced = signal[start:end]
+
+    return PreparedAudio(
+        content=to_linear16(voiced),
+        encoding="LINEAR16",
+        sample_rate=target_rate,
+        channels=1,
+        probe=probe,
+        duration_seconds=signal.size / target_rate,
+        trimmed_seconds=(signal.size - voiced.size) / target_rate,
+        has_speech=voiced.size > 0,
+    )
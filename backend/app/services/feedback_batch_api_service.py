@@ -0,0 +1,240 @@
+"""OpenAI Batch API によるフィードバック一括再生成（オフラインモード）
+
+1. 対象チャレンジをBatch APIのリクエスト形式（JSONL）で書き出し
+2. ファイルをアップロードしてバッチを作成、完了までポーリング
+3. 出力ファイルを取り込み、Challenge.ai_feedback を一括UPDATE
+"""
+
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, update
+
+from app.constants.config import AI_BATCH_CONFIG
+from app.core.cache import invalidate_user_responses
+from app.core.database import AsyncSessionLocal
+from app.core.openai_client import openai_client_pool
+from app.models.challenge import Challenge
+from app.models.child import Child
+from app.models.user import User
+from app.services.ai_feedback_service import PROMPT_VERSION, AIFeedbackService
+from app.services.feedback_batch_service import calculate_age
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def parse_batch_output(lines: Iterable[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """出力JSONLを (UPDATE用の行, エラー) に分解"""
+    updates: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        custom_id = record.get("custom_id")
+        response = record.get("response") or {}
+
+        if record.get("error") or response.get("status_code") != 200:
+            errors.append({"custom_id": custom_id, "error": record.get("error") or response})
+            continue
+
+        try:
+            content = response["body"]["choices"][0]["message"]["content"].strip()
+            updates.append({"id": UUID(custom_id), "ai_feedback": content})
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            errors.append({"custom_id": custom_id, "error": f"invalid response: {e}"})
+
+    return updates, errors
+
+
+class FeedbackBatchAPIService:
+    """Batch APIでのフィードバック再生成"""
+
+    def __init__(
+        self,
+        client: Optional["AsyncOpenAI"] = None,
+        ai_service: Optional[AIFeedbackService] = None,
+        session_factory=AsyncSessionLocal,
+    ):
+        self._client = client
+        self.ai_service = ai_service or AIFeedbackService()
+        self.session_factory = session_factory
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        return self._client or openai_client_pool.client
+
+    def build_request_line(
+        self, challenge_id: Any, transcript: str, child_age: Optional[int] = None
+    ) -> str:
+        """1チャレンジ分のBatch APIリクエスト行"""
+        return json.dumps(
+            {
+                "custom_id": str(challenge_id),
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": self.ai_service.build_chat_request(transcript, child_age),
+            },
+            ensure_ascii=False,
+        )
+
+    async def export_pending(
+        self, out: IO[bytes], regenerate: bool = False, limit: Optional[int] = None
+    ) -> int:
+        """対象チャレンジをJSONLで書き出し、件数を返す（regenerate=Trueで分析済みも対象）"""
+        page_size = AI_BATCH_CONFIG["PAGE_SIZE"]
+        max_requests = AI_BATCH_CONFIG["BATCH_API_MAX_REQUESTS"]
+        limit = min(limit or max_requests, max_requests)
+        cursor: Optional[UUID] = None
+        count = 0
+
+        async with self.session_factory() as session:
+            while count < limit:
+                stmt = (
+                    select(Challenge.id, Challenge.transcript, Child.birthdate)
+                    .outerjoin(Child, Child.id == Challenge.child_id)
+                    .where(Challenge.transcript.is_not(None), Challenge.transcript != "")
+                    .order_by(Challenge.id)
+                    .limit(min(page_size, limit - count))
+                )
+                if not regenerate:
+                    stmt = stmt.where(Challenge.ai_feedback.is_(None))
+                if cursor is not None:
+                    stmt = stmt.where(Challenge.id > cursor)
+
+                rows = (await session.execute(stmt)).all()
+                if not rows:
+                    break
+
+                for row in rows:
+                    line = self.build_request_line(
+                        row.id, row.transcript, calculate_age(row.birthdate)
+                    )
+                    out.write(line.encode("utf-8") + b"\n")
+                count += len(rows)
+                cursor = rows[-1].id
+
+        return count
+
+    async def submit(self, batch_file: IO[bytes], request_count: int):
+        """JSONLをアップロードしてバッチを作成"""
+        uploaded = await self.client.files.create(
+            file=("feedback_batch.jsonl", batch_file), purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=AI_BATCH_CONFIG["BATCH_API_COMPLETION_WINDOW"],
+            metadata={"prompt_version": PROMPT_VERSION, "request_count": str(request_count)},
+        )
+        logger.info(f"Batch API 投入: batch_id={batch.id}, requests={request_count}")
+        return batch
+
+    async def export_and_submit(self, regenerate: bool = False, limit: Optional[int] = None):
+        """書き出しと投入をまとめて実行（対象がなければNone）"""
+        with tempfile.TemporaryFile() as batch_file:
+            count = await self.export_pending(batch_file, regenerate=regenerate, limit=limit)
+            if count == 0:
+                return None, 0
+            batch_file.seek(0)
+            return await self.submit(batch_file, count), count
+
+    async def get_batch(self, batch_id: str):
+        return await self.client.batches.retrieve(batch_id)
+
+    async def wait_for_completion(
+        self,
+        batch_id: str,
+        poll_interval: float = AI_BATCH_CONFIG["BATCH_API_POLL_INTERVAL"],
+        timeout: Optional[float] = None,
+    ):
+        """終了状態になるまでポーリング"""
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            batch = await self.get_batch(batch_id)
+            if batch.status in TERMINAL_STATUSES:
+                return batch
+            if deadline and time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"バッチ {batch_id} が時間内に完了しませんでした ({batch.status})"
+                )
+            await asyncio.sleep(poll_interval)
+
+    async def fetch_results(self, batch) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """出力ファイルを取得してパース"""
+        if not batch.output_file_id:
+            return [], []
+        content = await self.client.files.content(batch.output_file_id)
+        return parse_batch_output(content.text.splitlines())
+
+    async def ingest(self, batch_id: str) -> Dict[str, Any]:
+        """完了済みバッチの結果をChallenge.ai_feedbackへ取り込む"""
+        batch = await self.get_batch(batch_id)
+        if batch.status != "completed":
+            raise ValueError(f"バッチが完了していません: status={batch.status}")
+
+        updates, errors = await self.fetch_results(batch)
+        chunk_size = AI_BATCH_CONFIG["BATCH_API_INGEST_CHUNK_SIZE"]
+        updated_at = datetime.now(timezone.utc)
+        owner_uids = set()
+
+        async with self.session_factory() as session:
+            for start in range(0, len(updates), chunk_size):
+                chunk = [
+                    {**row, "updated_at": updated_at} for row in updates[start : start + chunk_size]
+                ]
+                await session.execute(update(Challenge), chunk)
+                await session.commit()
+                owner_uids.update(await self._owner_uids(session, [row["id"] for row in chunk]))
+
+        # 更新したチャレンジの保護者ごとにキャッシュ済みレスポンス（履歴など）を無効化
+        for owner_uid in owner_uids:
+            await invalidate_user_responses(owner_uid)
+
+        for error in errors[:10]:
+            logger.warning(f"Batch API 失敗行: {error}")
+
+        return {
+            "batch_id": batch_id,
+            "updated_count": len(updates),
+            "error_count": len(errors),
+        }
+
+    async def _owner_uids(self, session, challenge_ids: List[UUID]) -> List[str]:
+        """チャレンジを所有する保護者のfirebase_uid"""
+        stmt = (
+            select(User.firebase_uid)
+            .join(Child, Child.user_id == User.id)
+            .join(Challenge, Challenge.child_id == Child.id)
+            .where(Challenge.id.in_(challenge_ids), User.firebase_uid.is_not(None))
+            .distinct()
+        )
+        return (await session.execute(stmt)).scalars().all()
+
+
+def batch_summary(batch) -> Dict[str, Any]:
+    """APIレスポンス用のバッチ情報"""
+    counts = batch.request_counts
+    return {
+        "batch_id": batch.id,
+        "status": batch.status,
+        "output_file_id": batch.output_file_id,
+        "request_counts": (
+            {"total": counts.total, "completed": counts.completed, "failed": counts.failed}
+            if counts
+            else None
+        ),
+    }
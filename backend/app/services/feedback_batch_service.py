@@ -0,0 +1,177 @@
+"""未分析チャレンジの一括AI分析 - ページ単位の取得・並列生成・コミット"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import select, update
+
+from app.constants.config import AI_BATCH_CONFIG
+from app.core.cache import invalidate_user_responses
+from app.core.database import AsyncSessionLocal
+from app.core.service_registry import service_registry
+from app.models.challenge import Challenge
+from app.models.child import Child
+from app.models.user import User
+from app.services.ai_feedback_service import AIFeedbackService
+
+logger = logging.getLogger(__name__)
+
+
+def calculate_age(birthdate: Optional[date]) -> Optional[int]:
+    """生年月日から年齢を算出"""
+    if not birthdate:
+        return None
+    today = date.today()
+    return (
+        today.year - birthdate.year - ((today.month, today.day) < (birthdate.month, birthdate.day))
+    )
+
+
+@dataclass
+class BatchProgress:
+    """一括分析の進捗（cursorを渡せば続きから再開できる）"""
+
+    cursor: Optional[str] = None
+    pages: int = 0
+    processed: int = 0
+    success: int = 0
+    errors: int = 0
+    finished: bool = False
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    def report(self) -> Dict[str, Any]:
+        """スループットを含む進捗レポート"""
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return {
+            "pages": self.pages,
+            "processed_count": self.processed,
+            "success_count": self.success,
+            "error_count": self.errors,
+            "finished": self.finished,
+            "next_cursor": None if self.finished else self.cursor,
+            "elapsed_seconds": round(elapsed, 2),
+            "throughput_per_sec": round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+class FeedbackBatchProcessor:
+    """キーセットページングで未分析チャレンジを走査し、ページごとに保存"""
+
+    def __init__(
+        self,
+        ai_service: Optional[AIFeedbackService] = None,
+        page_size: int = AI_BATCH_CONFIG["PAGE_SIZE"],
+        max_concurrency: int = AI_BATCH_CONFIG["MAX_CONCURRENCY"],
+        session_factory=AsyncSessionLocal,
+    ):
+        self.ai_service = ai_service
+        self.page_size = page_size
+        self.max_concurrency = max_concurrency
+        self.session_factory = session_factory
+        self.last_progress: Optional[BatchProgress] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def run(
+        self, start_after: Optional[str] = None, max_pages: Optional[int] = None
+    ) -> BatchProgress:
+        """一括分析を実行（max_pages指定時はそのページ数で中断し、続きのcursorを返す）"""
+        async with self._lock:
+            if self.ai_service is None:
+                # ルーターと同じ共有インスタンスを使う（OpenAIクライアントを二重に作らない）
+                self.ai_service = await service_registry.aget("ai_feedback")
+
+            progress = BatchProgress(cursor=start_after)
+            self.last_progress = progress
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            try:
+                while max_pages is None or progress.pages < max_pages:
+                    # 読み込み・生成・書き込みを分け、LLM呼び出し中はDB接続を保持しない
+                    async with self.session_factory() as session:
+                        rows = await self._fetch_page(session, progress.cursor)
+                    if not rows:
+                        progress.finished = True
+                        break
+
+                    results = await asyncio.gather(*(self._analyze(row, semaphore) for row in rows))
+                    updates = [
+                        {"id": row.id, "ai_feedback": feedback}
+                        for row, feedback in zip(rows, results)
+                        if feedback is not None
+                    ]
+
+                    async with self.session_factory() as session:
+                        await self._write_page(session, updates)
+
+                    # 保存できた行の保護者ごとにキャッシュ済みレスポンスを無効化
+                    owner_uids = {
+                        row.firebase_uid
+                        for row, feedback in zip(rows, results)
+                        if feedback is not None and row.firebase_uid
+                    }
+                    for owner_uid in owner_uids:
+                        await invalidate_user_responses(owner_uid)
+
+                    progress.cursor = str(rows[-1].id)
+                    progress.pages += 1
+                    progress.processed += len(rows)
+                    progress.success += len(updates)
+                    progress.errors += len(rows) - len(updates)
+                    logger.info(f"一括分析 ページ{progress.pages}完了: {progress.report()}")
+            finally:
+                progress.finished_at = time.monotonic()
+
+            return progress
+
+    async def _fetch_page(self, session, cursor: Optional[str]) -> Sequence[Any]:
+        """未分析チャレンジと子どもの生年月日・保護者のfirebase_uidを1クエリで取得"""
+        stmt = (
+            select(Challenge.id, Challenge.transcript, Child.birthdate, User.firebase_uid)
+            .outerjoin(Child, Child.id == Challenge.child_id)
+            .outerjoin(User, User.id == Child.user_id)
+            .where(
+                Challenge.ai_feedback.is_(None),
+                Challenge.transcript.is_not(None),
+                Challenge.transcript != "",
+            )
+            .order_by(Challenge.id)
+            .limit(self.page_size)
+        )
+        if cursor:
+            stmt = stmt.where(Challenge.id > UUID(cursor))
+
+        result = await session.execute(stmt)
+        return result.all()
+
+    async def _write_page(self, session, updates: List[Dict[str, Any]]) -> None:
+        """ページ分のフィードバックを主キー指定の一括UPDATEで保存"""
+        if updates:
+            await session.execute(update(Challenge), updates)
+        await session.commit()
+
+    async def _analyze(self, row, semaphore: asyncio.Semaphore) -> Optional[str]:
+        async with semaphore:
+            try:
+                # 定型文を結果として保存しない（失敗した行は未分析のまま残し、次回再試行）
+                return await self.ai_service.generate_feedback(
+                    transcript=row.transcript,
+                    child_age=calculate_age(row.birthdate),
+                    fallback=False,
+                )
+            except Exception as e:
+                logger.error(f"Challenge {row.id} 分析失敗: {e}")
+                return None
+
+
+# グローバル一括分析プロセッサ
+feedback_batch_processor = FeedbackBatchProcessor()
@@ -0,0 +1,67 @@
+"""AIフィードバックキャッシュ - 同じ発話・年齢帯へのフィードバックを再利用"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Any, Dict, Optional
+
+from app.constants.config import FEEDBACK_CACHE_CONFIG
+from app.core.cache import SimpleMemoryCache
+
+# 年齢帯の区切り（上限年齢, ラベル）
+AGE_BUCKETS = [(3, "0-3"), (6, "4-6"), (9, "7-9"), (12, "10-12")]
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = "。、．，.,!?！？…~〜 "
+
+
+def normalize_transcript(transcript: str) -> str:
+    """表記ゆれを吸収した発話テキスト（全角半角・大文字小文字・空白・文末記号）"""
+    text = unicodedata.normalize("NFKC", transcript).lower()
+    text = _WHITESPACE.sub(" ", text)
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+def age_bucket(child_age: Optional[int]) -> str:
+    """年齢を年齢帯に丸める"""
+    if child_age is None:
+        return "unknown"
+    for upper, label in AGE_BUCKETS:
+        if child_age <= upper:
+            return label
+    return "13+"
+
+
+class FeedbackCache:
+    """正規化した発話・年齢帯・フィードバック種別・プロンプト版で引くキャッシュ"""
+
+    def __init__(
+        self,
+        max_size: int = FEEDBACK_CACHE_CONFIG["MAX_SIZE"],
+        ttl: int = FEEDBACK_CACHE_CONFIG["TTL"],
+    ):
+        self._cache = SimpleMemoryCache(max_size=max_size)
+        self._ttl = ttl
+
+    @staticmethod
+    def build_key(
+        transcript: str, child_age: Optional[int], feedback_type: str, prompt_version: str
+    ) -> str:
+        """キャッシュキー（内容のハッシュ）を生成"""
+        material = "\x1f".join(
+            [normalize_transcript(transcript), age_bucket(child_age), feedback_type, prompt_version]
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    def set(self, key: str, feedback: str) -> None:
+        self._cache.set(key, feedback, self._ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+# グローバルフィードバックキャッシュ
+feedback_cache = FeedbackCache()
@@ -0,0 +1,292 @@
+"""AIフィードバック非同期ジョブ - チャレンジ保存後にバックグラウンドでフィードバックを生成"""
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import update
+
+from app.constants.config import FEEDBACK_JOB_CONFIG
+from app.core.cache import invalidate_user_responses
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.service_registry import service_registry
+from app.models.challenge import Challenge
+from app.services.ai_feedback_service import AIFeedbackService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FeedbackJob:
+    """フィードバック生成ジョブ"""
+
+    challenge_id: str
+    transcript: str
+    child_age: Optional[int] = None
+    feedback_type: str = "english_challenge"
+    owner_uid: Optional[str] = None  # 保存後にレスポンスキャッシュを無効化するユーザー
+    attempts: int = 0  # 失敗して再投入された回数
+
+    def to_json(self) -> str:
+        # Redisでの LREM 照合のためキー順を固定する
+        return json.dumps(asdict(self), ensure_ascii=False, sort_keys=True)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "FeedbackJob":
+        return cls(**json.loads(raw))
+
+
+class JobBackend(ABC):
+    """ジョブキューの抽象インターフェース"""
+
+    @abstractmethod
+    async def enqueue(self, job: FeedbackJob) -> None:
+        """ジョブを追加"""
+        pass
+
+    @abstractmethod
+    async def dequeue(self) -> Optional[FeedbackJob]:
+        """ジョブを取り出す（一定時間ジョブがなければNone）"""
+        pass
+
+    async def ack(self, job: FeedbackJob) -> None:
+        """ジョブ完了を通知"""
+        pass
+
+    async def retry(self, job: FeedbackJob) -> None:
+        """試行回数を増やして再投入し、元のジョブは完了扱いにする"""
+        await self.enqueue(replace(job, attempts=job.attempts + 1))
+        await self.ack(job)
+
+    async def recover(self) -> int:
+        """前回プロセスで処理中だったジョブを再投入"""
+        return 0
+
+    async def pending_count(self) -> int:
+        """待機中ジョブ数"""
+        return 0
+
+    async def close(self) -> None:
+        """リソース解放"""
+        pass
+
+
+class InMemoryJobBackend(JobBackend):
+    """プロセス内キュー（再起動でジョブは失われる）"""
+
+    def __init__(self, max_size: int = FEEDBACK_JOB_CONFIG["MAX_QUEUE_SIZE"]):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+
+    async def enqueue(self, job: FeedbackJob) -> None:
+        self._queue.put_nowait(job)
+
+    async def dequeue(self) -> Optional[FeedbackJob]:
+        try:
+            return await asyncio.wait_for(
+                self._queue.get(), timeout=FEEDBACK_JOB_CONFIG["DEQUEUE_TIMEOUT"]
+            )
+        except asyncio.TimeoutError:
+            return None
+
+    async def ack(self, job: FeedbackJob) -> None:
+        self._queue.task_done()
+
+    async def pending_count(self) -> int:
+        return self._queue.qsize()
+
+
+class RedisJobBackend(JobBackend):
+    """Redisリストによる永続キュー（処理中ジョブは別リストへ退避し、クラッシュ時に再投入）"""
+
+    def __init__(self, redis_url: str = settings.REDIS_URL):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(redis_url, decode_responses=True)
+        self._queue_key = FEEDBACK_JOB_CONFIG["QUEUE_KEY"]
+        self._processing_key = FEEDBACK_JOB_CONFIG["PROCESSING_KEY"]
+
+    async def enqueue(self, job: FeedbackJob) -> None:
+        await self._redis.lpush(self._queue_key, job.to_json())
+
+    async def dequeue(self) -> Optional[FeedbackJob]:
+        raw = await self._redis.blmove(
+            self._queue_key,
+            self._processing_key,
+            FEEDBACK_JOB_CONFIG["DEQUEUE_TIMEOUT"],
+            "RIGHT",
+            "LEFT",
+        )
+        return FeedbackJob.from_json(raw) if raw else None
+
+    async def ack(self, job: FeedbackJob) -> None:
+        await self._redis.lrem(self._processing_key, 1, job.to_json())
+
+    async def recover(self) -> int:
+        recovered = 0
+        while await self._redis.lmove(self._processing_key, self._queue_key, "RIGHT", "RIGHT"):
+            recovered += 1
+        return recovered
+
+    async def pending_count(self) -> int:
+        return await self._redis.llen(self._queue_key)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_job_backend(backend_name: str = settings.FEEDBACK_JOB_BACKEND) -> JobBackend:
+    """設定に応じたジョブバックエンドを生成"""
+    if backend_name == "redis":
+        return RedisJobBackend()
+    return InMemoryJobBackend()
+
+
+async def save_challenge_feedback(challenge_id: str, feedback: str) -> None:
+    """リクエストとは別の短命セッションでフィードバックを保存"""
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(Challenge).where(Challenge.id == UUID(challenge_id)).values(ai_feedback=feedback)
+        )
+        await session.commit()
+
+
+class FeedbackWorkerPool:
+    """フィードバック生成ワーカープール"""
+
+    def __init__(
+        self,
+        backend: Optional[JobBackend] = None,
+        ai_service: Optional[AIFeedbackService] = None,
+        worker_count: int = settings.FEEDBACK_WORKER_COUNT,
+    ):
+        self.backend = backend
+        self.ai_service = ai_service
+        self.worker_count = worker_count
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {"enqueued": 0, "processed": 0, "retried": 0, "failed": 0}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """ワーカー起動"""
+        if self.running:
+            return
+
+        if self.backend is None:
+            self.backend = create_job_backend()
+        if self.ai_service is None:
+            # ルーターと同じ共有インスタンスを使う（OpenAIクライアントを二重に作らない）
+            self.ai_service = await service_registry.aget("ai_feedback")
+
+        recovered = await self.backend.recover()
+        if recovered:
+            logger.info(f"未完了のフィードバックジョブを再投入: {recovered}件")
+
+        self._tasks = [
+            asyncio.create_task(self._worker(index)) for index in range(self.worker_count)
+        ]
+        logger.info(f"フィードバックワーカー起動 (ワーカー数: {self.worker_count})")
+
+    async def stop(self) -> None:
+        """ワーカー停止"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self.backend is not None:
+            await self.backend.close()
+        logger.info("フィードバックワーカー停止")
+
+    async def submit(self, job: FeedbackJob) -> None:
+        """ジョブを投入"""
+        if self.backend is None:
+            self.backend = create_job_backend()
+        await self.backend.enqueue(job)
+        self.stats["enqueued"] += 1
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                job = await self.backend.dequeue()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"ジョブ取得エラー (worker={index}): {e}")
+                await asyncio.sleep(1)
+                continue
+
+            if job is None:
+                continue
+
+            # 完了通知は処理成功時か再試行・破棄を決めた時だけ行う
+            # （停止時のキャンセルでは通知せず、Redisでは処理中リストに残して次回起動時に再投入）
+            try:
+                await self.process(job)
+            except Exception as e:
+                await self._handle_failure(job, e)
+                continue
+
+            self.stats["processed"] += 1
+            try:
+                await self.backend.ack(job)
+            except Exception as e:
+                logger.error(f"ジョブ完了通知エラー: challenge_id={job.challenge_id}, {e}")
+
+    async def _handle_failure(self, job: FeedbackJob, error: Exception) -> None:
+        """失敗したジョブを上限回数まで再投入し、超えたら破棄"""
+        try:
+            if job.attempts + 1 < FEEDBACK_JOB_CONFIG["MAX_ATTEMPTS"]:
+                self.stats["retried"] += 1
+                logger.warning(
+                    f"フィードバックジョブ再投入: challenge_id={job.challenge_id}, "
+                    f"attempt={job.attempts + 1}, {error}"
+                )
+                await self.backend.retry(job)
+            else:
+                self.stats["failed"] += 1
+                logger.error(f"フィードバックジョブ失敗: challenge_id={job.challenge_id}, {error}")
+                await self.backend.ack(job)
+        except Exception as e:
+            logger.error(f"ジョブ再投入エラー: challenge_id={job.challenge_id}, {e}")
+
+    async def process(self, job: FeedbackJob) -> str:
+        """1件のジョブを処理（生成失敗時はデフォルトメッセージを保存）"""
+        try:
+            feedback = await self.ai_service.generate_feedback(
+                transcript=job.transcript,
+                child_age=job.child_age,
+                feedback_type=job.feedback_type,
+            )
+        except Exception as e:
+            logger.warning(f"AIフィードバック生成に失敗、デフォルトメッセージを使用: {e}")
+            feedback = AIFeedbackService.fallback_feedback(job.transcript)
+
+        await self._store_feedback(job.challenge_id, feedback)
+        if job.owner_uid:
+            await invalidate_user_responses(job.owner_uid)
+        return feedback
+
+    async def _store_feedback(self, challenge_id: str, feedback: str) -> None:
+        await save_challenge_feedback(challenge_id, feedback)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """ワーカー統計"""
+        pending = await self.backend.pending_count() if self.backend else 0
+        return {
+            **self.stats,
+            "pending": pending,
+            "workers": len(self._tasks),
+            "backend": type(self.backend).__name__ if self.backend else None,
+        }
+
+
+# グローバルワーカープール
+feedback_worker_pool = FeedbackWorkerPool()
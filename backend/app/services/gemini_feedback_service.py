@@ -8,8 +8,14 @@ import asyncio
 import logging
 import json
 
+from app.core.service_registry import service_registry
+from app.core.single_flight import SingleFlight, build_flight_key
+
 logger = logging.getLogger(__name__)
 
+# 同一プロンプトの同時リクエストを1回のAPI呼び出しにまとめる
+gemini_single_flight = SingleFlight()
+
 class GeminiFeedbackService:
     def __init__(self):
         # Gemini API設定
@@ -126,7 +132,14 @@ class GeminiFeedbackService:
             return self._get_fallback_feedback_json(transcript)
 
     async def _call_gemini_api(self, prompt: str, temperature: float = 0.7) -> str:
-        """Gemini API呼び出し（非同期）"""
+        """Gemini API呼び出し（非同期・同一リクエストは合流）"""
+        flight_key = build_flight_key(model="gemini-pro", prompt=prompt, temperature=temperature)
+        return await gemini_single_flight.do(
+            flight_key, lambda: self._call_gemini_api_once(prompt, temperature)
+        )
+
+    async def _call_gemini_api_once(self, prompt: str, temperature: float) -> str:
+        """Gemini API呼び出し本体"""
         loop = asyncio.get_event_loop()
 
         def _sync_call():
@@ -191,5 +204,6 @@ class GeminiFeedbackService:
         """Gemini API が利用可能かチェック"""
         return self.model is not None
 
-# グローバルインスタンス
-gemini_feedback_service = GeminiFeedbackService()
\ No newline at end of file
+# グローバルインスタンス（import時には生成せず、service_registry経由で初回利用時に生成）
+def get_gemini_feedback_service() -> GeminiFeedbackService:
+    return service_registry.get("gemini")
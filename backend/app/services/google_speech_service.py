@@ -7,6 +7,8 @@ import logging
 from typing import Optional, Dict, Any
 from google.cloud import speech
 
+from app.core.service_registry import service_registry
+
 logger = logging.getLogger(__name__)
 
 class GoogleSpeechService:
@@ -101,5 +103,6 @@ class GoogleSpeechService:
         """Speech API が利用可能かチェック"""
         return self.client is not None
 
-# グローバルインスタンス
-google_speech_service = GoogleSpeechService()
\ No newline at end of file
+# グローバルインスタンス（import時には生成せず、service_registry経由で初回利用時に生成）
+def get_google_speech_service() -> GoogleSpeechService:
+    return service_registry.get("google_speech")
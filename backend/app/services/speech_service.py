@@ -2,22 +2,41 @@
 
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Union
 from google.cloud import speech
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+
+from app.constants.config import VOICE_CONFIG
+from app.core.concurrency import ConcurrencyLimiter
+from app.core.config import settings
+from app.services.audio_preprocessing import PreparedAudio, prepare_audio
 
 logger = logging.getLogger(__name__)
 
+
 class SpeechToTextService:
     """Google Cloud Speech-to-Text API Service"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        async_client: Optional[speech.SpeechAsyncClient] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_streams: Optional[int] = None,
+    ):
         """Initialize service"""
         try:
-            # Initialize Speech client
-            self.client = speech.SpeechClient()
-            
+            # The gRPC asyncio channel must be created inside the running event loop,
+            # so the async client (one-shot and streaming recognition) is created on
+            # first use and reused afterwards
+            self._async_client = async_client
+
+            # Concurrency limit and per-call deadline for one-shot recognition
+            self.limiter = ConcurrencyLimiter(max_concurrency or settings.SPEECH_MAX_CONCURRENCY)
+            # Streams are long-lived, so they get their own cap and are rejected when full
+            self.stream_limiter = ConcurrencyLimiter(max_streams or settings.SPEECH_MAX_STREAMS)
+            self.timeout = timeout or settings.SPEECH_RECOGNIZE_TIMEOUT
+
             # Basic configuration
             self.config = speech.RecognitionConfig(
                 encoding=speech.RecognitionConfig.AudioEncoding.WEBM_OPUS,
@@ -29,30 +48,27 @@ class SpeechToTextService:
                 enable_automatic_punctuation=True,
             )
             
-            # Thread pool for CPU-intensive tasks
-            self.thread_pool = ThreadPoolExecutor(max_workers=4)
-            
             logger.info("SpeechToTextService initialized successfully")
             
         except Exception as e:
             logger.error(f"SpeechToTextService initialization failed: {e}")
             raise
     
-    async def transcribe_audio(self, audio_data: bytes, 
+    async def transcribe_audio(self, audio_data: Union[bytes, memoryview],
                              audio_format: str = "webm") -> Dict[str, Any]:
         """
         Convert audio data to text
         
         Args:
-            audio_data: Audio data in bytes
+            audio_data: Audio data (bytes, or a memoryview over the spooled upload)
             audio_format: Audio format (webm, wav, mp3, etc.)
         
         Returns:
             Conversion result dictionary
         """
         try:
-            # File size check (10MB limit)
-            max_size = 10 * 1024 * 1024
+            # File size check (VOICE_CONFIG["MAX_FILE_SIZE"])
+            max_size = VOICE_CONFIG["MAX_FILE_SIZE"]
             if len(audio_data) > max_size:
                 return {
                     "success": False,
@@ -70,11 +86,28 @@ class SpeechToTextService:
                     "error": "Audio data too small"
                 }
             
-            # Adjust config for format
-            config = self._adjust_config_for_format(audio_format)
+            # Probe the real format; PCM is downmixed, resampled and silence-trimmed
+            # (NumPy work runs in a worker thread so the event loop stays free)
+            prepared = await asyncio.to_thread(prepare_audio, audio_data)
+            if not prepared.has_speech:
+                return {
+                    "success": False,
+                    "text": "",
+                    "confidence": 0.0,
+                    "error": "Could not recognize speech"
+                }
+
+            if prepared.trimmed_seconds:
+                logger.debug(
+                    f"Audio preprocessed: {len(audio_data)} -> {len(prepared.content)} bytes, "
+                    f"trimmed {prepared.trimmed_seconds:.2f}s of silence"
+                )
+
+            # Config from the probed header, falling back to the file extension
+            config = self._config_for_audio(prepared, audio_format)
             
             # Execute speech recognition
-            result = await self._recognize_speech(audio_data, config)
+            result = await self._recognize_speech(prepared.content, config)
             
             return result
             
@@ -87,6 +120,23 @@ class SpeechToTextService:
                 "error": f"Speech recognition processing error: {str(e)}"
             }
     
+    def _config_for_audio(self, prepared: PreparedAudio,
+                          audio_format: str) -> speech.RecognitionConfig:
+        """Build configuration from the probed encoding and sample rate"""
+        if prepared.encoding is None:
+            # Unknown container/codec: keep the extension-based guess
+            return self._adjust_config_for_format(audio_format)
+
+        return speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding[prepared.encoding],
+            sample_rate_hertz=prepared.sample_rate or 0,
+            audio_channel_count=prepared.channels or 0,
+            language_code=self.config.language_code,
+            max_alternatives=1,
+            profanity_filter=True,
+            enable_automatic_punctuation=True,
+        )
+
     def _adjust_config_for_format(self, audio_format: str) -> speech.RecognitionConfig:
         """Adjust configuration based on audio format"""
         config = self.config
@@ -112,22 +162,27 @@ class SpeechToTextService:
         
         return config
     
-    async def _recognize_speech(self, audio_data: bytes, 
+    @property
+    def async_client(self) -> speech.SpeechAsyncClient:
+        """Shared async client (one gRPC channel per process)"""
+        if self._async_client is None:
+            self._async_client = speech.SpeechAsyncClient()
+        return self._async_client
+
+    async def _recognize_speech(self, audio_data: Union[bytes, memoryview],
                               config: speech.RecognitionConfig) -> Dict[str, Any]:
         """Execute speech recognition asynchronously"""
-        loop = asyncio.get_event_loop()
-        
-        def _sync_recognize():
-            """Synchronous speech recognition processing"""
-            audio = speech.RecognitionAudio(content=audio_data)
-            response = self.client.recognize(config=config, audio=audio)
-            return response
-        
         try:
-            # Run CPU-bound task in separate thread
-            response = await loop.run_in_executor(
-                self.thread_pool, _sync_recognize
-            )
+            # Protobuf bytes fields only accept bytes, so the single unavoidable copy
+            # of a memoryview happens here, at the gRPC boundary
+            content = audio_data if isinstance(audio_data, bytes) else bytes(audio_data)
+            audio = speech.RecognitionAudio(content=content)
+
+            # Wait for a free slot, then call with a per-call deadline
+            async with self.limiter.slot():
+                response = await self.async_client.recognize(
+                    config=config, audio=audio, timeout=self.timeout
+                )
             
             # Process results
             if not response.results:
@@ -163,12 +218,82 @@ class SpeechToTextService:
                 "error": f"Speech recognition execution error: {str(e)}"
             }
     
+    async def stream_transcribe(
+        self,
+        chunks: AsyncIterator[bytes],
+        audio_format: str = "webm",
+        interim_results: bool = True,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Recognize audio while it is still being recorded
+
+        Uses the async client's bidirectional streaming RPC, so a stream holds no
+        worker thread. Concurrent streams are capped by stream_limiter and a
+        stream over capacity is rejected immediately.
+
+        Args:
+            chunks: Audio chunks in arrival order (e.g. WebM/Opus from MediaRecorder)
+            audio_format: Audio format (webm, wav, mp3, etc.)
+            interim_results: Also yield non-final hypotheses
+
+        Yields:
+            {"type": "interim" | "final", "text", "confidence", "stability"}
+
+        Raises:
+            CapacityExceededError: All stream slots are in use
+        """
+        streaming_config = speech.StreamingRecognitionConfig(
+            config=self._adjust_config_for_format(audio_format),
+            interim_results=interim_results,
+        )
+        producer_errors: List[Exception] = []
+
+        async def _requests():
+            """Config first, then audio (a producer error ends the request stream)"""
+            yield speech.StreamingRecognizeRequest(streaming_config=streaming_config)
+            try:
+                async for chunk in chunks:
+                    if chunk:
+                        yield speech.StreamingRecognizeRequest(audio_content=chunk)
+            except Exception as e:
+                # Surface producer errors (e.g. size limit) to the consumer below
+                producer_errors.append(e)
+
+        async with self.stream_limiter.try_slot():
+            responses = await self.async_client.streaming_recognize(requests=_requests())
+            try:
+                async for response in responses:
+                    if producer_errors:
+                        break
+                    for result in response.results:
+                        if not result.alternatives:
+                            continue
+                        alternative = result.alternatives[0]
+                        yield {
+                            "type": "final" if result.is_final else "interim",
+                            "text": alternative.transcript.strip(),
+                            "confidence": getattr(alternative, "confidence", 0.0),
+                            "stability": getattr(result, "stability", 0.0),
+                        }
+            finally:
+                # Cancel the RPC if the consumer stopped early or the producer failed
+                cancel = getattr(responses, "cancel", None)
+                if cancel is not None:
+                    cancel()
+
+        if producer_errors:
+            logger.error(f"Streaming recognition error: {producer_errors[0]}")
+            raise producer_errors[0]
+
+    async def close(self) -> None:
+        """Close the shared async channel"""
+        if self._async_client is not None:
+            await self._async_client.transport.close()
+            self._async_client = None
+
     def health_check(self) -> Dict[str, Any]:
         """Service health check"""
         try:
-            if not self.client:
-                return {"healthy": False, "error": "Speech client not initialized"}
-            
             if not self.config:
                 return {"healthy": False, "error": "Speech config not configured"}
             
@@ -177,17 +302,12 @@ class SpeechToTextService:
                 "service": "SpeechToTextService",
                 "language": self.config.language_code,
                 "encoding": str(self.config.encoding),
-                "sample_rate": self.config.sample_rate_hertz
+                "sample_rate": self.config.sample_rate_hertz,
+                "client_ready": self._async_client is not None,
+                "recognize_timeout": self.timeout,
+                **self.limiter.stats(),
+                "streams": self.stream_limiter.stats(),
             }
             
         except Exception as e:
             return {"healthy": False, "error": str(e)}
-    
-    def __del__(self):
-        """Destructor - release resources"""
-        if hasattr(self, 'thread_pool'):
-            self.thread_pool.shutdown(wait=False)
-
-
-# Service instance (singleton)
-speech_service = SpeechToTextService()
\ No newline at end of file
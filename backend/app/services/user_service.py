@@ -3,24 +3,26 @@
 from typing import Optional
 
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
+from app.utils.principal import forget_user_id, remember_user_id
 
 
 class UserService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
     async def get_or_create_user_from_firebase(
         self, firebase_uid: str, email: str, name: str
     ) -> User:
         try:
-            result = self.db.execute(select(User).where(User.firebase_uid == firebase_uid))
+            result = await self.db.execute(select(User).where(User.firebase_uid == firebase_uid))
             user = result.scalars().first()
 
             if user:
                 print(f"✅ 既存ユーザー発見: {user.email}")
+                remember_user_id(firebase_uid, user.id)
                 return user
 
             # 新規ユーザー作成
@@ -28,26 +30,30 @@ class UserService:
             user = User(firebase_uid=firebase_uid, email=email, name=name)
 
             self.db.add(user)
-            self.db.commit()
-            self.db.refresh(user)
+            await self.db.commit()
+            await self.db.refresh(user)
+
+            # 作成前の解決結果が残らないようにキャッシュを更新
+            forget_user_id(firebase_uid)
+            remember_user_id(firebase_uid, user.id)
 
             return user
 
         except Exception:
-            self.db.rollback()
+            await self.db.rollback()
             raise
 
-    def get_user_by_firebase_uid(self, firebase_uid: str) -> Optional[User]:
-        result = self.db.execute(select(User).where(User.firebase_uid == firebase_uid))
+    async def get_user_by_firebase_uid(self, firebase_uid: str) -> Optional[User]:
+        result = await self.db.execute(select(User).where(User.firebase_uid == firebase_uid))
         return result.scalars().first()
 
-    def validate_user_access(self, firebase_uid: str, child_id: str) -> bool:
+    async def validate_user_access(self, firebase_uid: str, child_id: str) -> bool:
         from app.models.child import Child
 
-        result = self.db.execute(
-            select(Child).where(
+        result = await self.db.execute(
+            select(Child.id).where(
                 Child.id == child_id,
                 Child.user_id == select(User.id).where(User.firebase_uid == firebase_uid),
             )
         )
-        return result.scalars().first() is not None
+        return result.first() is not None
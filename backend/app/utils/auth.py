@@ -1,46 +1,285 @@
 # Firebase認証ユーティリティ
 
+import asyncio
+import base64
+import hashlib
+import json
 import os
+import re
+import time
 from typing import Any, Dict, Optional
 
-import firebase_admin
+import httpx
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from firebase_admin import auth, credentials
 
-# 1. Firebase初期化（最初に1回だけ）
-if not firebase_admin._apps:
-    try:
-        # 絶対パスで指定（最も確実）
-        import os
+from app.constants.config import SECURITY_CONFIG
+from app.core.cache import SimpleMemoryCache
+from app.core.config import settings
+from app.core.logging_config import get_logger
 
-        # Docker環境では /app/serviceAccountKey.json を使用
-        docker_cred_path = "/app/serviceAccountKey.json"
-        local_cred_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "serviceAccountKey.json"
-        )
+logger = get_logger(__name__)
 
-        if os.path.exists(docker_cred_path):
-            cred_path = docker_cred_path
-            print(f"🔍 Dockerパス使用: {cred_path}")
-        elif os.path.exists(local_cred_path):
-            cred_path = local_cred_path
-            print(f"🔍 ローカルパス使用: {cred_path}")
-        else:
-            raise FileNotFoundError("serviceAccountKey.jsonが見つかりません")
-
-        cred = credentials.Certificate(cred_path)
-        firebase_admin.initialize_app(cred)
-        print("✅ Firebase初期化完了")
-    except Exception as e:
-        print(f"❌ Firebase初期化エラー: {e}")
-        print("⚠️ 正しいserviceAccountKey.jsonをプロジェクトルートに配置してください")
-        # 起動は継続し、認証が必要なエンドポイントでのみエラーにする
+
+# 1. Firebase初期化（import時ではなく、service_registry経由で初回利用時・起動後のウォームアップで実行）
+def initialize_firebase():
+    """Firebase Admin SDKを初期化してアプリを返す（初期化済みなら既存のアプリ）"""
+    import firebase_admin
+    from firebase_admin import credentials
+
+    if firebase_admin._apps:
+        return firebase_admin.get_app()
+
+    # Docker環境では /app/serviceAccountKey.json を使用
+    docker_cred_path = "/app/serviceAccountKey.json"
+    local_cred_path = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "serviceAccountKey.json"
+    )
+
+    if os.path.exists(docker_cred_path):
+        cred_path = docker_cred_path
+        print(f"🔍 Dockerパス使用: {cred_path}")
+    elif os.path.exists(local_cred_path):
+        cred_path = local_cred_path
+        print(f"🔍 ローカルパス使用: {cred_path}")
+    else:
+        # 起動は継続し、Firebase Admin SDKが必要な処理でのみエラーにする
         # 本番では必ず serviceAccountKey.json を配置すること
+        print("⚠️ 正しいserviceAccountKey.jsonをプロジェクトルートに配置してください")
+        raise FileNotFoundError("serviceAccountKey.jsonが見つかりません")
+
+    cred = credentials.Certificate(cred_path)
+    app = firebase_admin.initialize_app(cred)
+    print("✅ Firebase初期化完了")
+    return app
+
 
 # 2. トークンを取得するための仕組み
 security = HTTPBearer()
 
+# Firebase IDトークンの署名用公開鍵（x509証明書）
+FIREBASE_CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+)
+FIREBASE_ISSUER_PREFIX = "https://securetoken.google.com/"
+
+
+class TokenVerificationError(Exception):
+    """IDトークン検証エラー"""
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+class FirebaseTokenVerifier:
+    """
+    Firebase IDトークンのローカル検証
+
+    公開鍵はバックグラウンドで取得・更新し（Cache-Controlのmax-ageに従う）、
+    リクエスト処理中はネットワークI/Oを一切行わずにRS256署名とクレームを検証する
+    """
+
+    def __init__(
+        self,
+        project_id: str = settings.FIREBASE_PROJECT_ID,
+        certs_url: str = FIREBASE_CERTS_URL,
+        clock_skew_seconds: int = SECURITY_CONFIG["TOKEN_CLOCK_SKEW_SECONDS"],
+    ):
+        self.project_id = project_id
+        self.issuer = FIREBASE_ISSUER_PREFIX + project_id
+        self.certs_url = certs_url
+        self.clock_skew_seconds = clock_skew_seconds
+        self._public_keys: Dict[str, Any] = {}
+        self._keys_expire_at = 0.0
+        # 直近の取得開始時刻（monotonic）。前倒し更新の間隔制御に使う
+        self._last_refresh_at = float("-inf")
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_requested = asyncio.Event()
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._public_keys)
+
+    def load_certificates(self, certificates: Dict[str, str], max_age: int) -> None:
+        """PEM証明書から公開鍵オブジェクトを事前生成して差し替え"""
+        public_keys = {
+            kid: x509.load_pem_x509_certificate(pem.encode("utf-8")).public_key()
+            for kid, pem in certificates.items()
+        }
+        self._public_keys = public_keys
+        self._keys_expire_at = time.time() + max_age
+
+    async def refresh(self) -> int:
+        """公開鍵を取得し、次回更新までの秒数（max-age）を返す"""
+        self._last_refresh_at = time.monotonic()
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(self.certs_url)
+            response.raise_for_status()
+
+        match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else SECURITY_CONFIG["CERTS_DEFAULT_MAX_AGE"]
+        self.load_certificates(response.json(), max_age)
+        logger.info(f"Firebase公開鍵を更新: {len(self._public_keys)}件 (max-age={max_age}s)")
+        return max_age
+
+    async def start(self) -> None:
+        """起動時に公開鍵を取得し、以降はバックグラウンドで更新"""
+        if self._refresh_task is not None:
+            return
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Firebase公開鍵の取得に失敗: {e}")
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            if self.ready:
+                # 期限の少し前に更新（未知のkidを受け取った場合は前倒し）
+                delay = max(
+                    self._keys_expire_at - time.time() - SECURITY_CONFIG["CERTS_REFRESH_MARGIN"],
+                    SECURITY_CONFIG["CERTS_MIN_REFRESH_INTERVAL"],
+                )
+            else:
+                delay = SECURITY_CONFIG["CERTS_RETRY_INTERVAL"]
+
+            try:
+                await asyncio.wait_for(self._refresh_requested.wait(), timeout=delay)
+                # 前倒し更新も直近の取得から最短間隔を空ける（偽造トークンで取得を連発させない）
+                wait = self._on_demand_refresh_wait()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            except asyncio.TimeoutError:
+                pass
+            self._refresh_requested.clear()
+
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Firebase公開鍵の更新に失敗（既存の鍵で継続）: {e}")
+
+    def _on_demand_refresh_wait(self) -> float:
+        """前倒し更新が可能になるまでの秒数（0以下なら即時可能）"""
+        return (
+            self._last_refresh_at
+            + SECURITY_CONFIG["CERTS_ON_DEMAND_REFRESH_INTERVAL"]
+            - time.monotonic()
+        )
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """IDトークンを検証してクレームを返す（ネットワークI/Oなし）"""
+        try:
+            header_segment, payload_segment, signature_segment = token.split(".")
+            header = json.loads(_b64url_decode(header_segment))
+            claims = json.loads(_b64url_decode(payload_segment))
+            signature = _b64url_decode(signature_segment)
+        except (ValueError, TypeError) as e:
+            raise TokenVerificationError(f"トークン形式が不正です: {e}")
+
+        if header.get("alg") != "RS256":
+            raise TokenVerificationError("署名アルゴリズムがRS256ではありません")
+
+        if not self.ready:
+            raise TokenVerificationError("公開鍵が未取得です")
+
+        public_key = self._public_keys.get(header.get("kid"))
+        if public_key is None:
+            # 鍵ローテーション直後の可能性があるため、更新を前倒しで依頼
+            # （直近に取得済みなら依頼せずに拒否する）
+            if self._on_demand_refresh_wait() <= 0:
+                self._refresh_requested.set()
+            raise TokenVerificationError("不明な署名鍵です")
+
+        try:
+            public_key.verify(
+                signature,
+                f"{header_segment}.{payload_segment}".encode("ascii"),
+                padding.PKCS1v15(),
+                hashes.SHA256(),
+            )
+        except InvalidSignature:
+            raise TokenVerificationError("署名が不正です")
+
+        self._validate_claims(claims)
+        claims["uid"] = claims["sub"]
+        return claims
+
+    def _validate_claims(self, claims: Dict[str, Any]) -> None:
+        now = time.time()
+        skew = self.clock_skew_seconds
+
+        if claims.get("aud") != self.project_id:
+            raise TokenVerificationError("audクレームが不正です")
+        if claims.get("iss") != self.issuer:
+            raise TokenVerificationError("issクレームが不正です")
+
+        subject = claims.get("sub")
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise TokenVerificationError("subクレームが不正です")
+
+        if not isinstance(claims.get("exp"), (int, float)) or claims["exp"] < now - skew:
+            raise TokenVerificationError("トークンの有効期限が切れています")
+        if not isinstance(claims.get("iat"), (int, float)) or claims["iat"] > now + skew:
+            raise TokenVerificationError("iatクレームが不正です")
+        if claims.get("auth_time", 0) > now + skew:
+            raise TokenVerificationError("auth_timeクレームが不正です")
+
+
+# グローバル検証器（起動時にstart()で公開鍵を取得）
+token_verifier = FirebaseTokenVerifier()
+
+# 検証済みトークンのキャッシュ（キーはトークンのハッシュ、expクレームまで保持）
+_verified_token_cache = SimpleMemoryCache(max_size=SECURITY_CONFIG["VERIFIED_TOKEN_CACHE_SIZE"])
+
+
+def _token_cache_key(token: str) -> str:
+    """トークン本体を保持しないようハッシュ化"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+async def _verify_id_token_cached(token: str) -> Dict[str, Any]:
+    """
+    キャッシュ付きのIDトークン検証
+
+    キャッシュミス時のみ事前取得済みの公開鍵でローカルに署名検証する
+    """
+    cache_key = _token_cache_key(token)
+    decoded_token = _verified_token_cache.get(cache_key)
+    if decoded_token is not None:
+        return decoded_token
+
+    decoded_token = token_verifier.verify(token)
+
+    # 有効期限（exp）を超えてキャッシュしない
+    ttl = int(decoded_token.get("exp", 0) - time.time())
+    if ttl > 0:
+        _verified_token_cache.set(cache_key, decoded_token, ttl)
+
+    return decoded_token
+
+
+def peek_verified_uid(authorization: Optional[str]) -> Optional[str]:
+    """
+    検証済みトークンのキャッシュからUIDを取得（署名検証は行わない）
+
+    未検証・期限切れのトークンはNoneを返すので、呼び出し側は通常の認証に任せる
+    """
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    decoded_token = _verified_token_cache.get(_token_cache_key(authorization[7:].strip()))
+    return decoded_token["uid"] if decoded_token else None
+
 
 # 3. トークンをチェックする関数
 async def get_current_user(
@@ -61,8 +300,8 @@ async def get_current_user(
     token = token_credentials.credentials
 
     try:
-        # Firebase Admin SDKでトークン検証
-        decoded_token = auth.verify_id_token(token)
+        # キャッシュ済みの公開鍵証明書でRS256署名をローカル検証（検証済みならキャッシュから取得）
+        decoded_token = await _verify_id_token_cached(token)
 
         # 検証成功！ユーザー情報を返す
         user_info = {
@@ -118,8 +357,8 @@ async def verify_firebase_token(token: str) -> Dict[str, Any]:
         Exception: 認証に失敗した場合
     """
     try:
-        # Firebase Admin SDKでトークン検証
-        decoded_token = auth.verify_id_token(token)
+        # キャッシュ済みの公開鍵証明書でRS256署名をローカル検証（検証済みならキャッシュから取得）
+        decoded_token = await _verify_id_token_cached(token)
         return decoded_token
 
     except Exception as error:
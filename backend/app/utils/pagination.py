@@ -0,0 +1,27 @@
+"""キーセットページング用カーソル - (created_at, id) を不透明な文字列に変換"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+
+
+class InvalidCursorError(ValueError):
+    """カーソルの形式が不正"""
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """最終行の (created_at, id) からカーソルを生成"""
+    raw = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """カーソルを (created_at, id) に復元"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"無効なカーソルです: {e}")
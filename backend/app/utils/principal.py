@@ -0,0 +1,103 @@
+"""認証済みユーザーの解決 - リクエストごとにUserを1回だけ特定する"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants.config import SECURITY_CONFIG
+from app.core.cache import SimpleMemoryCache
+from app.core.database import get_async_db
+from app.models.user import User
+from app.utils.auth import get_current_user
+
+
+@dataclass(frozen=True)
+class Principal:
+    """リクエスト中の認証済みユーザー"""
+
+    user_id: UUID
+    firebase_uid: str
+    email: str = ""
+    name: str = ""
+
+
+# Firebase UID → users.id のキャッシュ（ユーザーIDは不変なので短いTTLで十分）
+_user_id_cache = SimpleMemoryCache(max_size=SECURITY_CONFIG["PRINCIPAL_CACHE_SIZE"])
+
+
+def remember_user_id(firebase_uid: str, user_id: UUID) -> None:
+    """解決済みのユーザーIDをキャッシュ"""
+    _user_id_cache.set(firebase_uid, user_id, SECURITY_CONFIG["PRINCIPAL_CACHE_TTL"])
+
+
+def forget_user_id(firebase_uid: str) -> None:
+    """ユーザー作成・削除時にキャッシュを無効化"""
+    _user_id_cache.delete(firebase_uid)
+
+
+async def resolve_user_id(
+    db: AsyncSession, current_user: Dict[str, Any], create: bool = False
+) -> Optional[UUID]:
+    """Firebase UIDからユーザーIDを取得（create=Trueなら未登録時に作成）"""
+    firebase_uid = current_user["user_id"]
+    user_id = _user_id_cache.get(firebase_uid)
+    if user_id is not None:
+        return user_id
+
+    result = await db.execute(select(User.id).where(User.firebase_uid == firebase_uid))
+    user_id = result.scalar_one_or_none()
+
+    if user_id is None and create:
+        user = User(
+            email=current_user.get("email", ""),
+            name=current_user.get("name", ""),
+            firebase_uid=firebase_uid,
+        )
+        db.add(user)
+        try:
+            await db.commit()
+            user_id = user.id
+        except IntegrityError:
+            # 同時リクエストで先に作成された場合
+            await db.rollback()
+            result = await db.execute(select(User.id).where(User.firebase_uid == firebase_uid))
+            user_id = result.scalar_one()
+        forget_user_id(firebase_uid)
+
+    if user_id is not None:
+        remember_user_id(firebase_uid, user_id)
+    return user_id
+
+
+def _build_principal(user_id: UUID, current_user: Dict[str, Any]) -> Principal:
+    return Principal(
+        user_id=user_id,
+        firebase_uid=current_user["user_id"],
+        email=current_user.get("email", ""),
+        name=current_user.get("name", ""),
+    )
+
+
+async def get_current_principal(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+) -> Principal:
+    """登録済みユーザーのPrincipalを返す（未登録は404）"""
+    user_id = await resolve_user_id(db, current_user)
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
+    return _build_principal(user_id, current_user)
+
+
+async def get_or_create_principal(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+) -> Principal:
+    """Principalを返す（未登録なら初回アクセス時にユーザーを作成）"""
+    user_id = await resolve_user_id(db, current_user, create=True)
+    return _build_principal(user_id, current_user)
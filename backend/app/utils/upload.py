@@ -0,0 +1,110 @@
+"""ストリーミングアップロード - サイズ上限を受信中に検査し、一定サイズ以上は一時ファイルに退避"""
+
+import mmap
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.requests import Request
+
+# multipartの境界・パートヘッダー分の余裕（Content-Lengthによる事前チェック用）
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+class UploadTooLargeError(MultiPartException):
+    """アップロードがサイズ上限を超えた"""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"File size too large (limit: {max_size // (1024 * 1024)}MB)")
+        self.max_size = max_size
+
+
+class _LimitedMultiPartParser(MultiPartParser):
+    """パートごとの受信バイト数を数え、上限を超えた時点で中断するパーサー"""
+
+    def __init__(self, headers, stream, *, max_size: int, spool_threshold: int):
+        super().__init__(headers, stream, max_files=1, max_fields=10)
+        # starlette側の max_file_size はメモリ保持の閾値（超えると一時ファイルへ移る）
+        self.max_file_size = spool_threshold
+        self.max_size = max_size
+        self._part_size = 0
+
+    def on_part_begin(self) -> None:
+        super().on_part_begin()
+        self._part_size = 0
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self._part_size += end - start
+        if self._part_size > self.max_size:
+            # MultiPartExceptionの派生なので、作成済みの一時ファイルはstarlette側で閉じられる
+            raise UploadTooLargeError(self.max_size)
+        super().on_part_data(data, start, end)
+
+
+async def receive_upload(
+    request: Request, field_name: str, max_size: int, spool_threshold: int
+) -> Optional[UploadFile]:
+    """
+    multipartリクエストからファイルを1つ受信
+
+    Content-Lengthで明らかに大きいものは本文を読まずに拒否し、
+    それ以外も受信中に上限を超えた時点で中断する
+
+    Returns:
+        UploadFile | None: field_name のファイル（存在しない場合はNone）
+
+    Raises:
+        UploadTooLargeError: サイズ上限超過
+        MultiPartException: multipartの形式が不正
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > max_size + MULTIPART_OVERHEAD:
+            raise UploadTooLargeError(max_size)
+
+    parser = _LimitedMultiPartParser(
+        request.headers,
+        request.stream(),
+        max_size=max_size,
+        spool_threshold=spool_threshold,
+    )
+    form = await parser.parse()
+    upload = form.get(field_name)
+    return upload if isinstance(upload, UploadFile) else None
+
+
+@contextmanager
+def upload_view(upload: UploadFile) -> Iterator[memoryview]:
+    """
+    アップロード内容を memoryview で参照
+
+    一時ファイルに退避済みの場合はmmapでコピーせずに参照し、
+    メモリ上にある（閾値以下の小さい）場合は1回のread()で読み出す。
+    ブロックを抜けるとビューは解放される
+    """
+    spooled = upload.file
+    spooled.flush()
+
+    # SpooledTemporaryFile はメモリ上にある間 name が None（退避後は一時ファイルのfd）
+    if getattr(spooled, "name", None) is None:
+        spooled.seek(0)
+        view = memoryview(spooled.read())
+        try:
+            yield view
+        finally:
+            view.release()
+        return
+
+    spooled.seek(0, 2)
+    if spooled.tell() == 0:
+        # 空ファイルはmmapできない
+        yield memoryview(b"")
+        return
+
+    with mmap.mmap(spooled.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            yield view
+        finally:
+            view.release()
@@ -42,13 +42,27 @@ CREATE TABLE challenges (
     child_id UUID NOT NULL REFERENCES children(id) ON DELETE CASCADE,
     transcript TEXT,
     comment TEXT,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    ai_feedback TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 -- 子供ごとのチャレンジ検索用インデックス
 CREATE INDEX idx_challenges_child_id ON challenges(child_id);
 -- 時系列検索用インデックス
 CREATE INDEX idx_challenges_created_at ON challenges(created_at);
+-- 履歴取得（子どもごと・新しい順）用の部分インデックス
+CREATE INDEX ix_challenges_child_id_created_at
+    ON challenges(child_id, created_at DESC, id DESC)
+    WHERE transcript IS NOT NULL;
+-- 履歴ETag（子どもごとの最終更新日時）用の部分インデックス
+CREATE INDEX ix_challenges_child_id_updated_at
+    ON challenges(child_id, updated_at)
+    WHERE transcript IS NOT NULL;
+-- 自動分析の未分析チャレンジ走査用の部分インデックス
+CREATE INDEX ix_challenges_unanalyzed
+    ON challenges(id)
+    WHERE ai_feedback IS NULL AND transcript IS NOT NULL AND transcript <> '';
 
 -- updated_at列を自動更新するための関数
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -72,6 +86,12 @@ CREATE TRIGGER update_children_updated_at
     FOR EACH ROW 
     EXECUTE FUNCTION update_updated_at_column();
 
+-- チャレンジテーブルのupdated_at自動更新トリガー
+CREATE TRIGGER update_challenges_updated_at
+    BEFORE UPDATE ON challenges
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
 -- データ整合性のための制約を追加
 ALTER TABLE users ADD CONSTRAINT check_email_format 
     CHECK (email ~* '^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$');
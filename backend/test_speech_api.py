@@ -9,13 +9,16 @@ from pathlib import Path
 # Add project root path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from app.services.speech_service import speech_service
+from app.core.service_registry import service_registry
 
 async def test_speech_service():
     """Test Speech service"""
     print("=" * 50)
     print("Speech-to-Text Service Test Started")
     print("=" * 50)
+
+    # Service is created lazily by the registry (same instance the router uses)
+    speech_service = await service_registry.aget("speech")
     
     # 1. Health check
     print("\n1. Running health check...")
@@ -76,7 +79,8 @@ async def test_speech_service():
     print("   1. Prepare test audio file (.wav/.mp3/.webm)")
     print("   2. Use the following code:")
     print("""
-    # Read file
+    # Get the service and read file
+    speech_service = await service_registry.aget("speech")
     with open('test_audio.wav', 'rb') as f:
         audio_data = f.read()
     
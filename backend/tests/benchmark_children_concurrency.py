@@ -0,0 +1,106 @@
+"""イベントループ阻害の回帰ベンチマーク - 子どもCRUD実行中の無関係なエンドポイントのp99
+
+子どもCRUDを並行で流しながら /health のレイテンシを測定し、CRUDなしの基準値と比較する。
+同期DBセッションでイベントループが止まっていると、CRUD中に /health のp99が大きく悪化する。
+
+実行: BUD_BENCH_TOKEN=<Firebase IDトークン> python tests/benchmark_children_concurrency.py
+"""
+
+import asyncio
+import os
+import statistics
+import time
+import uuid
+from typing import List
+
+import aiohttp
+
+# テスト設定
+BASE_URL = os.getenv("BUD_BENCH_URL", "http://localhost:8000")
+AUTH_TOKEN = os.getenv("BUD_BENCH_TOKEN", "")
+CRUD_WORKERS = 20  # 子どもCRUDを並行実行するワーカー数
+PROBE_REQUESTS = 500  # /health の計測リクエスト数
+PROBE_INTERVAL = 0.01  # 計測リクエストの間隔（秒）
+MAX_P99_RATIO = 3.0  # 基準値に対して許容するp99の悪化倍率
+
+
+def percentile(values: List[float], pct: int) -> float:
+    return statistics.quantiles(values, n=100)[pct - 1]
+
+
+async def probe_health(session: aiohttp.ClientSession) -> List[float]:
+    """/health のレイテンシを一定間隔で計測"""
+    latencies = []
+    for _ in range(PROBE_REQUESTS):
+        start = time.perf_counter()
+        async with session.get(f"{BASE_URL}/health") as response:
+            await response.read()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(PROBE_INTERVAL)
+    return latencies
+
+
+async def children_crud_loop(session: aiohttp.ClientSession, stop: asyncio.Event) -> int:
+    """作成→一覧→更新→削除を繰り返し、完了サイクル数を返す"""
+    headers = {"Authorization": f"Bearer {AUTH_TOKEN}"}
+    cycles = 0
+    while not stop.is_set():
+        payload = {
+            "nickname": f"bench-{uuid.uuid4().hex[:12]}",
+            "birthdate": "2018-04-01",
+        }
+        async with session.post(
+            f"{BASE_URL}/api/children/", json=payload, headers=headers
+        ) as response:
+            child = await response.json()
+        async with session.get(f"{BASE_URL}/api/children/", headers=headers) as response:
+            await response.read()
+        if "id" in child:
+            payload["nickname"] = f"bench-{uuid.uuid4().hex[:12]}"
+            async with session.put(
+                f"{BASE_URL}/api/children/{child['id']}", json=payload, headers=headers
+            ) as response:
+                await response.read()
+            async with session.delete(
+                f"{BASE_URL}/api/children/{child['id']}", headers=headers
+            ) as response:
+                await response.read()
+        cycles += 1
+    return cycles
+
+
+def report(label: str, latencies: List[float]) -> float:
+    p50 = statistics.median(latencies) * 1000
+    p99 = percentile(latencies, 99) * 1000
+    print(f"{label:<16} p50={p50:7.2f}ms  p99={p99:7.2f}ms  max={max(latencies) * 1000:7.2f}ms")
+    return p99
+
+
+async def run_benchmark():
+    if not AUTH_TOKEN:
+        raise SystemExit("BUD_BENCH_TOKEN にFirebase IDトークンを設定してください")
+
+    connector = aiohttp.TCPConnector(limit=CRUD_WORKERS + 10)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        print("🚀 基準値計測（CRUDなし）")
+        baseline = report("/health 単独", await probe_health(session))
+
+        print(f"🚀 子どもCRUD {CRUD_WORKERS}並列実行中に計測")
+        stop = asyncio.Event()
+        workers = [
+            asyncio.create_task(children_crud_loop(session, stop)) for _ in range(CRUD_WORKERS)
+        ]
+        under_load = report("/health CRUD中", await probe_health(session))
+        stop.set()
+        cycles = sum(await asyncio.gather(*workers))
+
+    ratio = under_load / baseline if baseline else float("inf")
+    print(f"\n📊 CRUDサイクル: {cycles}回, p99悪化倍率: {ratio:.1f}x")
+    if ratio <= MAX_P99_RATIO:
+        print(f"✅ イベントループ阻害なし（{MAX_P99_RATIO:.0f}x以内）")
+    else:
+        print(f"❌ CRUD中にp99が{MAX_P99_RATIO:.0f}xを超えて悪化しています")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
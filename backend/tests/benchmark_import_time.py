@@ -0,0 +1,89 @@
+"""コールドスタートのベンチマーク - `python -X importtime` で app.main のimport時間を計測
+
+遅延生成（現行）: import app.main のみ。外部クライアントは初回利用時か起動後のウォームアップで生成
+即時生成（変更前相当）: import app.main の直後にウォームアップ対象のサービスを同期的に生成
+  （変更前は import 時に Firebase 初期化・SpeechClient 生成・openai の import が行われていた）
+
+各シナリオを新しいプロセスで RUNS 回実行し、中央値を表示する。
+資格情報がない環境では生成に失敗するサービスがあるが、失敗までの時間も含めて計測する。
+
+実行: python tests/benchmark_import_time.py [回数]
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+TOP_IMPORTS = 10
+
+LAZY = "import app.main"
+EAGER = """
+import app.main
+from app.core.service_registry import service_registry
+for name in service_registry.status():
+    if service_registry._warm_up[name]:
+        try:
+            service_registry.get(name)
+        except Exception:
+            pass
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def run_importtime(code: str):
+    """-X importtime の出力から (合計秒, [(累積μs, モジュール名)]) を返す"""
+    timer = (
+        "import time; _start = time.perf_counter()\n"
+        f"{code}\n"
+        "print(f'TOTAL {time.perf_counter() - _start:.6f}')"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", timer],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    total = float(re.search(r"TOTAL ([\d.]+)", result.stdout).group(1))
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # 最上位（インデントが最小）のimportのみ集計
+        if match and len(match.group(3)) == 1:
+            modules.append((int(match.group(2)), match.group(4)))
+    return total, modules
+
+
+def measure(code: str, runs: int):
+    totals = []
+    modules = []
+    for _ in range(runs):
+        total, modules = run_importtime(code)
+        totals.append(total)
+    return statistics.median(totals), modules
+
+
+def main(runs: int) -> None:
+    lazy_total, lazy_modules = measure(LAZY, runs)
+    eager_total, eager_modules = measure(EAGER, runs)
+
+    print(f"即時生成（変更前相当） {eager_total:>8.3f} s")
+    print(f"遅延生成（現行）       {lazy_total:>8.3f} s  (-{eager_total - lazy_total:.3f} s)")
+
+    print(f"\n最上位importの累積時間 上位{TOP_IMPORTS}件（即時生成）")
+    for cumulative, name in sorted(eager_modules, reverse=True)[:TOP_IMPORTS]:
+        print(f"  {cumulative / 1000:>9.1f} ms  {name}")
+
+    print(f"\n最上位importの累積時間 上位{TOP_IMPORTS}件（遅延生成）")
+    for cumulative, name in sorted(lazy_modules, reverse=True)[:TOP_IMPORTS]:
+        print(f"  {cumulative / 1000:>9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    print("🔍 コールドスタート（import時間）ベンチマーク")
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else RUNS)
@@ -0,0 +1,62 @@
+"""SimpleMemoryCache のマイクロベンチマーク - 保持件数ごとの ops/sec
+
+満杯のキャッシュに対して、ヒットするget・新規キーのset（毎回LRUエビクション発生）・
+既存キーの上書きsetをそれぞれ一定時間実行し、1秒あたりの操作数を表示する。
+
+実行: python tests/benchmark_memory_cache.py [件数 ...]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.cache import SimpleMemoryCache  # noqa: E402
+
+SIZES = [1_000, 100_000, 1_000_000]
+DURATION = 1.0  # 各計測の実行時間（秒）
+BATCH = 100  # 時刻チェック間の操作数
+
+
+def fill(size: int) -> SimpleMemoryCache:
+    cache = SimpleMemoryCache(max_size=size)
+    for i in range(size):
+        cache.set(f"key:{i}", i, ttl=3600)
+    return cache
+
+
+def measure(operation) -> float:
+    """DURATION秒間operationを繰り返し、ops/secを返す"""
+    ops = 0
+    start = time.perf_counter()
+    deadline = start + DURATION
+    while time.perf_counter() < deadline:
+        for _ in range(BATCH):
+            operation()
+        ops += BATCH
+    return ops / (time.perf_counter() - start)
+
+
+def run(size: int) -> None:
+    cache = fill(size)
+    keys = [f"key:{random.randrange(size)}" for _ in range(10_000)]
+    counter = iter(range(size, 10**12))
+    index = iter(range(10**12))
+
+    get_rate = measure(lambda: cache.get(keys[next(index) % len(keys)]))
+    insert_rate = measure(lambda: cache.set(f"key:{next(counter)}", 0, ttl=3600))
+    update_rate = measure(lambda: cache.set(keys[next(index) % len(keys)], 1, ttl=3600))
+
+    print(
+        f"{size:>10,} entries  get(hit) {get_rate:>12,.0f} ops/s  "
+        f"set(evict) {insert_rate:>12,.0f} ops/s  set(update) {update_rate:>12,.0f} ops/s"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print("🔍 SimpleMemoryCache ベンチマーク")
+    for size in sizes:
+        run(size)
@@ -0,0 +1,171 @@
+"""ミドルウェアスタックのマイクロベンチマーク - /health の req/sec（変更前後の比較）
+
+変更前: BaseHTTPMiddleware（dispatch + call_next）による実装を同じ処理内容で再現
+変更後: send をラップする純粋なASGIミドルウェア（app.middleware の現行実装）
+
+ネットワークやHTTPクライアントの影響を除くため、ASGIアプリを直接呼び出して計測する。
+ログ出力の負荷は両者で同じため、ログは無効化している。
+
+実行: python tests/benchmark_middleware_overhead.py [リクエスト数]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from app.core.alert_monitor import record_slow_request  # noqa: E402
+from app.middleware.error_handler import ErrorHandlerMiddleware  # noqa: E402
+from app.middleware.performance_monitoring import PerformanceMonitoringMiddleware  # noqa: E402
+from app.middleware.traceability_logging import TraceabilityMiddleware  # noqa: E402
+
+REQUESTS = 5_000
+WARMUP = 200
+
+
+class LegacyTraceabilityMiddleware(BaseHTTPMiddleware):
+    """変更前の TraceabilityMiddleware と同じ処理"""
+
+    helper = TraceabilityMiddleware(None)
+
+    async def dispatch(self, request, call_next):
+        start_time = time.time()
+        client_ip = self.helper.get_client_ip(request)
+        user_id = self.helper.extract_user_info(request)
+        self.helper.log_request_start(
+            "bench", request.method, str(request.url), client_ip, user_id, ""
+        )
+        response = await call_next(request)
+        duration = time.time() - start_time
+        record_slow_request(duration * 1000)
+        self.helper.log_request_end(
+            "bench", request.method, str(request.url), response.status_code, duration, user_id
+        )
+        response.headers["X-Request-ID"] = "bench"
+        return response
+
+
+class LegacyPerformanceMonitoringMiddleware(BaseHTTPMiddleware):
+    """変更前の PerformanceMonitoringMiddleware と同じ処理"""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.helper = PerformanceMonitoringMiddleware(None)
+
+    async def dispatch(self, request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        response_time = (time.time() - start_time) * 1000
+        self.helper.record_request(request.url.path, response_time)
+        response.headers["X-Response-Time"] = f"{response_time:.2f}ms"
+        if self.helper.request_count % 100 == 0:
+            await self.helper.log_performance_stats()
+        return response
+
+
+class LegacyErrorHandlerMiddleware(BaseHTTPMiddleware):
+    """変更前の ErrorHandlerMiddleware と同じ処理"""
+
+    async def dispatch(self, request, call_next):
+        try:
+            return await call_next(request)
+        except Exception:
+            return JSONResponse(status_code=500, content={"detail": "error"})
+
+
+async def health(request):
+    return JSONResponse({"status": "healthy", "service": "bud-backend"})
+
+
+def build_app(middlewares) -> Starlette:
+    app = Starlette(routes=[Route("/health", health)])
+    for middleware_class in middlewares:
+        app.add_middleware(middleware_class)
+    return app
+
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/health",
+    "raw_path": b"/health",
+    "query_string": b"",
+    "root_path": "",
+    "headers": [(b"host", b"localhost"), (b"user-agent", b"benchmark")],
+    "client": ("127.0.0.1", 50000),
+    "server": ("localhost", 8000),
+}
+
+
+async def call(app) -> int:
+    status = 0
+    request_sent = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        # 実サーバーと同様、リクエスト送信後はレスポンス完了（切断）までブロックする
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif not message.get("more_body", False):
+            disconnected.set()
+
+    await app(dict(SCOPE), receive, send)
+    return status
+
+
+async def measure(app, requests: int) -> float:
+    """requests回 /health を呼び出し、req/secを返す"""
+    for _ in range(WARMUP):
+        await call(app)
+    start = time.perf_counter()
+    for _ in range(requests):
+        assert await call(app) == 200
+    return requests / (time.perf_counter() - start)
+
+
+async def main(requests: int) -> None:
+    before = build_app(
+        [
+            LegacyTraceabilityMiddleware,
+            LegacyPerformanceMonitoringMiddleware,
+            LegacyErrorHandlerMiddleware,
+        ]
+    )
+    after = build_app(
+        [TraceabilityMiddleware, PerformanceMonitoringMiddleware, ErrorHandlerMiddleware]
+    )
+    bare = build_app([])
+
+    before_rate = await measure(before, requests)
+    after_rate = await measure(after, requests)
+    bare_rate = await measure(bare, requests)
+
+    print(f"BaseHTTPMiddleware x3   {before_rate:>10,.0f} req/s")
+    print(f"pure ASGI x3            {after_rate:>10,.0f} req/s  ({after_rate / before_rate:.2f}x)")
+    print(f"ミドルウェアなし        {bare_rate:>10,.0f} req/s")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    print("🔍 /health ミドルウェアオーバーヘッド ベンチマーク")
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS))
@@ -0,0 +1,79 @@
+"""IDトークン検証のマイクロベンチマーク - ローカル検証 vs Firebase Admin SDK相当の経路
+
+Admin SDK（google.oauth2.id_token.verify_token）は検証のたびに証明書を
+HTTPキャッシュから取り出してPEMをパースし直す。ここでは証明書取得をスタブに置き換え、
+純粋な検証コストを比較する（ネットワーク時間は含まない）。
+
+実行: python tests/benchmark_token_verification.py
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.oauth2 import id_token  # noqa: E402
+
+from app.utils.auth import FirebaseTokenVerifier  # noqa: E402
+from tests.test_firebase_token_verifier import (  # noqa: E402
+    PROJECT_ID,
+    _generate_key_and_cert,
+    make_token,
+)
+
+ITERATIONS = 2000
+CERTS_URL = "https://certs.invalid/securetoken"
+
+
+class StubResponse:
+    def __init__(self, body: bytes):
+        self.status = 200
+        self.headers = {"cache-control": "public, max-age=3600"}
+        self.data = body
+
+
+class StubRequest:
+    """証明書を返すだけのgoogle.auth用トランスポート"""
+
+    def __init__(self, certificates):
+        self._body = json.dumps(certificates).encode("utf-8")
+
+    def __call__(self, url, method="GET", **kwargs):
+        return StubResponse(self._body)
+
+
+def measure(label: str, verify) -> float:
+    verify()  # ウォームアップ
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        verify()
+    elapsed = time.perf_counter() - start
+    rate = ITERATIONS / elapsed
+    print(f"{label:<28} {rate:>10.0f} verifications/sec  ({elapsed / ITERATIONS * 1e6:.1f} µs/op)")
+    return rate
+
+
+def main():
+    key_pem, cert_pem = _generate_key_and_cert()
+    certificates = {"kid-1": cert_pem}
+    token = make_token(key_pem)
+
+    verifier = FirebaseTokenVerifier(project_id=PROJECT_ID, certs_url=CERTS_URL)
+    verifier.load_certificates(certificates, max_age=3600)
+    request = StubRequest(certificates)
+
+    print(f"🔍 IDトークン検証ベンチマーク ({ITERATIONS}回)")
+    baseline = measure(
+        "google.oauth2.id_token",
+        lambda: id_token.verify_token(
+            token, request, audience=PROJECT_ID, certs_url=CERTS_URL, clock_skew_in_seconds=5
+        ),
+    )
+    local = measure("FirebaseTokenVerifier", lambda: verifier.verify(token))
+    print(f"📊 速度比: {local / baseline:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
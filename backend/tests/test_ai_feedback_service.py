@@ -0,0 +1,118 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.openai_client import OpenAIClientPool
+from app.services.ai_feedback_service import AIFeedbackService
+from app.services.feedback_cache import FeedbackCache
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeClientPool:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.calls = []
+
+    async def stream_chat_completion(self, **kwargs):
+        self.calls.append(kwargs)
+        for chunk in self.chunks:
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_stream_feedback_yields_tokens_in_order():
+    pool = FakeClientPool([_chunk("よく"), _chunk(None), _chunk("できたね")])
+    service = AIFeedbackService(client_pool=pool, cache=FeedbackCache())
+
+    tokens = [token async for token in service.stream_feedback("Hello", child_age=6)]
+
+    assert tokens == ["よく", "できたね"]
+    assert pool.calls[0]["temperature"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_client_pool_limits_concurrency_and_tracks_stats():
+    pool = OpenAIClientPool(api_key="test", max_concurrency=1)
+
+    async with pool.slot():
+        stats = pool.get_stats()
+        assert stats["in_flight"] == 1
+        assert stats["initialized"] is False
+
+    with pytest.raises(RuntimeError):
+        async with pool.slot():
+            raise RuntimeError("boom")
+
+    stats = pool.get_stats()
+    assert stats["in_flight"] == 0
+    assert stats["total_requests"] == 2
+    assert stats["errors"] == 1
+
+
+class CountingClientPool:
+    def __init__(self):
+        self.calls = 0
+
+    async def chat_completion(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=" 勇気がすごい！ ")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.mark.asyncio
+async def test_generate_feedback_reuses_cached_result_for_same_phrase_and_age_bucket():
+    pool = CountingClientPool()
+    service = AIFeedbackService(client_pool=pool, cache=FeedbackCache())
+
+    first = await service.generate_feedback("Hello!", child_age=7)
+    second = await service.generate_feedback("  hello ", child_age=8)
+    await service.generate_feedback("Hello!", child_age=12)
+
+    assert first == second == "勇気がすごい！"
+    assert pool.calls == 2
+    assert service.cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_generate_feedback_does_not_cache_fallback():
+    class FailingPool:
+        async def chat_completion(self, **kwargs):
+            raise RuntimeError("rate limited")
+
+    service = AIFeedbackService(client_pool=FailingPool(), cache=FeedbackCache())
+
+    await service.generate_feedback("Thank you")
+
+    assert service.cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_generate_feedback_without_fallback_raises():
+    class FailingPool:
+        async def chat_completion(self, **kwargs):
+            raise RuntimeError("rate limited")
+
+    service = AIFeedbackService(client_pool=FailingPool(), cache=FeedbackCache())
+
+    with pytest.raises(RuntimeError, match="rate limited"):
+        await service.generate_feedback("Thank you", fallback=False)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_prompts_make_one_api_call():
+    class SlowPool(CountingClientPool):
+        async def chat_completion(self, **kwargs):
+            await asyncio.sleep(0.01)
+            return await super().chat_completion(**kwargs)
+
+    pool = SlowPool()
+    service = AIFeedbackService(client_pool=pool, cache=FeedbackCache())
+
+    results = await asyncio.gather(*(service.generate_feedback("Hello") for _ in range(5)))
+
+    assert set(results) == {"勇気がすごい！"}
+    assert pool.calls == 1
@@ -0,0 +1,111 @@
+import httpx
+import pytest
+from sqlalchemy.exc import OperationalError
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.middleware.error_handler import ErrorHandlerMiddleware, SecurityHeadersMiddleware
+from app.middleware.performance_monitoring import PerformanceMonitoringMiddleware
+from app.middleware.traceability_logging import TraceabilityMiddleware
+
+MIDDLEWARES = [
+    TraceabilityMiddleware,
+    PerformanceMonitoringMiddleware,
+    ErrorHandlerMiddleware,
+    SecurityHeadersMiddleware,
+]
+
+
+def http_scope(path="/stream"):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+
+
+async def receive():
+    return {"type": "http.disconnect"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("middleware_class", MIDDLEWARES)
+async def test_streaming_chunks_are_forwarded_without_buffering(middleware_class):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"first", "more_body": True})
+        # 2つ目を送る前に1つ目がクライアント側へ届いている
+        assert sent[-1]["body"] == b"first"
+        await send({"type": "http.response.body", "body": b"second"})
+
+    await middleware_class(app)(http_scope(), receive, send)
+
+    assert [m.get("body") for m in sent[1:]] == [b"first", b"second"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("middleware_class", MIDDLEWARES)
+async def test_non_http_scopes_pass_through(middleware_class):
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(scope["type"])
+
+    await middleware_class(app)({"type": "websocket"}, receive, None)
+
+    assert seen == ["websocket"]
+
+
+def build_client(handler):
+    app = Starlette(routes=[Route("/health", handler)])
+    for middleware_class in MIDDLEWARES:
+        app.add_middleware(middleware_class)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_headers_are_added_on_response_start():
+    async def health(request):
+        return JSONResponse({"status": "healthy"})
+
+    async with build_client(health) as client:
+        response = await client.get("/health")
+
+    assert response.status_code == 200
+    assert len(response.headers["x-request-id"]) == 8
+    assert response.headers["x-response-time"].endswith("ms")
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+@pytest.mark.asyncio
+async def test_unhandled_errors_become_json_500():
+    async def broken(request):
+        raise RuntimeError("boom")
+
+    async def database_down(request):
+        raise OperationalError("SELECT 1", {}, Exception("down"))
+
+    async with build_client(broken) as client:
+        response = await client.get("/health")
+    assert response.status_code == 500
+    assert response.json()["error_code"] == "INTERNAL_SERVER_ERROR"
+
+    async with build_client(database_down) as client:
+        response = await client.get("/health")
+    assert response.status_code == 500
+    assert response.json()["error_code"] == "DATABASE_ERROR"
@@ -0,0 +1,231 @@
+import io
+import struct
+import wave
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.audio_preprocessing import (
+    _G711_TABLES,
+    prepare_audio,
+    probe_audio,
+    resample,
+    speech_bounds,
+)
+from app.services.speech_service import SpeechToTextService
+
+
+def make_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """(フレーム数, チャンネル数) の float 配列から16bit PCMのWAVを作成"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(samples.shape[1])
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def make_g711_wav(samples: np.ndarray, sample_rate: int, codec: str) -> bytes:
+    """モノラルの float 配列から A-law(6) / µ-law(7) のWAVを作成（最も近い符号を選ぶ）"""
+    table = _G711_TABLES[codec]
+    codes = np.abs(samples[:, None] - table[None, :]).argmin(axis=1).astype(np.uint8)
+    tag = {"alaw": 6, "mulaw": 7}[codec]
+    fmt = struct.pack("<HHIIHH", tag, 1, sample_rate, sample_rate, 1, 8)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    body += b"data" + struct.pack("<I", codes.size) + codes.tobytes()
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def tone(seconds: float, sample_rate: int, frequency: float = 440.0) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return 0.5 * np.sin(2 * np.pi * frequency * t)
+
+
+def opus_head(channels: int, input_rate: int) -> bytes:
+    return b"OpusHead" + struct.pack("<BBHIhB", 1, channels, 312, input_rate, 0, 0)
+
+
+def test_probe_reads_wav_header_not_extension():
+    data = make_wav(np.zeros((4410, 2)), 44100)
+
+    probe = probe_audio(data)
+
+    assert (probe.container, probe.codec) == ("wav", "pcm_s16le")
+    assert (probe.sample_rate, probe.channels, probe.bits_per_sample) == (44100, 2, 16)
+    assert probe.data_offset == 44
+    assert probe.data_size == 4410 * 4
+
+
+def test_probe_compressed_headers():
+    streaminfo = (
+        b"\x00" * 10
+        + struct.pack(">Q", (44100 << 44) | ((2 - 1) << 41) | ((16 - 1) << 36))
+        + b"\x00" * 16
+    )
+    flac = b"fLaC" + b"\x80\x00\x00\x22" + streaminfo
+    ogg = b"OggS" + b"\x00" * 22 + b"\x01" + b"\x13" + opus_head(1, 16000)
+    webm = b"\x1a\x45\xdf\xa3" + b"\x00" * 32 + b"\x86\x86A_OPUS\x63\xa2\x93" + opus_head(2, 44100)
+    mp3 = b"ID3\x03\x00\x00\x00\x00\x00\x02" + b"\x00\x00" + b"\xff\xfb\x94\xc4" + b"\x00" * 8
+
+    assert _summary(probe_audio(flac)) == ("flac", "flac", 44100, 2)
+    assert _summary(probe_audio(ogg)) == ("ogg", "opus", 16000, 1)
+    # Opusの入力レートが指定不可の値なら48kHz
+    assert _summary(probe_audio(webm)) == ("webm", "opus", 48000, 2)
+    assert _summary(probe_audio(mp3)) == ("mp3", "mp3", 48000, 1)
+    assert probe_audio(b"\x00" * 200).container == "unknown"
+
+
+def _summary(probe):
+    return probe.container, probe.codec, probe.sample_rate, probe.channels
+
+
+def test_resample_keeps_duration_and_frequency():
+    signal = tone(1.0, 48000, frequency=1000).astype(np.float32)
+
+    resampled = resample(signal, 48000, 16000)
+
+    assert resampled.size == 16000
+    spectrum = np.abs(np.fft.rfft(resampled))
+    assert np.argmax(spectrum) == 1000
+
+
+def test_resample_filters_content_above_target_nyquist():
+    signal = tone(1.0, 48000, frequency=12000).astype(np.float32)
+
+    resampled = resample(signal, 48000, 16000)
+
+    # 12kHzは16kHzでは折り返して4kHzに現れるため、ローパスで除去されていること
+    assert np.sqrt(np.mean(resampled**2)) < 0.05
+
+
+def test_speech_bounds_trims_leading_and_trailing_silence():
+    rate = 16000
+    signal = np.concatenate([np.zeros(rate), tone(0.5, rate), np.zeros(rate)]).astype(np.float32)
+
+    start, end = speech_bounds(signal, rate, padding_ms=100)
+
+    assert start == pytest.approx(rate - 1600, abs=320)
+    assert end == pytest.approx(rate + 8000 + 1600, abs=320)
+    assert speech_bounds(np.zeros(rate, dtype=np.float32), rate) == (0, 0)
+
+
+def test_prepare_wav_downmixes_resamples_and_trims():
+    rate = 44100
+    speech = tone(0.5, rate)
+    silence = np.zeros(rate)
+    left = np.concatenate([silence, speech, silence])
+    data = make_wav(np.stack([left, left], axis=1), rate)
+
+    prepared = prepare_audio(data)
+
+    assert (prepared.encoding, prepared.sample_rate, prepared.channels) == ("LINEAR16", 16000, 1)
+    assert prepared.duration_seconds == pytest.approx(2.5, abs=0.01)
+    assert prepared.trimmed_seconds == pytest.approx(1.6, abs=0.05)
+    # ステレオ44.1kHz 2.5秒 -> モノラル16kHz 約0.9秒
+    assert len(prepared.content) < len(data) / 10
+
+
+def test_g711_tables_match_the_standard():
+    mulaw, alaw = _G711_TABLES["mulaw"] * 32768, _G711_TABLES["alaw"] * 32768
+
+    assert [mulaw[code] for code in (0x00, 0x80, 0xFF)] == [-32124, 32124, 0]
+    assert [alaw[code] for code in (0x2A, 0xAA, 0x55, 0xD5)] == [-32256, 32256, -8, 8]
+
+
+@pytest.mark.parametrize("codec", ["mulaw", "alaw"])
+def test_prepare_g711_wav_decodes_to_linear16(codec):
+    rate = 8000
+    signal = np.concatenate([np.zeros(rate), tone(0.5, rate), np.zeros(rate)])
+    data = make_g711_wav(signal, rate, codec)
+
+    prepared = prepare_audio(data)
+
+    assert (prepared.probe.codec, prepared.probe.sample_rate) == (codec, rate)
+    assert (prepared.encoding, prepared.sample_rate, prepared.channels) == ("LINEAR16", 16000, 1)
+    assert prepared.trimmed_seconds == pytest.approx(1.6, abs=0.05)
+    decoded = np.frombuffer(prepared.content, dtype="<i2") / 32768
+    assert np.abs(decoded).max() == pytest.approx(0.5, abs=0.05)
+
+
+def test_prepare_passes_compressed_audio_through():
+    data = b"OggS" + b"\x00" * 22 + b"\x01" + b"\x13" + opus_head(1, 48000) + b"\x00" * 200
+    view = memoryview(data)
+
+    prepared = prepare_audio(view)
+
+    assert prepared.content is view
+    assert (prepared.encoding, prepared.sample_rate) == ("OGG_OPUS", 48000)
+
+
+class RecordingAsyncClient:
+    def __init__(self):
+        self.calls = []
+
+    async def recognize(self, config, audio, timeout):
+        self.calls.append((config, audio))
+        alternative = SimpleNamespace(transcript="こんにちは", confidence=0.9)
+        return SimpleNamespace(results=[SimpleNamespace(alternatives=[alternative])])
+
+
+@pytest.fixture
+def async_client():
+    return RecordingAsyncClient()
+
+
+@pytest.fixture
+def service(async_client):
+    return SpeechToTextService(async_client=async_client)
+
+
+@pytest.mark.asyncio
+async def test_wav_is_sent_as_mono_16k_linear16(service, async_client):
+    rate = 48000
+    left = np.concatenate([np.zeros(rate), tone(0.5, rate), np.zeros(rate)])
+    data = make_wav(np.stack([left, left], axis=1), rate)
+
+    result = await service.transcribe_audio(memoryview(data), "webm")
+
+    assert result["success"] is True
+    config, audio = async_client.calls[0]
+    assert config.encoding.name == "LINEAR16"
+    assert config.sample_rate_hertz == 16000
+    assert config.audio_channel_count == 1
+    assert len(audio.content) < len(data) / 10
+
+
+@pytest.mark.asyncio
+async def test_silent_wav_is_not_sent(service, async_client):
+    data = make_wav(np.zeros((16000, 1)), 16000)
+
+    result = await service.transcribe_audio(data, "wav")
+
+    assert result == {
+        "success": False,
+        "text": "",
+        "confidence": 0.0,
+        "error": "Could not recognize speech",
+    }
+    assert async_client.calls == []
+
+
+@pytest.mark.asyncio
+async def test_probed_sample_rate_overrides_extension(service, async_client):
+    data = b"ID3\x03\x00\x00\x00\x00\x00\x00" + b"\xff\xfb\x90\x44" + b"\x00" * 200
+
+    await service.transcribe_audio(data, "mp3")
+
+    config, _ = async_client.calls[0]
+    assert config.encoding.name == "MP3"
+    assert config.sample_rate_hertz == 44100
+
+
+@pytest.mark.asyncio
+async def test_unknown_format_falls_back_to_extension(service, async_client):
+    await service.transcribe_audio(b"\x00" * 200, "webm")
+
+    config, _ = async_client.calls[0]
+    assert config.encoding.name == "WEBM_OPUS"
+    assert config.sample_rate_hertz == 48000
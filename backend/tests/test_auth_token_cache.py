@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+from app.core.cache import SimpleMemoryCache
+from app.utils import auth as auth_utils
+
+
+@pytest.fixture
+def verify_calls(monkeypatch):
+    calls = []
+
+    def fake_verify(token):
+        calls.append(token)
+        exp_offset = -10 if token == "expired" else 3600
+        return {"uid": f"uid-{token}", "exp": time.time() + exp_offset}
+
+    monkeypatch.setattr(auth_utils.token_verifier, "verify", fake_verify)
+    monkeypatch.setattr(auth_utils, "_verified_token_cache", SimpleMemoryCache(max_size=2))
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_repeat_verification_is_served_from_cache(verify_calls):
+    first = await auth_utils._verify_id_token_cached("token-a")
+    second = await auth_utils._verify_id_token_cached("token-a")
+
+    assert first["uid"] == second["uid"] == "uid-token-a"
+    assert verify_calls == ["token-a"]
+
+
+@pytest.mark.asyncio
+async def test_expired_tokens_are_not_cached(verify_calls):
+    await auth_utils._verify_id_token_cached("expired")
+    await auth_utils._verify_id_token_cached("expired")
+
+    assert verify_calls == ["expired", "expired"]
+
+
+@pytest.mark.asyncio
+async def test_cache_is_lru_bounded(verify_calls):
+    for token in ["a", "b", "c", "a"]:
+        await auth_utils._verify_id_token_cached(token)
+
+    assert verify_calls == ["a", "b", "c", "a"]
@@ -0,0 +1,85 @@
+import uuid
+
+import fakeredis
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import MemoryCacheBackend, RedisCacheBackend, cached
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "redis":
+        return RedisCacheBackend(client=fakeredis.FakeAsyncRedis())
+    return MemoryCacheBackend(max_size=100)
+
+
+@pytest.mark.asyncio
+async def test_set_get_and_mget_round_trip(backend):
+    child_id = uuid.uuid4()
+    await backend.set("a", {"child_id": child_id, "count": 1}, ttl=60)
+    await backend.set("b", [1, 2, 3], ttl=60)
+
+    assert await backend.get("a") == {"child_id": str(child_id), "count": 1}
+    assert await backend.mget(["a", "missing", "b"]) == [
+        {"child_id": str(child_id), "count": 1},
+        None,
+        [1, 2, 3],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_namespaces_isolate_keys(backend):
+    children = backend.namespace("children")
+    history = backend.namespace("history")
+
+    await children.set("user-1", ["child"], ttl=60)
+
+    assert await children.get("user-1") == ["child"]
+    assert await history.get("user-1") is None
+
+    await children.delete("user-1")
+    assert await children.get("user-1") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_prefixes_keys_and_sets_ttl():
+    client = fakeredis.FakeAsyncRedis()
+    backend = RedisCacheBackend(client=client)
+
+    await backend.namespace("children").set("user-1", {"ok": True}, ttl=30)
+
+    key = "bud:cache:children:user-1"
+    assert await client.exists(key)
+    assert 0 < await client.ttl(key) <= 30
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_are_treated_as_misses():
+    class BrokenRedis:
+        async def get(self, key):
+            raise ConnectionError("down")
+
+        async def set(self, *args, **kwargs):
+            raise ConnectionError("down")
+
+    backend = RedisCacheBackend(client=BrokenRedis())
+
+    await backend.set("a", 1)
+    assert await backend.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_cached_decorator_uses_shared_backend_for_coroutines(monkeypatch):
+    shared = RedisCacheBackend(client=fakeredis.FakeAsyncRedis())
+    monkeypatch.setattr(cache_module, "cache_backend", shared)
+    calls = []
+
+    @cached(ttl=60, key_prefix="children")
+    async def load_children(user_id):
+        calls.append(user_id)
+        return [{"user_id": user_id}]
+
+    assert await load_children("u1") == [{"user_id": "u1"}]
+    assert await load_children("u1") == [{"user_id": "u1"}]
+    assert calls == ["u1"]
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import MemoryCacheBackend, _needs_refresh, cached
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module, "time", fake)
+    monkeypatch.setattr(cache_module, "cache_backend", MemoryCacheBackend(max_size=100))
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_compute_once(clock):
+    calls = []
+
+    @cached(ttl=60, early_expiry_beta=0)
+    async def load(user_id):
+        calls.append(user_id)
+        await asyncio.sleep(0.01)
+        return {"user_id": user_id}
+
+    results = await asyncio.gather(*(load("u1") for _ in range(10)))
+
+    assert calls == ["u1"]
+    assert all(result == {"user_id": "u1"} for result in results)
+
+
+@pytest.mark.asyncio
+async def test_none_results_are_cached_negatively(clock):
+    calls = []
+
+    @cached(ttl=60, negative_ttl=10, early_expiry_beta=0)
+    async def find(key):
+        calls.append(key)
+        return None
+
+    assert await find("missing") is None
+    assert await find("missing") is None
+    assert calls == ["missing"]
+
+    clock.now += 11
+    assert await find("missing") is None
+    assert calls == ["missing", "missing"]
+
+
+@pytest.mark.asyncio
+async def test_negative_ttl_zero_disables_negative_caching(clock):
+    calls = []
+
+    @cached(ttl=60, negative_ttl=0)
+    async def find(key):
+        calls.append(key)
+        return None
+
+    await find("missing")
+    await find("missing")
+
+    assert calls == ["missing", "missing"]
+
+
+@pytest.mark.asyncio
+async def test_stale_value_is_served_while_refreshing_in_background(clock):
+    versions = iter(["v1", "v2"])
+
+    @cached(ttl=10, stale_ttl=60, early_expiry_beta=0)
+    async def load():
+        return next(versions)
+
+    assert await load() == "v1"
+
+    clock.now += 15
+    assert await load() == "v1"
+
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert await load() == "v2"
+
+
+@pytest.mark.asyncio
+async def test_expired_beyond_stale_window_recomputes(clock):
+    versions = iter(["v1", "v2"])
+
+    @cached(ttl=10, stale_ttl=5, early_expiry_beta=0)
+    async def load():
+        return next(versions)
+
+    await load()
+    clock.now += 16
+
+    assert await load() == "v2"
+
+
+@pytest.mark.asyncio
+async def test_invalidate_removes_entry(clock):
+    calls = []
+
+    @cached(ttl=60, key_prefix="children", key_func=lambda user_id: user_id)
+    async def load(user_id):
+        calls.append(user_id)
+        return [user_id]
+
+    await load("u1")
+    await load.invalidate("u1")
+    await load("u1")
+
+    assert calls == ["u1", "u1"]
+
+
+def test_probabilistic_early_expiry(monkeypatch):
+    envelope = {"e": 100.0, "d": 10.0}
+
+    monkeypatch.setattr(cache_module.random, "random", lambda: 0.0)
+    assert _needs_refresh(envelope, beta=1.0, now=95.0) is False
+
+    monkeypatch.setattr(cache_module.random, "random", lambda: 0.9)
+    assert _needs_refresh(envelope, beta=1.0, now=95.0) is True
+
+    assert _needs_refresh(envelope, beta=0, now=100.0) is True
+
+
+def test_sync_functions_cache_none_results(monkeypatch):
+    monkeypatch.setattr(cache_module, "_cache", cache_module.SimpleMemoryCache(max_size=10))
+    calls = []
+
+    @cached(ttl=60)
+    def find(key):
+        calls.append(key)
+        return None
+
+    assert find("a") is None
+    assert find("a") is None
+    assert calls == ["a"]
@@ -0,0 +1,73 @@
+import uuid
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+
+from app.models.challenge import Challenge
+from app.repositories.challenge_repository import ChallengeRepository
+
+
+class FakeResult:
+    def __init__(self, row):
+        self._row = row
+
+    def first(self):
+        return self._row
+
+
+class RecordingSession:
+    def __init__(self, row=None):
+        self.row = row
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return FakeResult(self.row)
+
+
+@pytest.mark.asyncio
+async def test_owner_checked_fetch_is_a_single_projected_join():
+    db = RecordingSession()
+
+    await ChallengeRepository(db).get_with_owner_check(uuid.uuid4(), uuid.uuid4())
+
+    assert len(db.statements) == 1
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    select_list = sql.split("FROM")[0]
+    assert "JOIN children ON children.id = challenges.child_id" in sql
+    assert "owned" in select_list
+    # 詳細表示に不要なカラムやリレーション先の全カラムは取得しない
+    assert "children.nickname" not in select_list
+    assert "challenges.*" not in select_list
+
+
+@pytest.mark.asyncio
+async def test_missing_challenge_returns_none():
+    db = RecordingSession(row=None)
+
+    assert await ChallengeRepository(db).get_with_owner_check(uuid.uuid4(), uuid.uuid4()) is None
+
+
+@pytest.mark.asyncio
+async def test_history_version_aggregates_without_reading_rows():
+    db = RecordingSession()
+
+    await ChallengeRepository(db).history_version(uuid.uuid4(), uuid.uuid4())
+
+    assert len(db.statements) == 1
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    select_list = sql.split("FROM")[0]
+    assert "count(challenges.id)" in select_list
+    assert "max(challenges.updated_at)" in select_list
+    # 本文カラムは集計以外では取得しない
+    assert "challenges.transcript" not in select_list
+    assert "children.user_id" in sql
+    assert "GROUP BY children.id" in sql
+
+
+def test_feedback_update_bumps_updated_at():
+    stmt = update(Challenge).where(Challenge.id == uuid.uuid4()).values(ai_feedback="new")
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert "updated_at=now()" in sql
@@ -0,0 +1,160 @@
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.routers import children as children_router
+from app.api.routers import voice as voice_router
+from app.core.database import get_async_db
+from app.repositories.challenge_repository import ChallengeRepository
+from app.utils.principal import Principal, get_current_principal, get_or_create_principal
+
+PRINCIPAL = Principal(user_id=uuid.uuid4(), firebase_uid="u1", email="u1@example.com", name="u1")
+CHILD_ID = uuid.uuid4()
+CREATED_AT = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+    version = SimpleNamespace(count=3, last_updated_at=CREATED_AT)
+    rows = [
+        SimpleNamespace(
+            id=CHILD_ID,
+            nickname="taro",
+            birthdate=None,
+            user_id=PRINCIPAL.user_id,
+            created_at=CREATED_AT,
+            updated_at=None,
+        )
+    ]
+
+    async def load_children(user_id):
+        """本文とETagを同じ行から作る（実装と同じ組み立て）"""
+        calls.append("children")
+        return {
+            "etag": children_router.children_etag(user_id, rows),
+            "children": [
+                {
+                    "id": str(row.id),
+                    "nickname": row.nickname,
+                    "birthdate": None,
+                    "user_id": str(row.user_id),
+                    "created_at": row.created_at.isoformat(),
+                }
+                for row in rows
+            ],
+        }
+
+    async def history_version(self, child_id, user_id):
+        return version if child_id == CHILD_ID else None
+
+    async def list_history(self, child_id, limit, after=None):
+        calls.append("history")
+        row = SimpleNamespace(
+            id=uuid.uuid4(), transcript="hi", ai_feedback="ok", created_at=CREATED_AT
+        )
+        return [row], False
+
+    monkeypatch.setattr(children_router, "load_children", load_children)
+    monkeypatch.setattr(ChallengeRepository, "history_version", history_version)
+    monkeypatch.setattr(ChallengeRepository, "list_history", list_history)
+    return SimpleNamespace(calls=calls, version=version, rows=rows)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(children_router.router, prefix="/api/children")
+    app.include_router(voice_router.router)
+
+    async def override_db():
+        yield None
+
+    app.dependency_overrides[get_async_db] = override_db
+    app.dependency_overrides[get_current_principal] = lambda: PRINCIPAL
+    app.dependency_overrides[get_or_create_principal] = lambda: PRINCIPAL
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_children_unchanged_returns_304(client, loads):
+    first = await client.get("/api/children/")
+    etag = first.headers["etag"]
+
+    response = await client.get("/api/children/", headers={"If-None-Match": etag})
+
+    assert etag.startswith('W/"')
+    assert first.json()[0]["nickname"] == "taro"
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_children_etag_changes_with_count_or_update(client, loads):
+    etag = (await client.get("/api/children/")).headers["etag"]
+
+    loads.rows[0].updated_at = datetime(2026, 10, 2, tzinfo=timezone.utc)
+    updated = await client.get("/api/children/", headers={"If-None-Match": etag})
+    loads.rows.append(SimpleNamespace(**{**vars(loads.rows[0]), "id": uuid.uuid4()}))
+    added = await client.get("/api/children/", headers={"If-None-Match": updated.headers["etag"]})
+
+    assert updated.status_code == 200
+    assert updated.headers["etag"] != etag
+    assert added.status_code == 200
+    assert len(added.json()) == 2
+
+
+def test_children_etag_is_derived_from_returned_rows():
+    rows = [
+        SimpleNamespace(created_at=CREATED_AT, updated_at=None),
+        SimpleNamespace(
+            created_at=CREATED_AT, updated_at=datetime(2026, 10, 3, tzinfo=timezone.utc)
+        ),
+    ]
+
+    etag = children_router.children_etag(PRINCIPAL.user_id, rows)
+
+    assert etag == children_router.children_etag(PRINCIPAL.user_id, list(rows))
+    assert etag != children_router.children_etag(PRINCIPAL.user_id, rows[:1])
+    assert children_router.children_etag(PRINCIPAL.user_id, []).startswith('W/"')
+
+
+@pytest.mark.asyncio
+async def test_history_unchanged_returns_304_without_loading_rows(client, loads):
+    url = f"/api/voice/history/{CHILD_ID}"
+    first = await client.get(url)
+    etag = first.headers["etag"]
+
+    response = await client.get(url, headers={"If-None-Match": etag})
+
+    assert first.json()["transcripts"][0]["transcript"] == "hi"
+    assert response.status_code == 304
+    assert loads.calls == ["history"]
+
+
+@pytest.mark.asyncio
+async def test_history_etag_tracks_updates_and_page(client, loads):
+    url = f"/api/voice/history/{CHILD_ID}"
+    etag = (await client.get(url)).headers["etag"]
+
+    other_page = await client.get(f"{url}?limit=5", headers={"If-None-Match": etag})
+    # フィードバックの再生成は件数を変えず updated_at だけを進める
+    loads.version.last_updated_at = datetime(2026, 10, 2, tzinfo=timezone.utc)
+    regenerated = await client.get(url, headers={"If-None-Match": etag})
+
+    assert other_page.status_code == 200
+    assert regenerated.status_code == 200
+    assert regenerated.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_history_of_other_users_child_is_forbidden(client, loads):
+    response = await client.get(f"/api/voice/history/{uuid.uuid4()}")
+
+    assert response.status_code == 403
+    assert loads.calls == []
@@ -0,0 +1,148 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.service_registry import service_registry
+from app.services import feedback_batch_service
+from app.services.ai_feedback_service import AIFeedbackService
+from app.services.feedback_batch_service import FeedbackBatchProcessor
+from app.services.feedback_cache import FeedbackCache
+
+
+class FakeSession:
+    open_count = 0
+
+    async def __aenter__(self):
+        FakeSession.open_count += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        FakeSession.open_count -= 1
+        return False
+
+
+class SlowAIService:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.sessions_open_during_generation = 0
+
+    async def generate_feedback(self, transcript, child_age=None, fallback=True):
+        self.sessions_open_during_generation += FakeSession.open_count
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.001)
+        self.active -= 1
+        if transcript == "broken":
+            raise RuntimeError("api error")
+        return f"ok:{transcript}"
+
+
+class InMemoryProcessor(FeedbackBatchProcessor):
+    def __init__(self, rows, **kwargs):
+        super().__init__(session_factory=FakeSession, **kwargs)
+        self.rows = sorted(rows, key=lambda row: row.id)
+        self.written = []
+
+    async def _fetch_page(self, session, cursor):
+        remaining = [row for row in self.rows if cursor is None or str(row.id) > cursor]
+        return remaining[: self.page_size]
+
+    async def _write_page(self, session, updates):
+        self.written.append(updates)
+
+
+def _rows(count, broken=()):
+    return [
+        SimpleNamespace(
+            id=uuid.UUID(int=index + 1),
+            transcript="broken" if index in broken else f"phrase {index}",
+            birthdate=None,
+            firebase_uid=f"parent-{index % 2}",
+        )
+        for index in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_processes_pages_with_bounded_concurrency_and_per_page_writes():
+    ai_service = SlowAIService()
+    processor = InMemoryProcessor(
+        _rows(25, broken={3}), ai_service=ai_service, page_size=10, max_concurrency=4
+    )
+
+    progress = await processor.run()
+
+    assert progress.finished
+    assert [len(page) for page in processor.written] == [9, 10, 5]
+    assert (progress.processed, progress.success, progress.errors) == (25, 24, 1)
+    assert ai_service.peak == 4
+
+
+@pytest.mark.asyncio
+async def test_resumes_from_cursor_after_max_pages():
+    processor = InMemoryProcessor(_rows(25), ai_service=SlowAIService(), page_size=10)
+
+    first = await processor.run(max_pages=1)
+    report = first.report()
+    assert not first.finished and report["next_cursor"] == str(uuid.UUID(int=10))
+
+    second = await processor.run(start_after=report["next_cursor"])
+    assert second.finished
+    assert second.processed == 15
+
+
+@pytest.mark.asyncio
+async def test_no_session_is_held_while_feedback_is_generated():
+    ai_service = SlowAIService()
+    processor = InMemoryProcessor(_rows(15), ai_service=ai_service, page_size=10)
+
+    await processor.run()
+
+    assert ai_service.sessions_open_during_generation == 0
+    assert FakeSession.open_count == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_generation_is_counted_and_left_unanalyzed():
+    class FailingPool:
+        async def chat_completion(self, **kwargs):
+            raise RuntimeError("rate limited")
+
+    ai_service = AIFeedbackService(client_pool=FailingPool(), cache=FeedbackCache())
+    processor = InMemoryProcessor(_rows(3), ai_service=ai_service, page_size=10)
+
+    progress = await processor.run()
+
+    # フォールバック文は保存されず、行は ai_feedback IS NULL のまま残る
+    assert processor.written == [[]]
+    assert (progress.processed, progress.success, progress.errors) == (3, 0, 3)
+
+
+@pytest.mark.asyncio
+async def test_owners_of_saved_rows_have_their_responses_invalidated(monkeypatch):
+    invalidated = []
+
+    async def invalidate(user_key):
+        invalidated.append(user_key)
+
+    monkeypatch.setattr(feedback_batch_service, "invalidate_user_responses", invalidate)
+    # parent-1 の行（index 1）は生成に失敗するため無効化しない
+    processor = InMemoryProcessor(_rows(3, broken={1}), ai_service=SlowAIService())
+
+    await processor.run()
+
+    assert invalidated == ["parent-0"]
+
+
+@pytest.mark.asyncio
+async def test_processor_uses_the_registry_ai_service(monkeypatch):
+    shared = SlowAIService()
+    monkeypatch.setitem(service_registry._instances, "ai_feedback", shared)
+    processor = InMemoryProcessor(_rows(1))
+
+    await processor.run()
+
+    assert processor.ai_service is shared
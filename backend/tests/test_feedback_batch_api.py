@@ -0,0 +1,211 @@
+import io
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+from openai import AsyncOpenAI
+
+from app.services import feedback_batch_api_service
+from app.services.ai_feedback_service import AIFeedbackService
+from app.services.feedback_batch_api_service import FeedbackBatchAPIService, parse_batch_output
+
+
+class BatchAPIStandIn(BaseHTTPRequestHandler):
+    """OpenAI Files/Batches APIのローカル代替サーバー"""
+
+    state = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _batch(self):
+        polls = self.state["polls"]
+        status = "completed" if polls >= 2 else "in_progress"
+        return {
+            "id": "batch_test",
+            "object": "batch",
+            "endpoint": "/v1/chat/completions",
+            "input_file_id": "file-input",
+            "completion_window": "24h",
+            "created_at": 0,
+            "status": status,
+            "output_file_id": "file-output" if status == "completed" else None,
+            "request_counts": {
+                "total": len(self.state["requests"]),
+                "completed": len(self.state["requests"]) if status == "completed" else 0,
+                "failed": 0,
+            },
+        }
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/v1/files":
+            self.state["requests"] = [
+                json.loads(line) for line in body.splitlines() if line.startswith(b'{"custom_id"')
+            ]
+            self._send_json(
+                {
+                    "id": "file-input",
+                    "object": "file",
+                    "bytes": len(body),
+                    "created_at": 0,
+                    "filename": "feedback_batch.jsonl",
+                    "purpose": "batch",
+                    "status": "processed",
+                }
+            )
+        elif self.path == "/v1/batches":
+            self.state["batch_request"] = json.loads(body)
+            self._send_json(self._batch())
+        else:
+            self._send_json({"error": {"message": "not found"}}, status=404)
+
+    def do_GET(self):
+        if self.path == "/v1/batches/batch_test":
+            self.state["polls"] += 1
+            self._send_json(self._batch())
+        elif self.path == "/v1/files/file-output/content":
+            lines = []
+            for index, request in enumerate(self.state["requests"]):
+                ok = index != 1
+                lines.append(
+                    json.dumps(
+                        {
+                            "id": f"req_{index}",
+                            "custom_id": request["custom_id"],
+                            "response": {
+                                "status_code": 200 if ok else 429,
+                                "body": {
+                                    "choices": [{"message": {"content": f" feedback {index} "}}]
+                                },
+                            },
+                            "error": None,
+                        }
+                    )
+                )
+            body = "\n".join(lines).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json({"error": {"message": "not found"}}, status=404)
+
+
+@pytest.fixture
+def stand_in_server():
+    BatchAPIStandIn.state = {"requests": [], "polls": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BatchAPIStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_submit_poll_and_fetch_results_against_stand_in(stand_in_server):
+    client = AsyncOpenAI(api_key="test", base_url=stand_in_server, max_retries=0)
+    service = FeedbackBatchAPIService(client=client, ai_service=AIFeedbackService())
+    challenge_ids = [uuid.uuid4() for _ in range(3)]
+
+    batch_file = io.BytesIO()
+    for challenge_id in challenge_ids:
+        batch_file.write(service.build_request_line(challenge_id, "Hello!", 7).encode() + b"\n")
+    batch_file.seek(0)
+
+    batch = await service.submit(batch_file, len(challenge_ids))
+    assert batch.status == "in_progress"
+
+    request = BatchAPIStandIn.state["requests"][0]
+    assert request["url"] == "/v1/chat/completions"
+    assert request["body"]["model"] == "gpt-4o-mini"
+    assert BatchAPIStandIn.state["batch_request"]["endpoint"] == "/v1/chat/completions"
+
+    batch = await service.wait_for_completion(batch.id, poll_interval=0, timeout=5)
+    assert batch.status == "completed"
+
+    updates, errors = await service.fetch_results(batch)
+    assert [update["id"] for update in updates] == [challenge_ids[0], challenge_ids[2]]
+    assert updates[0]["ai_feedback"] == "feedback 0"
+    assert [error["custom_id"] for error in errors] == [str(challenge_ids[1])]
+
+    await client.close()
+
+
+def test_parse_batch_output_reports_malformed_lines():
+    updates, errors = parse_batch_output(
+        [
+            json.dumps({"custom_id": "not-a-uuid", "response": {"status_code": 200, "body": {}}}),
+            "",
+            json.dumps({"custom_id": str(uuid.uuid4()), "error": {"code": "expired"}}),
+        ]
+    )
+
+    assert updates == []
+    assert len(errors) == 2
+
+
+class RecordingSession:
+    def __init__(self, owner_uids):
+        self.owner_uids = owner_uids
+        self.updates = []
+        self.selects = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params=None):
+        if params is not None:
+            self.updates.append(params)
+            return None
+        self.selects.append(stmt)
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.owner_uids))
+
+    async def commit(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_ingest_bumps_updated_at_and_invalidates_owners(monkeypatch):
+    session = RecordingSession(["parent-1", "parent-2"])
+    service = FeedbackBatchAPIService(
+        ai_service=AIFeedbackService(), session_factory=lambda: session
+    )
+    challenge_ids = [uuid.uuid4(), uuid.uuid4()]
+    invalidated = []
+
+    async def get_batch(batch_id):
+        return SimpleNamespace(status="completed")
+
+    async def fetch_results(batch):
+        return [{"id": challenge_id, "ai_feedback": "ok"} for challenge_id in challenge_ids], []
+
+    async def invalidate(user_key):
+        invalidated.append(user_key)
+
+    monkeypatch.setattr(service, "get_batch", get_batch)
+    monkeypatch.setattr(service, "fetch_results", fetch_results)
+    monkeypatch.setattr(feedback_batch_api_service, "invalidate_user_responses", invalidate)
+
+    result = await service.ingest("batch_test")
+
+    assert result["updated_count"] == 2
+    [rows] = session.updates
+    assert all(row["updated_at"] is not None for row in rows)
+    assert len(session.selects) == 1
+    assert sorted(invalidated) == ["parent-1", "parent-2"]
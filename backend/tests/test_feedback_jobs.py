@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from app.constants.config import FEEDBACK_JOB_CONFIG
+from app.core.service_registry import service_registry
+from app.services.feedback_job_service import FeedbackJob, FeedbackWorkerPool, InMemoryJobBackend
+
+
+class FakeAIService:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+
+    async def generate_feedback(
+        self, transcript, child_age=None, feedback_type="english_challenge"
+    ):
+        if self.fail:
+            raise RuntimeError("openai down")
+        return f"feedback:{transcript}:{child_age}"
+
+
+class RecordingPool(FeedbackWorkerPool):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.stored = {}
+
+    async def _store_feedback(self, challenge_id, feedback):
+        self.stored[challenge_id] = feedback
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_fills_feedback():
+    pool = RecordingPool(backend=InMemoryJobBackend(), ai_service=FakeAIService(), worker_count=2)
+    await pool.start()
+    try:
+        await pool.submit(FeedbackJob(challenge_id="c1", transcript="Hello", child_age=7))
+        await pool.submit(FeedbackJob(challenge_id="c2", transcript="Thank you"))
+        await asyncio.wait_for(pool.backend._queue.join(), timeout=1)
+    finally:
+        await pool.stop()
+
+    assert pool.stored == {"c1": "feedback:Hello:7", "c2": "feedback:Thank you:None"}
+    assert pool.stats["processed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_stores_fallback_on_ai_error():
+    pool = RecordingPool(backend=InMemoryJobBackend(), ai_service=FakeAIService(fail=True))
+
+    feedback = await pool.process(FeedbackJob(challenge_id="c1", transcript="Hello"))
+
+    assert "Hello" in feedback
+    assert pool.stored["c1"] == feedback
+
+
+class FlakyStorePool(RecordingPool):
+    def __init__(self, failures, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.store_attempts = 0
+
+    async def _store_feedback(self, challenge_id, feedback):
+        self.store_attempts += 1
+        if self.store_attempts <= self.failures:
+            raise RuntimeError("db down")
+        await super()._store_feedback(challenge_id, feedback)
+
+
+@pytest.mark.asyncio
+async def test_failed_store_is_retried_then_succeeds():
+    pool = FlakyStorePool(failures=1, backend=InMemoryJobBackend(), ai_service=FakeAIService())
+    await pool.start()
+    try:
+        await pool.submit(FeedbackJob(challenge_id="c1", transcript="Hello"))
+        await asyncio.wait_for(pool.backend._queue.join(), timeout=1)
+    finally:
+        await pool.stop()
+
+    assert pool.stored == {"c1": "feedback:Hello:None"}
+    assert (pool.stats["retried"], pool.stats["processed"], pool.stats["failed"]) == (1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_job_is_given_up_after_max_attempts(monkeypatch):
+    monkeypatch.setitem(FEEDBACK_JOB_CONFIG, "MAX_ATTEMPTS", 2)
+    pool = FlakyStorePool(failures=5, backend=InMemoryJobBackend(), ai_service=FakeAIService())
+    await pool.start()
+    try:
+        await pool.submit(FeedbackJob(challenge_id="c1", transcript="Hello"))
+        await asyncio.wait_for(pool.backend._queue.join(), timeout=1)
+    finally:
+        await pool.stop()
+
+    assert pool.store_attempts == 2
+    assert (pool.stats["retried"], pool.stats["failed"]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_job_cancelled_at_shutdown_is_not_acked():
+    class RecordingBackend(InMemoryJobBackend):
+        def __init__(self):
+            super().__init__()
+            self.acked = []
+
+        async def ack(self, job):
+            self.acked.append(job)
+            await super().ack(job)
+
+    class BlockingPool(RecordingPool):
+        async def _store_feedback(self, challenge_id, feedback):
+            self.started.set()
+            await asyncio.Event().wait()
+
+    backend = RecordingBackend()
+    pool = BlockingPool(backend=backend, ai_service=FakeAIService(), worker_count=1)
+    pool.started = asyncio.Event()
+    await pool.start()
+    await pool.submit(FeedbackJob(challenge_id="c1", transcript="Hello"))
+    await asyncio.wait_for(pool.started.wait(), timeout=1)
+
+    await pool.stop()
+
+    # 完了通知しないので、Redisでは処理中リストに残り次回起動時に再投入される
+    assert backend.acked == []
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_uses_the_registry_ai_service(monkeypatch):
+    shared = FakeAIService()
+    monkeypatch.setitem(service_registry._instances, "ai_feedback", shared)
+    pool = RecordingPool(backend=InMemoryJobBackend(), worker_count=1)
+
+    await pool.start()
+    await pool.stop()
+
+    assert pool.ai_service is shared
+
+
+def test_job_json_roundtrip():
+    job = FeedbackJob(challenge_id="c1", transcript="こんにちは", child_age=5)
+    assert FeedbackJob.from_json(job.to_json()) == job
@@ -0,0 +1,152 @@
+import asyncio
+import datetime
+import time
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from jose import jwt
+
+from app.constants.config import SECURITY_CONFIG
+from app.utils.auth import FirebaseTokenVerifier, TokenVerificationError
+
+PROJECT_ID = "test-project"
+
+
+def _generate_key_and_cert():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken.test")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    cert_pem = cert.public_bytes(serialization.Encoding.PEM).decode()
+    return key_pem, cert_pem
+
+
+@pytest.fixture(scope="module")
+def signing_material():
+    return _generate_key_and_cert()
+
+
+@pytest.fixture
+def verifier(signing_material):
+    _, cert_pem = signing_material
+    verifier = FirebaseTokenVerifier(project_id=PROJECT_ID)
+    verifier.load_certificates({"kid-1": cert_pem}, max_age=3600)
+    return verifier
+
+
+def make_token(key_pem, kid="kid-1", **overrides):
+    now = int(time.time())
+    claims = {
+        "aud": PROJECT_ID,
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "sub": "firebase-uid",
+        "iat": now,
+        "auth_time": now,
+        "exp": now + 3600,
+        "email": "parent@example.com",
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, key_pem, algorithm="RS256", headers={"kid": kid})
+
+
+def test_valid_token_returns_claims_with_uid(verifier, signing_material):
+    key_pem, _ = signing_material
+
+    claims = verifier.verify(make_token(key_pem))
+
+    assert claims["uid"] == "firebase-uid"
+    assert claims["email"] == "parent@example.com"
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"exp": int(time.time()) - 3600},
+        {"aud": "other-project"},
+        {"iss": "https://securetoken.google.com/other-project"},
+        {"sub": ""},
+        {"iat": int(time.time()) + 3600},
+    ],
+)
+def test_invalid_claims_are_rejected(verifier, signing_material, overrides):
+    key_pem, _ = signing_material
+
+    with pytest.raises(TokenVerificationError):
+        verifier.verify(make_token(key_pem, **overrides))
+
+
+def test_signature_from_other_key_is_rejected(verifier):
+    other_key_pem, _ = _generate_key_and_cert()
+
+    with pytest.raises(TokenVerificationError):
+        verifier.verify(make_token(other_key_pem))
+
+
+def test_unknown_kid_is_rejected_and_requests_refresh(verifier, signing_material):
+    key_pem, _ = signing_material
+
+    with pytest.raises(TokenVerificationError):
+        verifier.verify(make_token(key_pem, kid="rotated"))
+
+    assert verifier._refresh_requested.is_set()
+
+
+def test_unknown_kid_right_after_refresh_does_not_request_refresh(verifier, signing_material):
+    key_pem, _ = signing_material
+    verifier._last_refresh_at = time.monotonic()
+
+    with pytest.raises(TokenVerificationError):
+        verifier.verify(make_token(key_pem, kid="forged"))
+
+    assert not verifier._refresh_requested.is_set()
+
+
+@pytest.mark.asyncio
+async def test_requested_refreshes_are_spaced_by_min_interval(verifier, monkeypatch):
+    monkeypatch.setitem(SECURITY_CONFIG, "CERTS_ON_DEMAND_REFRESH_INTERVAL", 0.2)
+    fetched = []
+
+    async def refresh():
+        verifier._last_refresh_at = time.monotonic()
+        fetched.append(time.monotonic())
+        return 3600
+
+    monkeypatch.setattr(verifier, "refresh", refresh)
+    loop_task = asyncio.create_task(verifier._refresh_loop())
+    try:
+        for _ in range(5):
+            verifier._refresh_requested.set()
+            await asyncio.sleep(0.02)
+        assert len(fetched) == 1
+
+        await asyncio.sleep(0.25)
+        assert len(fetched) == 2
+        assert fetched[1] - fetched[0] >= 0.2
+    finally:
+        loop_task.cancel()
+        await asyncio.gather(loop_task, return_exceptions=True)
+
+
+def test_verification_fails_until_certificates_are_loaded(signing_material):
+    key_pem, _ = signing_material
+    verifier = FirebaseTokenVerifier(project_id=PROJECT_ID)
+
+    with pytest.raises(TokenVerificationError):
+        verifier.verify(make_token(key_pem))
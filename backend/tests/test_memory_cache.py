@@ -0,0 +1,81 @@
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import SimpleMemoryCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module, "time", fake)
+    return fake
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = SimpleMemoryCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_updating_existing_key_does_not_evict(clock):
+    cache = SimpleMemoryCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.set("a", 10)
+
+    assert cache.get("a") == 10
+    assert cache.get("b") == 2
+
+
+def test_expired_entry_is_removed_on_access(clock):
+    cache = SimpleMemoryCache(max_size=10)
+    cache.set("a", 1, ttl=5)
+
+    clock.now += 6
+
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_periodic_sweep_removes_untouched_expired_entries(clock):
+    cache = SimpleMemoryCache(max_size=10, sweep_interval=30)
+    cache.set("short", 1, ttl=5)
+    cache.set("long", 2, ttl=300)
+
+    clock.now += 31
+    cache.set("new", 3)
+
+    assert cache.stats()["size"] == 2
+    assert cache.get("long") == 2
+
+
+def test_stats_track_hits_and_misses(clock):
+    cache = SimpleMemoryCache(max_size=10)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+
+    stats = cache.stats()
+
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 50.0
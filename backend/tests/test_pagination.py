@@ -0,0 +1,68 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.repositories.challenge_repository import ChallengeRepository
+from app.utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 9, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    row_id = uuid.uuid4()
+
+    cursor = encode_cursor(created_at, row_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "W10", "e30"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class RecordingSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return FakeResult(self.rows)
+
+
+@pytest.mark.asyncio
+async def test_history_page_uses_keyset_predicate_and_detects_next_page():
+    db = RecordingSession(rows=[object()] * 3)
+    after = (datetime(2025, 9, 1, tzinfo=timezone.utc), uuid.uuid4())
+
+    rows, has_more = await ChallengeRepository(db).list_history(uuid.uuid4(), 2, after)
+
+    assert len(rows) == 2
+    assert has_more is True
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert "(challenges.created_at, challenges.id) < (" in sql
+    assert "ORDER BY challenges.created_at DESC, challenges.id DESC" in sql
+    assert "LIMIT" in sql
+    assert "challenges.child_id," not in sql.split("FROM")[0]
+
+
+@pytest.mark.asyncio
+async def test_last_page_has_no_next_page():
+    db = RecordingSession(rows=[object()])
+
+    rows, has_more = await ChallengeRepository(db).list_history(uuid.uuid4(), 2)
+
+    assert len(rows) == 1
+    assert has_more is False
@@ -0,0 +1,102 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.cache import SimpleMemoryCache
+from app.utils import principal as principal_utils
+
+
+class FakeResult:
+    def __init__(self, value):
+        self._value = value
+
+    def scalar_one_or_none(self):
+        return self._value
+
+    def scalar_one(self):
+        return self._value
+
+
+class FakeSession:
+    """Userテーブルの代わりにfirebase_uid→idの辞書を持つセッション"""
+
+    def __init__(self, users=None):
+        self.users = dict(users or {})
+        self.queries = 0
+        self.added = []
+
+    async def execute(self, stmt):
+        self.queries += 1
+        firebase_uid = stmt.whereclause.right.value
+        return FakeResult(self.users.get(firebase_uid))
+
+    def add(self, user):
+        self.added.append(user)
+
+    async def commit(self):
+        for user in self.added:
+            user.id = uuid.uuid4()
+            self.users[user.firebase_uid] = user.id
+        self.added = []
+
+    async def rollback(self):
+        self.added = []
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(principal_utils, "_user_id_cache", SimpleMemoryCache(max_size=10))
+
+
+CURRENT_USER = {"user_id": "uid-1", "email": "parent@example.com", "name": "Parent"}
+
+
+@pytest.mark.asyncio
+async def test_user_id_is_resolved_once_and_cached():
+    user_id = uuid.uuid4()
+    db = FakeSession({"uid-1": user_id})
+
+    first = await principal_utils.get_current_principal(db=db, current_user=CURRENT_USER)
+    second = await principal_utils.get_current_principal(db=db, current_user=CURRENT_USER)
+
+    assert first.user_id == second.user_id == user_id
+    assert first.email == "parent@example.com"
+    assert db.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_user_is_not_cached_and_returns_404():
+    db = FakeSession()
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc_info:
+            await principal_utils.get_current_principal(db=db, current_user=CURRENT_USER)
+        assert exc_info.value.status_code == 404
+
+    assert db.queries == 2
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_creates_user_and_caches_new_id():
+    db = FakeSession()
+
+    created = await principal_utils.get_or_create_principal(db=db, current_user=CURRENT_USER)
+    again = await principal_utils.get_current_principal(db=db, current_user=CURRENT_USER)
+
+    assert created.user_id == db.users["uid-1"] == again.user_id
+    assert db.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_forget_user_id_invalidates_cached_entry():
+    db = FakeSession({"uid-1": uuid.uuid4()})
+    await principal_utils.get_current_principal(db=db, current_user=CURRENT_USER)
+
+    new_id = uuid.uuid4()
+    db.users["uid-1"] = new_id
+    principal_utils.forget_user_id("uid-1")
+
+    resolved = await principal_utils.get_current_principal(db=db, current_user=CURRENT_USER)
+    assert resolved.user_id == new_id
+    assert db.queries == 2
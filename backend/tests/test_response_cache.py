@@ -0,0 +1,146 @@
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from app.core import cache as cache_module
+from app.core.cache import MemoryCacheBackend, SimpleMemoryCache, invalidate_user_responses
+from app.middleware.response_cache import ResponseCacheMiddleware, etag_matches
+from app.utils import auth as auth_utils
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def client(monkeypatch, calls):
+    backend = MemoryCacheBackend(max_size=100)
+    monkeypatch.setattr(cache_module, "cache_backend", backend)
+
+    verified = SimpleMemoryCache(max_size=10)
+    verified.set(auth_utils._token_cache_key("token-u1"), {"uid": "u1"}, 3600)
+    verified.set(auth_utils._token_cache_key("token-u2"), {"uid": "u2"}, 3600)
+    monkeypatch.setattr(auth_utils, "_verified_token_cache", verified)
+
+    async def children(request):
+        calls.append(request.url.path)
+        return JSONResponse([{"nickname": f"child-{len(calls)}"}])
+
+    async def history(request):
+        calls.append(request.url.path)
+        return JSONResponse({"cursor": request.query_params.get("cursor")})
+
+    async def missing(request):
+        calls.append(request.url.path)
+        return JSONResponse({"detail": "not found"}, status_code=404)
+
+    async def health(request):
+        calls.append(request.url.path)
+        return PlainTextResponse("ok")
+
+    app = Starlette(
+        routes=[
+            Route("/api/children/", children),
+            Route("/api/children/missing", missing),
+            Route("/api/voice/history/c1", history),
+            Route("/health", health),
+        ]
+    )
+    transport = httpx.ASGITransport(app=ResponseCacheMiddleware(app))
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+def auth(token="token-u1", **headers):
+    return {"Authorization": f"Bearer {token}", **headers}
+
+
+@pytest.mark.asyncio
+async def test_repeat_get_is_served_from_cache(client, calls):
+    first = await client.get("/api/children/", headers=auth())
+    second = await client.get("/api/children/", headers=auth())
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+    assert second.headers["etag"] == first.headers["etag"]
+    assert calls == ["/api/children/"]
+
+
+@pytest.mark.asyncio
+async def test_if_none_match_returns_304(client, calls):
+    first = await client.get("/api/children/", headers=auth())
+
+    headers = auth(**{"If-None-Match": first.headers["etag"]})
+    response = await client.get("/api/children/", headers=headers)
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_entries_are_per_user_and_per_query(client, calls):
+    await client.get("/api/children/", headers=auth("token-u1"))
+    await client.get("/api/children/", headers=auth("token-u2"))
+    await client.get("/api/voice/history/c1?cursor=a", headers=auth())
+    await client.get("/api/voice/history/c1?cursor=b", headers=auth())
+
+    assert len(calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_generation_bump_invalidates_only_that_user(client, calls):
+    await client.get("/api/children/", headers=auth("token-u1"))
+    await client.get("/api/children/", headers=auth("token-u2"))
+
+    await invalidate_user_responses("u1")
+
+    refreshed = await client.get("/api/children/", headers=auth("token-u1"))
+    cached = await client.get("/api/children/", headers=auth("token-u2"))
+
+    assert refreshed.headers["x-cache"] == "MISS"
+    assert cached.headers["x-cache"] == "HIT"
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_unverified_tokens_errors_and_uncached_paths_bypass(client, calls):
+    await client.get("/api/children/", headers=auth("unknown-token"))
+    await client.get("/api/children/", headers=auth("unknown-token"))
+    await client.get("/api/children/missing", headers=auth())
+    await client.get("/api/children/missing", headers=auth())
+    await client.get("/health", headers=auth())
+    await client.get("/health", headers=auth())
+
+    assert len(calls) == 6
+
+
+def test_etag_matching_uses_weak_comparison():
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', 'W/"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"x"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+@pytest.mark.asyncio
+async def test_upstream_etag_is_kept(monkeypatch):
+    monkeypatch.setattr(cache_module, "cache_backend", MemoryCacheBackend(max_size=10))
+    verified = SimpleMemoryCache(max_size=10)
+    verified.set(auth_utils._token_cache_key("token-u1"), {"uid": "u1"}, 3600)
+    monkeypatch.setattr(auth_utils, "_verified_token_cache", verified)
+
+    async def children(request):
+        return JSONResponse([], headers={"ETag": 'W/"agg"'})
+
+    app = Starlette(routes=[Route("/api/children/", children)])
+    transport = httpx.ASGITransport(app=ResponseCacheMiddleware(app))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/api/children/", headers=auth())
+        second = await client.get("/api/children/", headers=auth(**{"If-None-Match": 'W/"agg"'}))
+
+    assert first.headers["etag"] == 'W/"agg"'
+    assert second.status_code == 304
@@ -0,0 +1,148 @@
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.core.service_registry import ServiceRegistry
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class Closable:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def test_service_is_built_once_on_first_use():
+    calls = []
+    registry = ServiceRegistry()
+    registry.register("svc", lambda: calls.append(1) or object())
+
+    assert calls == []
+    first = registry.get("svc")
+    assert registry.get("svc") is first
+    assert calls == [1]
+    assert registry.status()["svc"]["ready"] is True
+
+
+def test_concurrent_first_use_builds_once():
+    calls = []
+
+    def slow_factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    registry = ServiceRegistry()
+    registry.register("svc", slow_factory)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(registry.get("svc"))) for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert len({id(result) for result in results}) == 1
+
+
+def test_failed_build_is_retried():
+    attempts = []
+
+    def flaky_factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("credentials not found")
+        return object()
+
+    registry = ServiceRegistry()
+    registry.register("svc", flaky_factory)
+
+    with pytest.raises(RuntimeError):
+        registry.get("svc")
+    assert registry.status()["svc"]["error"] == "credentials not found"
+
+    registry.get("svc")
+    assert registry.status()["svc"] == {
+        "ready": True,
+        "build_seconds": registry.status()["svc"]["build_seconds"],
+        "error": None,
+    }
+
+
+def test_string_factories_import_lazily():
+    registry = ServiceRegistry()
+    registry.register("decoder", "json:JSONDecoder")
+
+    assert registry.get("decoder").decode("[1]") == [1]
+
+
+@pytest.mark.asyncio
+async def test_warm_up_runs_in_background_and_swallows_errors():
+    registry = ServiceRegistry()
+    registry.register("ok", Closable)
+    registry.register("broken", lambda: 1 / 0)
+    registry.register("on_demand", Closable, warm_up=False)
+
+    await registry.start_warm_up()
+
+    assert registry.is_ready("ok")
+    assert not registry.is_ready("broken")
+    assert not registry.is_ready("on_demand")
+    assert "division by zero" in registry.status()["broken"]["error"]
+
+
+@pytest.mark.asyncio
+async def test_aget_builds_off_the_event_loop():
+    loop_thread = threading.get_ident()
+    build_threads = []
+
+    def factory():
+        build_threads.append(threading.get_ident())
+        return object()
+
+    registry = ServiceRegistry()
+    registry.register("svc", factory)
+
+    await registry.aget("svc")
+
+    assert build_threads and build_threads[0] != loop_thread
+
+
+@pytest.mark.asyncio
+async def test_close_closes_built_services():
+    registry = ServiceRegistry()
+    registry.register("svc", Closable)
+    registry.register("unused", Closable)
+    service = registry.get("svc")
+
+    await registry.close()
+
+    assert service.closed is True
+    assert not registry.is_ready("unused")
+
+
+def test_importing_the_app_does_not_build_external_clients():
+    code = (
+        "import sys, app.main; "
+        "print([m for m in ('openai', 'google.cloud.speech', 'firebase_admin', "
+        "'google.generativeai') if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight, build_flight_key
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(10)))
+
+    assert results == ["result"] * 10
+    assert calls == 1
+    assert flight.get_stats() == {"executed": 1, "shared": 9, "in_flight": 0}
+
+    await flight.do("key", fetch)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_error_is_propagated_to_every_waiter():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("timeout")
+
+    results = await asyncio.gather(
+        *(flight.do("key", fail) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_flight_key_depends_on_every_parameter():
+    base = build_flight_key(model="gpt-4o-mini", prompt="Hello", temperature=0.0)
+    assert base == build_flight_key(temperature=0.0, prompt="Hello", model="gpt-4o-mini")
+    assert base != build_flight_key(model="gpt-4o-mini", prompt="Hello", temperature=0.7)
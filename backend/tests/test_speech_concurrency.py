@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.cloud import speech
+
+from app.core.concurrency import ConcurrencyLimiter
+from app.services.speech_service import SpeechToTextService
+
+AUDIO = b"\x00" * 200
+
+
+class FakeAsyncClient:
+    """SpeechAsyncClient.recognize のローカル代替 - release されるまで応答しない"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.timeouts = []
+        self.active = 0
+        self.max_active = 0
+
+    async def recognize(self, config, audio, timeout):
+        self.timeouts.append(timeout)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await self.release.wait()
+        finally:
+            self.active -= 1
+        alternative = SimpleNamespace(transcript=" hello ", confidence=0.9)
+        return SimpleNamespace(results=[SimpleNamespace(alternatives=[alternative])])
+
+
+@pytest.fixture
+def async_client():
+    return FakeAsyncClient()
+
+
+@pytest.fixture
+def service(async_client):
+    return SpeechToTextService(async_client=async_client, max_concurrency=2, timeout=7.5)
+
+
+async def wait_until(predicate, timeout=5.0):
+    # 前処理はワーカースレッドで動くため、ループの反復回数ではなく時間で待つ
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        if loop.time() >= deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.001)
+
+
+@pytest.mark.asyncio
+async def test_recognition_is_bounded_and_counts_are_reported(service, async_client):
+    tasks = [asyncio.create_task(service.transcribe_audio(AUDIO)) for _ in range(5)]
+    await wait_until(lambda: service.limiter.queued == 3)
+
+    health = service.health_check()
+    assert health["in_flight"] == 2
+    assert health["queued"] == 3
+    assert health["max_concurrency"] == 2
+
+    async_client.release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert all(result["text"] == "hello" for result in results)
+    assert async_client.max_active == 2
+    assert async_client.timeouts == [7.5] * 5
+    assert service.limiter.stats() == {"max_concurrency": 2, "in_flight": 0, "queued": 0}
+
+
+@pytest.mark.asyncio
+async def test_memoryview_input_is_accepted(service, async_client):
+    async_client.release.set()
+
+    result = await service.transcribe_audio(memoryview(AUDIO))
+
+    assert result["success"] is True
+
+
+@pytest.mark.asyncio
+async def test_slot_is_released_when_the_call_fails():
+    limiter = ConcurrencyLimiter(1)
+
+    with pytest.raises(RuntimeError):
+        async with limiter.slot():
+            raise RuntimeError("deadline exceeded")
+
+    async with limiter.slot():
+        assert limiter.in_flight == 1
+    assert limiter.stats() == {"max_concurrency": 1, "in_flight": 0, "queued": 0}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_leave_the_queue():
+    limiter = ConcurrencyLimiter(1)
+    release = asyncio.Event()
+
+    async def hold():
+        async with limiter.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    waiter = asyncio.create_task(hold())
+    await wait_until(lambda: limiter.queued == 1)
+
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    release.set()
+    await holder
+
+    assert limiter.stats() == {"max_concurrency": 1, "in_flight": 0, "queued": 0}
+
+
+@pytest.mark.asyncio
+async def test_close_releases_the_shared_channel(service, async_client):
+    closed = []
+
+    async def close():
+        closed.append(True)
+
+    async_client.transport = SimpleNamespace(close=close)
+
+    await service.close()
+
+    assert closed == [True]
+    assert service._async_client is None
+
+
+def test_construction_creates_no_grpc_client(monkeypatch):
+    def fail():
+        raise AssertionError("client must be created lazily")
+
+    monkeypatch.setattr(speech, "SpeechClient", fail)
+    monkeypatch.setattr(speech, "SpeechAsyncClient", fail)
+
+    service = SpeechToTextService()
+
+    assert service._async_client is None
+    assert service.health_check()["client_ready"] is False
@@ -0,0 +1,286 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+
+from app.core.concurrency import CapacityExceededError
+from app.core.service_registry import service_registry
+from app.routers import speech as speech_router
+from app.services.speech_service import SpeechToTextService
+from app.utils.upload import UploadTooLargeError
+
+
+def _response(text, is_final):
+    alternative = SimpleNamespace(transcript=text, confidence=0.9 if is_final else 0.0)
+    result = SimpleNamespace(is_final=is_final, stability=0.5, alternatives=[alternative])
+    return SimpleNamespace(results=[result])
+
+
+class FakeStreamingClient:
+    """SpeechAsyncClient.streaming_recognize のローカル代替 - チャンクごとに途中結果、終了時に確定結果"""
+
+    def __init__(self):
+        self.chunks = []
+        self.config = None
+        self.cancelled = False
+
+    async def streaming_recognize(self, requests):
+        client = self
+
+        class Call:
+            def __aiter__(self):
+                return self.responses()
+
+            async def responses(self):
+                async for request in requests:
+                    if client.config is None:
+                        client.config = request.streaming_config
+                        continue
+                    client.chunks.append(request.audio_content)
+                    yield _response(b"".join(client.chunks).decode(), is_final=False)
+                yield _response(b"".join(client.chunks).decode(), is_final=True)
+
+            def cancel(self):
+                client.cancelled = True
+
+        return Call()
+
+
+@pytest.fixture
+def fake_client():
+    return FakeStreamingClient()
+
+
+@pytest.fixture
+def service(fake_client):
+    return SpeechToTextService(async_client=fake_client, max_streams=1)
+
+
+@pytest.mark.asyncio
+async def test_interim_results_arrive_while_audio_is_still_streaming(service, fake_client):
+    first_result = asyncio.Event()
+
+    async def chunks():
+        yield b"hel"
+        # 最初の途中結果が届くまで次のチャンクを送らない（録音中に結果が返ることの確認）
+        await asyncio.wait_for(first_result.wait(), timeout=5)
+        yield b"lo"
+
+    results = []
+    async for result in service.stream_transcribe(chunks()):
+        results.append(result)
+        first_result.set()
+
+    assert [(r["type"], r["text"]) for r in results] == [
+        ("interim", "hel"),
+        ("interim", "hello"),
+        ("final", "hello"),
+    ]
+    assert fake_client.config.interim_results is True
+
+
+@pytest.mark.asyncio
+async def test_producer_errors_are_raised_to_the_consumer(service):
+    async def chunks():
+        yield b"a"
+        raise UploadTooLargeError(1)
+
+    with pytest.raises(UploadTooLargeError):
+        async for _ in service.stream_transcribe(chunks()):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_rpc_errors_are_raised_to_the_consumer():
+    class FailingClient:
+        async def streaming_recognize(self, requests):
+            await requests.__anext__()
+            raise RuntimeError("rpc failed")
+
+    async def chunks():
+        yield b"a"
+
+    service = SpeechToTextService(async_client=FailingClient())
+    with pytest.raises(RuntimeError, match="rpc failed"):
+        async for _ in service.stream_transcribe(chunks()):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_streams_over_capacity_are_rejected_without_waiting(service):
+    release = asyncio.Event()
+
+    async def held_chunks():
+        yield b"a"
+        await release.wait()
+
+    async def chunks():
+        yield b"b"
+
+    first = service.stream_transcribe(held_chunks())
+    await first.__anext__()
+
+    with pytest.raises(CapacityExceededError):
+        async for _ in service.stream_transcribe(chunks()):
+            pass
+
+    release.set()
+    async for _ in first:
+        pass
+    assert service.stream_limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_consumer_stopping_early_cancels_the_rpc(service, fake_client):
+    async def chunks():
+        yield b"a"
+        yield b"b"
+
+    stream = service.stream_transcribe(chunks())
+    await stream.__anext__()
+    await stream.aclose()
+
+    assert fake_client.cancelled is True
+    assert service.stream_limiter.in_flight == 0
+
+
+AUTH = {"type": "websocket.receive", "text": json.dumps({"type": "auth", "token": "valid"})}
+
+
+async def run_websocket(app, messages, auth=AUTH, query_string=b""):
+    """WebSocketエンドポイントをASGIで直接呼び出し、送信メッセージを返す"""
+    incoming = asyncio.Queue()
+    for message in [{"type": "websocket.connect"}, *([auth] if auth else []), *messages]:
+        incoming.put_nowait(message)
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "websocket",
+        "asgi": {"version": "3.0"},
+        "path": "/api/speech/stream",
+        "raw_path": b"/api/speech/stream",
+        "query_string": query_string,
+        "root_path": "",
+        "headers": [],
+        "scheme": "ws",
+        "server": ("test", 80),
+        "client": ("127.0.0.1", 1234),
+        "subprotocols": [],
+    }
+    await asyncio.wait_for(app(scope, incoming.get, send), timeout=5)
+    return sent
+
+
+@pytest.fixture
+def app(monkeypatch, service):
+    async def fake_verify(token):
+        if token != "valid":
+            raise ValueError("invalid token")
+        return {"uid": "u1"}
+
+    monkeypatch.setitem(service_registry._instances, "speech", service)
+    monkeypatch.setattr(speech_router, "verify_firebase_token", fake_verify)
+    app = FastAPI()
+    app.include_router(speech_router.router)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_websocket_pushes_interim_and_final_transcripts(app):
+    sent = await run_websocket(
+        app,
+        [
+            {"type": "websocket.receive", "bytes": b"hi"},
+            {"type": "websocket.receive", "bytes": b"!"},
+            {"type": "websocket.receive", "text": "stop"},
+        ],
+    )
+
+    payloads = [json.loads(m["text"]) for m in sent if m["type"] == "websocket.send"]
+    assert sent[0]["type"] == "websocket.accept"
+    assert [(p["type"], p.get("text")) for p in payloads] == [
+        ("interim", "hi"),
+        ("interim", "hi!"),
+        ("final", "hi!"),
+        ("end", None),
+    ]
+    assert sent[-1]["type"] == "websocket.close"
+
+
+@pytest.mark.parametrize(
+    "auth",
+    [
+        {"type": "websocket.receive", "text": json.dumps({"type": "auth", "token": "bad"})},
+        {"type": "websocket.receive", "text": "not json"},
+        {"type": "websocket.receive", "bytes": b"audio before auth"},
+    ],
+)
+@pytest.mark.asyncio
+async def test_websocket_rejects_invalid_auth_frame(app, auth):
+    sent = await run_websocket(app, [], auth=auth)
+
+    assert sent == [
+        {"type": "websocket.accept", "subprotocol": None, "headers": []},
+        {"type": "websocket.close", "code": 1008, "reason": ""},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_websocket_ignores_token_in_query_string(app, monkeypatch):
+    monkeypatch.setitem(speech_router.VOICE_CONFIG, "STREAM_AUTH_TIMEOUT", 0.05)
+
+    sent = await run_websocket(app, [], auth=None, query_string=b"token=valid")
+
+    assert sent[-1] == {"type": "websocket.close", "code": 1008, "reason": ""}
+
+
+@pytest.mark.asyncio
+async def test_websocket_closes_when_auth_frame_does_not_arrive(app, monkeypatch):
+    monkeypatch.setitem(speech_router.VOICE_CONFIG, "STREAM_AUTH_TIMEOUT", 0.05)
+
+    sent = await run_websocket(app, [], auth=None)
+
+    assert sent[-1] == {"type": "websocket.close", "code": 1008, "reason": ""}
+
+
+@pytest.mark.asyncio
+async def test_websocket_stops_when_size_limit_is_exceeded(app, monkeypatch):
+    monkeypatch.setitem(speech_router.VOICE_CONFIG, "MAX_FILE_SIZE", 4)
+
+    sent = await run_websocket(
+        app,
+        [
+            {"type": "websocket.receive", "bytes": b"abc"},
+            {"type": "websocket.receive", "bytes": b"def"},
+        ],
+    )
+
+    payloads = [json.loads(m["text"]) for m in sent if m["type"] == "websocket.send"]
+    assert payloads[-1]["type"] == "error"
+    assert sent[-1] == {"type": "websocket.close", "code": 1011, "reason": ""}
+
+
+@pytest.mark.asyncio
+async def test_websocket_over_capacity_closes_with_try_again_later(app, service):
+    release = asyncio.Event()
+
+    async def held_chunks():
+        yield b"a"
+        await release.wait()
+
+    held = service.stream_transcribe(held_chunks())
+    await held.__anext__()
+    try:
+        sent = await run_websocket(app, [{"type": "websocket.receive", "bytes": b"hi"}])
+    finally:
+        release.set()
+        await held.aclose()
+
+    payloads = [json.loads(m["text"]) for m in sent if m["type"] == "websocket.send"]
+    assert payloads[-1]["type"] == "error"
+    assert sent[-1] == {"type": "websocket.close", "code": 1013, "reason": ""}
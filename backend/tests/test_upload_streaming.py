@@ -0,0 +1,97 @@
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.utils.upload import UploadTooLargeError, receive_upload, upload_view
+
+MAX_SIZE = 64 * 1024
+SPOOL_THRESHOLD = 1024
+
+
+@pytest.fixture
+def received():
+    return {}
+
+
+@pytest.fixture
+def client(received):
+    async def upload(request):
+        try:
+            audio = await receive_upload(
+                request, "audio", max_size=MAX_SIZE, spool_threshold=SPOOL_THRESHOLD
+            )
+        except UploadTooLargeError:
+            return JSONResponse({"error": "too large"}, status_code=413)
+
+        with upload_view(audio) as view:
+            received["view_type"] = type(view).__name__
+            received["on_disk"] = audio.file.name is not None
+            received["data"] = bytes(view)
+        await audio.close()
+        return JSONResponse({"size": len(received["data"])})
+
+    app = Starlette(routes=[Route("/upload", upload, methods=["POST"])])
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size, on_disk", [(100, False), (10 * 1024, True)])
+async def test_upload_is_exposed_as_memoryview(client, received, size, on_disk):
+    payload = bytes(range(256)) * (size // 256) + b"x" * (size % 256)
+
+    response = await client.post("/upload", files={"audio": ("a.webm", payload, "audio/webm")})
+
+    assert response.json() == {"size": size}
+    assert received["view_type"] == "memoryview"
+    assert received["on_disk"] is on_disk
+    assert received["data"] == payload
+
+
+@pytest.mark.asyncio
+async def test_oversized_content_length_is_rejected_before_reading_body(client):
+    streamed = []
+
+    async def body():
+        streamed.append(True)
+        yield b"never read"
+
+    response = await client.post(
+        "/upload",
+        content=body(),
+        headers={
+            "Content-Type": "multipart/form-data; boundary=x",
+            "Content-Length": str(MAX_SIZE * 2),
+        },
+    )
+
+    assert response.status_code == 413
+    assert streamed == []
+
+
+@pytest.mark.asyncio
+async def test_limit_is_enforced_while_streaming_without_content_length(client):
+    boundary = b"boundary123"
+    chunks_sent = []
+
+    async def body():
+        yield (
+            b"--" + boundary + b"\r\n"
+            b'Content-Disposition: form-data; name="audio"; filename="a.webm"\r\n'
+            b"Content-Type: audio/webm\r\n\r\n"
+        )
+        for _ in range(100):
+            chunks_sent.append(1)
+            yield b"0" * 4096
+        yield b"\r\n--" + boundary + b"--\r\n"
+
+    response = await client.post(
+        "/upload",
+        content=body(),
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary.decode()}"},
+    )
+
+    assert response.status_code == 413
+    # 上限（64KB = 16チャンク）を超えた時点で受信をやめる
+    assert len(chunks_sent) < 100
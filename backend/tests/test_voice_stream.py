@@ -0,0 +1,80 @@
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.routers import voice as voice_router
+from app.core.database import get_async_db
+from app.core.service_registry import service_registry
+from app.utils.principal import Principal, get_current_principal
+
+PRINCIPAL = Principal(user_id=uuid.uuid4(), firebase_uid="u1", email="u1@example.com", name="u1")
+CHILD_ID = uuid.uuid4()
+
+
+class RecordingSession:
+    """リクエストスコープのセッションの代替（操作順を記録）"""
+
+    def __init__(self, events):
+        self.events = events
+        self.closed = False
+
+    async def execute(self, stmt):
+        child = SimpleNamespace(id=CHILD_ID, birthdate=None)
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(first=lambda: child))
+
+    def add(self, obj):
+        obj.id = uuid.uuid4()
+
+    async def commit(self):
+        self.events.append("commit")
+
+    async def refresh(self, obj):
+        self.events.append("refresh")
+
+    async def close(self):
+        self.closed = True
+        self.events.append("close")
+
+
+@pytest.mark.asyncio
+async def test_stream_releases_db_session_before_generation(monkeypatch):
+    events = []
+    session = RecordingSession(events)
+
+    class FakeAIService:
+        async def stream_feedback(self, transcript, child_age=None, feedback_type=None):
+            events.append(f"generate:closed={session.closed}")
+            yield "よくできたね"
+
+    async def save_feedback(challenge_id, feedback):
+        events.append("save")
+
+    async def invalidate(user_key):
+        pass
+
+    monkeypatch.setitem(service_registry._instances, "ai_feedback", FakeAIService())
+    monkeypatch.setattr(voice_router, "save_challenge_feedback", save_feedback)
+    monkeypatch.setattr(voice_router, "invalidate_user_responses", invalidate)
+
+    app = FastAPI()
+    app.include_router(voice_router.router)
+
+    async def override_db():
+        yield session
+
+    app.dependency_overrides[get_async_db] = override_db
+    app.dependency_overrides[get_current_principal] = lambda: PRINCIPAL
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/voice/transcribe/stream",
+            json={"transcript": "Hello", "child_id": str(CHILD_ID)},
+        )
+
+    assert response.status_code == 200
+    assert "event: done" in response.text
+    assert events == ["commit", "close", "generate:closed=True", "save"]
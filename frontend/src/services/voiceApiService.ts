@@ -52,6 +52,23 @@ export interface SaveTranscriptionRequest {
   duration?: number;
 }
 
+export interface VoiceHistoryEntry {
+  id: string;
+  transcript: string;
+  ai_feedback: string | null;
+  created_at: string;
+}
+
+// /api/voice/history の1ページ分（next_cursorがnullなら最終ページ）
+export interface VoiceHistoryPage {
+  child_id: string;
+  transcripts: VoiceHistoryEntry[];
+  next_cursor: string | null;
+}
+
+// 履歴取得時の1ページあたりの件数（バックエンドのPAGINATION.MAX_LIMIT）
+const HISTORY_PAGE_LIMIT = 100;
+
 // 既存のApiServiceクラスに合わせた静的メソッド音声サービス
 export class VoiceApiService {
   /**
@@ -229,10 +246,25 @@ export class VoiceApiService {
 
   /**
    * 子どもの音声履歴取得（振り返り用）
+   * APIはページ単位で返すため、next_cursorを辿って全件を取得する
    */
-  static async getVoiceHistory(childId: string) {
+  static async getVoiceHistory(childId: string): Promise<VoiceHistoryPage> {
     try {
-      return await ApiService.get(`/api/voice/history/${childId}`);
+      const transcripts: VoiceHistoryEntry[] = [];
+      let cursor: string | null = null;
+      do {
+        const params = new URLSearchParams({ limit: String(HISTORY_PAGE_LIMIT) });
+        if (cursor) {
+          params.set('cursor', cursor);
+        }
+        const page: VoiceHistoryPage = await ApiService.get<VoiceHistoryPage>(
+          `/api/voice/history/${childId}?${params.toString()}`
+        );
+        transcripts.push(...page.transcripts);
+        cursor = page.next_cursor;
+      } while (cursor);
+
+      return { child_id: childId, transcripts, next_cursor: null };
     } catch (error) {
       console.error('音声履歴取得エラー:', error);
       throw error;